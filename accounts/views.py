@@ -6,6 +6,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.expand import ExpandMixin
+from api.timing import GenericServerTimingMixin
+
 from .models import Organization
 from .serializers import (
     OrganizationSerializer,
@@ -16,10 +19,11 @@ from .serializers import (
 User = get_user_model()
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(GenericServerTimingMixin, ExpandMixin, viewsets.ModelViewSet):
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Organization.objects.all()
+    expandable_fields = {"owner": "accounts.views.UserDetailView"}
 
     @action(detail=True, methods=["post"], url_path="regenerate-key")
     def regenerate_api_key(self, request, _pk=None):
@@ -29,15 +33,19 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         return Response({"api_key": organization.api_key})
 
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(GenericServerTimingMixin, generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserRegistrationSerializer
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(GenericServerTimingMixin, generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
 
     def get_object(self):
         return self.request.user
+
+    def get_queryset(self):
+        # Users are only ever visible to themselves, e.g. as an expanded owner.
+        return User.objects.filter(pk=self.request.user.pk)
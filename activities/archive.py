@@ -0,0 +1,35 @@
+from api.archive import move_in_chunks
+
+from . import counters
+from .models import Activity, ArchivedActivity
+
+
+def copy_activities(activities):
+    ArchivedActivity.objects.bulk_create(
+        [
+            ArchivedActivity(
+                id=activity.id,
+                user_id=activity.user_id,
+                contact_id=activity.contact_id,
+                lead=activity.lead_id,
+                activity_type=activity.activity_type,
+                summary=activity.summary,
+                details=activity.details,
+                date=activity.date,
+            )
+            for activity in activities
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def archive_activities(cutoff, batch_size, dry_run=False):
+    """Move activities dated before ``cutoff`` into ``ArchivedActivity``.
+
+    Archived activities still count towards their contact and lead, so counter
+    maintenance is suspended while the hot rows are deleted.
+    """
+    with counters.suspended():
+        return move_in_chunks(
+            Activity.objects.filter(date__lt=cutoff), copy_activities, batch_size, dry_run
+        )
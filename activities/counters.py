@@ -0,0 +1,131 @@
+"""
+Maintenance of the denormalized activity counters on Contact and Lead.
+
+``last_activity_at``, ``activity_count`` and the per-type ``<type>_count``
+fields are updated with single ``UPDATE ... SET x = x + n`` statements, so
+concurrent writers never lose increments. Archived activities still count:
+archiving runs with maintenance suspended and the rebuild reads both tables.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from contacts.models import Contact
+from leads.models import Lead
+
+from .models import Activity, ArchivedActivity
+
+TYPE_FIELDS = {value: f"{value}_count" for value, _label in Activity.TYPE_CHOICES}
+
+# (target model, Activity column, ArchivedActivity column)
+TARGETS = (
+    (Contact, "contact_id", "contact_id"),
+    (Lead, "lead_id", "lead"),
+)
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Skip counter maintenance in this thread, e.g. while rows move to the archive."""
+    previous = getattr(_state, "suspended", False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, "suspended", False)
+
+
+def record_created(activities):
+    """Count ``activities`` against their contact and lead, one UPDATE per target."""
+    if is_suspended():
+        return
+    for model, column, _archived_column in TARGETS:
+        types = defaultdict(Counter)
+        latest = {}
+        for activity in activities:
+            target_id = getattr(activity, column)
+            if target_id is None:
+                continue
+            types[target_id][activity.activity_type] += 1
+            latest[target_id] = max(latest.get(target_id, activity.date), activity.date)
+
+        for target_id, counts in types.items():
+            when = Value(latest[target_id])
+            changes = {
+                TYPE_FIELDS[activity_type]: F(TYPE_FIELDS[activity_type]) + n
+                for activity_type, n in counts.items()
+            }
+            model.objects.filter(pk=target_id).update(
+                activity_count=F("activity_count") + sum(counts.values()),
+                last_activity_at=Greatest(Coalesce("last_activity_at", when), when),
+                **changes,
+            )
+
+
+def record_deleted(activities):
+    """Uncount ``activities`` and recompute ``last_activity_at`` for their targets."""
+    if is_suspended():
+        return
+    for model, column, archived_column in TARGETS:
+        types = defaultdict(Counter)
+        for activity in activities:
+            target_id = getattr(activity, column)
+            if target_id is not None:
+                types[target_id][activity.activity_type] += 1
+
+        for target_id, counts in types.items():
+            changes = {
+                TYPE_FIELDS[activity_type]: F(TYPE_FIELDS[activity_type]) - n
+                for activity_type, n in counts.items()
+            }
+            model.objects.filter(pk=target_id).update(
+                activity_count=F("activity_count") - sum(counts.values()),
+                last_activity_at=_latest(column, archived_column),
+                **changes,
+            )
+
+
+def rebuild():
+    """Recompute every counter from the hot and archive tables, one UPDATE per model."""
+    for model, column, archived_column in TARGETS:
+        counts = {
+            field: _total(column, archived_column, Q(activity_type=activity_type))
+            for activity_type, field in TYPE_FIELDS.items()
+        }
+        model.objects.update(
+            activity_count=_total(column, archived_column, Q()),
+            last_activity_at=_latest(column, archived_column),
+            **counts,
+        )
+
+
+def _aggregate(source, column, expression):
+    return Subquery(
+        source.objects.filter(**{column: OuterRef("pk")})
+        .order_by()
+        .values(column)
+        .annotate(value=expression)
+        .values("value")
+    )
+
+
+def _total(column, archived_column, condition):
+    hot = _aggregate(Activity, column, Count("pk", filter=condition))
+    cold = _aggregate(ArchivedActivity, archived_column, Count("pk", filter=condition))
+    return Coalesce(hot, 0) + Coalesce(cold, 0)
+
+
+def _latest(column, archived_column):
+    hot = _aggregate(Activity, column, Max("date"))
+    cold = _aggregate(ArchivedActivity, archived_column, Max("date"))
+    return Greatest(Coalesce(hot, cold), Coalesce(cold, hot))
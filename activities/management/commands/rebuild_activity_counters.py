@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from activities.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute activity counters on contacts and leads from the activity tables"
+
+    def handle(self, *_args, **_kwargs):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS("Rebuilt activity counters for contacts and leads"))
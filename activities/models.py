@@ -1,3 +1,5 @@
+from types import SimpleNamespace
+
 from django.conf import settings
 from django.db import models
 
@@ -5,6 +7,26 @@ from contacts.models import Contact
 from leads.models import Lead
 
 
+class ActivityQuerySet(models.QuerySet):
+    """Keeps the Contact/Lead activity counters current on bulk paths too."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .counters import record_created
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        record_created(objs)
+        return objs
+
+    def delete(self):
+        from .counters import record_deleted, suspended
+
+        deleted = list(self.values("contact_id", "lead_id", "activity_type", "date"))
+        with suspended():
+            result = super().delete()
+        record_deleted([SimpleNamespace(**row) for row in deleted])
+        return result
+
+
 class Activity(models.Model):
     TYPE_CHOICES = (
         ("call", "Call"),
@@ -34,5 +56,40 @@ class Activity(models.Model):
 
     date = models.DateTimeField(auto_now_add=True)
 
+    objects = ActivityQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.get_activity_type_display()}: {self.summary}"
+
+
+class ArchivedActivity(models.Model):
+    """Cold-storage copy of an Activity, moved here by ``archive_records``.
+
+    Primary keys are preserved so archived rows keep the ids clients already
+    know. ``lead`` is a plain id because the lead itself may be archived too.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_activities",
+    )
+    contact = models.ForeignKey(
+        Contact,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="archived_activities",
+    )
+    lead = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+    activity_type = models.CharField(max_length=20, choices=Activity.TYPE_CHOICES)
+    summary = models.CharField(max_length=255)
+    details = models.TextField(blank=True)
+
+    date = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
     def __str__(self):
         return f"{self.get_activity_type_display()}: {self.summary}"
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Activity
+from .models import Activity, ArchivedActivity
 
 
 class ActivitySerializer(serializers.ModelSerializer):
@@ -12,3 +12,9 @@ class ActivitySerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
         return super().create(validated_data)
+
+
+class ArchivedActivitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedActivity
+        fields = "__all__"
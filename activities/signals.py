@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .counters import record_created, record_deleted
+from .models import Activity
+
+COUNTED_FIELDS = ("contact_id", "lead_id", "activity_type", "date")
+
+
+@receiver(pre_save, sender=Activity)
+def remember_counted_fields(sender, instance, **kwargs):
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).values(*COUNTED_FIELDS).first()
+        instance._counted = SimpleNamespace(**previous) if previous else None
+
+
+@receiver(post_save, sender=Activity)
+def count_saved_activity(sender, instance, created, **kwargs):
+    if created:
+        record_created([instance])
+        return
+    previous = getattr(instance, "_counted", None)
+    if previous and any(
+        getattr(previous, field) != getattr(instance, field) for field in COUNTED_FIELDS
+    ):
+        record_deleted([previous])
+        record_created([instance])
+
+
+@receiver(post_delete, sender=Activity)
+def uncount_deleted_activity(sender, instance, **kwargs):
+    record_deleted([instance])
@@ -1,15 +1,38 @@
 from rest_framework import permissions, viewsets
 
-from .models import Activity
-from .serializers import ActivitySerializer
+from api.archive import IncludeArchivedMixin
+from api.coalesce import CoalesceSearchMixin
+from api.expand import ExpandMixin
+from api.fast_list import ValuesListMixin
+from api.timing import GenericServerTimingMixin
 
+from .models import Activity, ArchivedActivity
+from .serializers import ActivitySerializer, ArchivedActivitySerializer
 
-class ActivityViewSet(viewsets.ModelViewSet):
+
+class ActivityViewSet(
+    GenericServerTimingMixin,
+    CoalesceSearchMixin,
+    ExpandMixin,
+    IncludeArchivedMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ActivitySerializer
+    archive_serializer_class = ArchivedActivitySerializer
+    archive_ordering = ["-date"]
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ["activity_type"]
     search_fields = ["summary", "details"]
     ordering_fields = ["date"]
+    expandable_fields = {
+        "contact": "contacts.views.ContactViewSet",
+        "lead": "leads.views.LeadViewSet",
+        "user": "accounts.views.UserDetailView",
+    }
 
     def get_queryset(self):
         return Activity.objects.filter(user=self.request.user)
+
+    def get_archive_queryset(self):
+        return ArchivedActivity.objects.filter(user=self.request.user)
@@ -1,6 +1,30 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def install_query_hooks(sender, connection, **kwargs):
+    """
+    Wrap every query of ``connection`` in the per-request instrumentation.
+
+    The hooks find the request's state in context variables, which follow a
+    request into ``sync_to_async`` threads; wrappers entered per request with
+    ``connection.execute_wrapper`` only cover the connection of the thread
+    that entered them, which under ASGI is not the one running the queries.
+    """
+    from . import budget, metrics, slow_queries, timing
+
+    budget.prepare_connection(connection)
+    # The budget first, so a query it refuses is neither counted nor timed.
+    hooks = [budget.enforce, timing.sql_wrapper, metrics.count_query, slow_queries.record]
+    # First in the list, so execute_wrapper() blocks that were entered earlier
+    # and pop their own wrapper on exit never remove these.
+    if hooks[0] not in connection.execute_wrappers:
+        connection.execute_wrappers[:0] = hooks
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        connection_created.connect(install_query_hooks)
@@ -0,0 +1,111 @@
+"""
+Shared helpers for moving old rows into cold-storage tables and reading them back.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Value
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+
+
+def move_in_chunks(queryset, copy_rows, batch_size, dry_run=False):
+    """Move the rows of ``queryset`` into cold storage ``batch_size`` at a time.
+
+    ``copy_rows`` receives a list of hot instances and writes their archive
+    copies; the hot rows are deleted in the same transaction, so a failure
+    never leaves a row in both places. Returns the number of rows moved.
+    """
+    if dry_run:
+        return queryset.count()
+
+    model = queryset.model
+    pending = queryset.order_by("pk").values_list("pk", flat=True)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            ids = list(pending[:batch_size])
+            if not ids:
+                break
+            copy_rows(list(model._default_manager.filter(pk__in=ids)))
+            model._default_manager.filter(pk__in=ids).delete()
+        moved += len(ids)
+    return moved
+
+
+class IncludeArchivedMixin:
+    """
+    Adds ``?include_archived=true`` to a viewset's list action.
+
+    Hot and archived rows are filtered with the view's own filter backends,
+    merged with a ``UNION ALL`` over ids and sort keys, and only the rows on
+    the requested page are loaded and serialized. Views set
+    ``archive_serializer_class`` and override ``get_archive_queryset()``,
+    which scopes the archived rows like ``get_queryset()`` scopes the hot ones.
+    """
+
+    archive_serializer_class = None
+    archive_ordering = None
+
+    def get_archive_queryset(self):
+        raise ImproperlyConfigured(
+            f"{type(self).__name__} must override get_archive_queryset() to list archived rows."
+        )
+
+    def get_archive_serializer_class(self):
+        if self.archive_serializer_class is None:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} must set archive_serializer_class to list archived rows."
+            )
+        return self.archive_serializer_class
+
+    def include_archived(self):
+        value = self.request.query_params.get("include_archived", "")
+        return value.lower() in ("1", "true", "yes")
+
+    def list(self, request, *args, **kwargs):
+        if not self.include_archived():
+            return super().list(request, *args, **kwargs)
+
+        hot = self.filter_queryset(self.get_queryset())
+        cold = self.filter_queryset(self.get_archive_queryset())
+
+        ordering = list(
+            OrderingFilter().get_ordering(request, hot, self) or self.archive_ordering or []
+        )
+        if not any(term.lstrip("-") == "id" for term in ordering):
+            ordering.append("-id")
+        sort_keys = dict.fromkeys(term.lstrip("-") for term in ordering)
+        columns = ["id", *(key for key in sort_keys if key != "id")]
+
+        combined = (
+            hot.order_by()
+            .values(*columns)
+            .annotate(archived=Value(False))
+            .union(cold.order_by().values(*columns).annotate(archived=Value(True)), all=True)
+            .order_by(*ordering)
+        )
+
+        page = self.paginate_queryset(combined)
+        rows = page if page is not None else list(combined)
+
+        hot_rows = hot.model._default_manager.in_bulk(
+            [row["id"] for row in rows if not row["archived"]]
+        )
+        cold_rows = cold.model._default_manager.in_bulk(
+            [row["id"] for row in rows if row["archived"]]
+        )
+        archive_serializer_class = self.get_archive_serializer_class()
+        context = self.get_serializer_context()
+        data = []
+        for row in rows:
+            if row["archived"]:
+                item = archive_serializer_class(cold_rows[row["id"]], context=context).data
+            else:
+                item = self.get_serializer(hot_rows[row["id"]]).data
+            item["archived"] = bool(row["archived"])
+            data.append(item)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,135 @@
+"""
+Async list and retrieve endpoints for the main CRM viewsets.
+
+``AsyncReadView`` serves ``GET`` for an existing DRF viewset from an ``async``
+view, so under an ASGI server a request waiting on a slow client or on the
+database holds no thread. Everything that decides the response comes from the
+viewset itself: authentication, permissions and throttles (``initial()``),
+``get_queryset()``, filter backends, pagination and the serializer, so the
+payload matches the sync endpoint byte for byte. Those steps run in one short
+``sync_to_async`` call because backends and throttles use sync APIs; rows
+are then counted and fetched with the async ORM and serialized like the
+sync list, from ``.values()`` rows where the serializer allows it
+(``api.fast_list``) and from prefetched tags otherwise.
+
+``?expand=`` is applied as on the viewset, see ``api.expand``.
+
+``?include_archived=true`` merges hot and cold tables with a sync query and
+is delegated to the sync implementation.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from api.archive import IncludeArchivedMixin
+from api.expand import expand, parse
+from api.fast_list import values_serializer
+
+
+class AsyncReadView(View):
+    viewset = None
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request, pk=None):
+        view = self.viewset(
+            action_map={"get": "list" if pk is None else "retrieve"},
+            args=(),
+            kwargs={} if pk is None else {"pk": pk},
+            format_kwarg=None,
+        )
+        view.request = drf_request = view.initialize_request(request)
+        view.headers = view.default_response_headers
+        try:
+            if pk is None:
+                data = await self.list(view, drf_request)
+            else:
+                data = await self.retrieve(view, drf_request, pk)
+            response = Response(data)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return self.render(view.finalize_response(drf_request, response))
+
+    async def list(self, view, request):
+        if isinstance(view, IncludeArchivedMixin):
+            view.request = request
+            if view.include_archived():
+                # Expanded there too, as the viewset's list() does it.
+                return await sync_to_async(self.sync_list)(view, request)
+
+        fast = values_serializer(view.get_serializer_class())
+        queryset = await sync_to_async(self.prepare)(view, request, fast)
+        tree = parse(request, self.viewset)
+        pagination = view.paginator
+        page_size = pagination.get_page_size(request) if pagination else None
+        if not page_size:
+            rows = [obj async for obj in queryset.aiterator(chunk_size=2000)]
+            data = await self.serialize(view, request, fast, rows)
+            return await self.expand(request, data, tree)
+
+        paginator = pagination.django_paginator_class(queryset, page_size)
+        # Counted here so the paginator never queries from the event loop.
+        paginator.count = await queryset.acount()
+        page_number = pagination.get_page_number(request, paginator)
+        try:
+            pagination.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                pagination.invalid_page_message.format(page_number=page_number, message=str(exc))
+            ) from exc
+        pagination.request = request
+        rows = [obj async for obj in pagination.page.object_list.aiterator(chunk_size=page_size)]
+        data = await self.serialize(view, request, fast, rows)
+        return await self.expand(request, pagination.get_paginated_response(data).data, tree)
+
+    async def retrieve(self, view, request, pk):
+        queryset = await sync_to_async(self.prepare)(view, request)
+        tree = parse(request, self.viewset)
+        model = queryset.model
+        try:
+            obj = await queryset.aget(**{view.lookup_field: pk})
+        except model.DoesNotExist:
+            raise Http404(f"No {model._meta.object_name} matches the given query.") from None
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404 from None
+        view.check_object_permissions(request, obj)
+        return await self.expand(request, view.get_serializer(obj).data, tree)
+
+    async def serialize(self, view, request, fast, rows):
+        if fast is not None:
+            return await fast.aserialize(rows, request)
+        return view.get_serializer(rows, many=True).data
+
+    async def expand(self, request, data, tree):
+        if not tree:
+            return data
+        return await sync_to_async(expand)(request, self.viewset, data, tree)
+
+    def prepare(self, view, request, fast=None):
+        """
+        Run the viewset's checks and return its filtered queryset: as ``.values()``
+        rows for ``fast``, the list's ``ValuesSerializer``, else with tags prefetched.
+        """
+        view.initial(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        if fast is not None:
+            return queryset.values(*fast.columns)
+        if any(field.name == "tags" for field in queryset.model._meta.many_to_many):
+            queryset = queryset.prefetch_related("tags")
+        return queryset
+
+    def sync_list(self, view, request):
+        view.initial(request)
+        return view.list(request).data
+
+    def render(self, response):
+        # Rendered here: Django would otherwise render a DRF Response in a thread.
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
@@ -0,0 +1,203 @@
+"""
+Several API calls in one round trip.
+
+``POST /api/v1/batch/`` takes a list of sub-requests::
+
+    {"requests": [
+        {"method": "GET", "path": "/api/v1/leads/", "query": {"status": "new"}},
+        {"method": "GET", "path": "/api/v1/deals/forecast/"},
+        {"method": "POST", "path": "/api/v1/contacts/", "body": {"first_name": "Ada"}}
+    ]}
+
+and answers ``{"responses": [{"status": ..., "headers": {...}, "body": ...}]}``
+in the same order. Each sub-request is resolved and dispatched to its view in
+this process, so it skips the network round trip and the middleware stack.
+The batch is authenticated once and its user is handed to every sub-request,
+which otherwise goes through its view as usual: permissions, throttles (each
+sub-request counts against the rate), validation and error responses.
+
+Sub-requests run in order, except that consecutive GETs run together on up to
+``BATCH_MAX_WORKERS`` threads unless the batch sets ``"parallel": false``. A
+write therefore sees the effects of every sub-request before it.
+
+Each sub-request has its own query budget (see ``api.budget``), set by its
+view and enforced in the thread that runs it; the batch itself has none.
+"""
+
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import budget
+from .timing import ServerTimingMixin
+
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+# Response headers that describe the sub-response's own encoding.
+SKIPPED_HEADERS = {"content-type", "content-length"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=METHODS, default="GET")
+    path = serializers.CharField()
+    query = serializers.DictField(required=False, default=dict)
+    body = serializers.JSONField(required=False, default=None)
+
+    def validate_path(self, path):
+        url = urlsplit(path)
+        if url.scheme or url.netloc or not url.path.startswith(reverse("api-root")):
+            raise serializers.ValidationError("Must be an API path such as /api/v1/leads/.")
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            raise serializers.ValidationError("No endpoint matches this path.") from None
+        if match.url_name == "batch":
+            raise serializers.ValidationError("Batches cannot be nested.")
+        return path
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=True)
+
+    def validate_requests(self, requests):
+        if len(requests) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        return requests
+
+
+@budget.query_budget(max_queries=0, timeout_ms=0)
+class BatchView(ServerTimingMixin, APIView):
+    # Each sub-request is throttled by its own view.
+    throttle_classes = []
+
+    def post(self, request, *_args, **_kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        batch = serializer.validated_data
+        return Response({"responses": run(request, batch["requests"], batch["parallel"])})
+
+
+def run(request, calls, parallel=True):
+    """The result of each of ``calls`` for ``request``'s user, in order."""
+    results = [None] * len(calls)
+    reads = []
+
+    def run_reads():
+        if parallel and len(reads) > 1 and settings.BATCH_MAX_WORKERS > 1:
+            done = executor().map(lambda index: dispatch_in_thread(request, calls[index]), reads)
+        else:
+            done = (dispatch(request, calls[index]) for index in reads)
+        for index, result in zip(reads, done):
+            results[index] = result
+        reads.clear()
+
+    for index, call in enumerate(calls):
+        if call["method"] == "GET":
+            reads.append(index)
+            continue
+        run_reads()
+        results[index] = dispatch(request, call)
+    run_reads()
+    return results
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.BATCH_MAX_WORKERS, "batch")
+        return _executor
+
+
+def dispatch_in_thread(request, call):
+    # Pool threads are not counted in the workers x threads the server keeps
+    # within DB_MAX_CONNECTIONS (api.serving), so they hold no connection
+    # between sub-requests.
+    try:
+        return dispatch(request, call)
+    finally:
+        connections.close_all()
+
+
+def dispatch(request, call):
+    """Run one sub-request through its view and return its result."""
+    sub_request = build_request(request, call)
+    try:
+        match = resolve(sub_request.path_info)
+        sub_request.resolver_match = match
+        with budget.track() as sub_budget:
+            sub_budget.configure(sub_request, match.func)
+            response = match.func(sub_request, *match.args, **match.kwargs)
+            if hasattr(response, "__await__"):
+                # The async read views.
+                response = async_to_sync(_await)(response)
+    except Exception as exc:
+        response = response_for_exception(sub_request, exc)
+    return result(response)
+
+
+def build_request(request, call):
+    url = urlsplit(call["path"])
+    query = "&".join(filter(None, [url.query, urlencode(call["query"], doseq=True)]))
+    body = b"" if call["body"] is None else json.dumps(call["body"]).encode()
+    script_name = request.META.get("SCRIPT_NAME", "")
+
+    environ = {key: value for key, value in request.META.items() if isinstance(value, str)}
+    environ.update(
+        {
+            "REQUEST_METHOD": call["method"],
+            "PATH_INFO": url.path.removeprefix(script_name.rstrip("/")),
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    sub_request = WSGIRequest(environ)
+    # DRF's hook for a user authenticated elsewhere: the sub-request skips its
+    # authentication classes and gets the batch's user and token.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def result(response):
+    headers = {
+        header: value for header, value in response.items() if header.lower() not in SKIPPED_HEADERS
+    }
+    if isinstance(response, Response):
+        # Not rendered yet: the data goes into the batch response as it is.
+        body = response.data
+    else:
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        if not content:
+            body = None
+        elif "json" in response.get("Content-Type", ""):
+            body = json.loads(content)
+        else:
+            body = content.decode(response.charset, "replace")
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+async def _await(awaitable):
+    return await awaitable
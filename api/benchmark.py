@@ -0,0 +1,340 @@
+"""
+Endpoint benchmarks at several data scales.
+
+Each case is a request made through the DRF test client against the real
+URLconf as the busiest generated owner. Latency percentiles come from timed
+iterations, the query count from the last of them (the steady state, with
+caches warm) and peak memory from one extra request under tracemalloc, so
+tracing never skews the timings. Writes run inside a rolled-back transaction
+so the dataset stays the same from one iteration to the next.
+"""
+
+import io
+import math
+import platform
+import time
+import tracemalloc
+from typing import NamedTuple
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from accounts.models import Organization
+from activities.models import Activity
+from contacts.models import Contact
+from deals.models import Deal
+from leads.models import Lead
+from tags.models import Tag
+
+from . import datagen, metrics
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Per-owner volumes for seeded datasets; an average owner gets about this many rows.
+OWNER_VOLUMES = {
+    "organizations": 5,
+    "contacts": 200,
+    "leads": 300,
+    "deals": 100,
+    "activities": 1000,
+}
+ROWS_PER_OWNER = 2200
+
+# Differences below these are noise, however large they are relative to the baseline.
+NOISE_FLOOR_MS = 1.0
+NOISE_FLOOR_KIB = 64
+
+
+class Case(NamedTuple):
+    name: str
+    method: str
+    path: str
+    data: object = None
+    format: str = "json"
+
+
+def seed(scale, seed_value=0, workers=1):
+    """Fill the current database with about ``SCALES[scale]`` rows; returns the busiest owner."""
+    plan = datagen.Plan(
+        seed=seed_value,
+        prefix=f"bench-{scale}",
+        tag_ids=datagen.ensure_tags(30, "bench"),
+        batch_size=5000,
+        days=730,
+        now=timezone.now(),
+        **OWNER_VOLUMES,
+    )
+    datagen.tune_connection()
+    user_ids = datagen.create_users(plan, max(SCALES[scale] // ROWS_PER_OWNER, 1))
+    datagen.generate(plan, user_ids, workers)
+    return busiest_owner(user_ids)
+
+
+def busiest_owner(user_ids):
+    owner = (
+        Lead.objects.filter(owner_id__in=user_ids)
+        .values("owner_id")
+        .annotate(leads=Count("pk"))
+        .order_by("-leads")
+        .first()
+    )
+    return get_user_model().objects.get(pk=owner["owner_id"] if owner else user_ids[0])
+
+
+def build_cases(user):
+    """Every list, retrieve, create, search and filter endpoint, plus the CSV import."""
+    lead = Lead.objects.filter(owner=user).first()
+    contact = Contact.objects.filter(owner=user).first()
+    deal = Deal.objects.filter(owner=user).first()
+    activity = Activity.objects.filter(user=user).first()
+    organization = Organization.objects.filter(owner=user).first()
+    tag = Tag.objects.order_by("pk").first()
+    csv_rows = "".join(f"Bench,Lead{i},bench{i}@example.com\n" for i in range(50))
+
+    cases = [
+        Case("leads.list", "get", "/api/v1/leads/"),
+        Case("leads.search", "get", f"/api/v1/leads/?search={lead.last_name}"),
+        Case("leads.filter", "get", "/api/v1/leads/?status=qualified&ordering=-created_at"),
+        Case("leads.filter_tags", "get", f"/api/v1/leads/?tags={tag.name}"),
+        Case("leads.retrieve", "get", f"/api/v1/leads/{lead.pk}/"),
+        Case(
+            "leads.create",
+            "post",
+            "/api/v1/leads/",
+            {"first_name": "Bench", "last_name": "Lead", "email": "bench@example.com"},
+        ),
+        Case(
+            "leads.upload_csv",
+            "post",
+            "/api/v1/leads/upload_csv/",
+            {"file": ("leads.csv", f"first_name,last_name,email\n{csv_rows}")},
+            "multipart",
+        ),
+        Case("contacts.list", "get", "/api/v1/contacts/"),
+        Case("contacts.search", "get", f"/api/v1/contacts/?search={contact.last_name}"),
+        Case("contacts.filter", "get", f"/api/v1/contacts/?organization={organization.pk}"),
+        Case("contacts.retrieve", "get", f"/api/v1/contacts/{contact.pk}/"),
+        Case(
+            "contacts.create",
+            "post",
+            "/api/v1/contacts/",
+            {"first_name": "Bench", "last_name": "Contact", "email": "b@ex.io"},
+        ),
+        Case("deals.list", "get", "/api/v1/deals/"),
+        Case("deals.search", "get", f"/api/v1/deals/?search={deal.name.split()[0]}"),
+        Case("deals.filter", "get", "/api/v1/deals/?stage=negotiation"),
+        Case("deals.forecast", "get", "/api/v1/deals/forecast/"),
+        Case("deals.retrieve", "get", f"/api/v1/deals/{deal.pk}/"),
+        Case(
+            "deals.create",
+            "post",
+            "/api/v1/deals/",
+            {"name": "Bench deal", "value": "1000.00", "stage": "prospecting", "probability": 20},
+        ),
+        Case("activities.list", "get", "/api/v1/activities/"),
+        Case("activities.search", "get", "/api/v1/activities/?search=demo"),
+        Case("activities.filter", "get", "/api/v1/activities/?activity_type=call"),
+        Case("activities.retrieve", "get", f"/api/v1/activities/{activity.pk}/"),
+        Case(
+            "activities.create",
+            "post",
+            "/api/v1/activities/",
+            {"activity_type": "call", "summary": "Bench call", "contact": contact.pk},
+        ),
+        Case("tags.list", "get", "/api/v1/tags/"),
+        Case("tags.retrieve", "get", f"/api/v1/tags/{tag.pk}/"),
+        Case("tags.create", "post", "/api/v1/tags/", {"name": "bench-tag", "color": "#123456"}),
+        Case("organizations.list", "get", "/api/v1/organizations/"),
+        Case("organizations.retrieve", "get", f"/api/v1/organizations/{organization.pk}/"),
+        Case("organizations.create", "post", "/api/v1/organizations/", {"name": "Bench Inc"}),
+        # The async read path, for comparison with the sync cases of the same name.
+        Case("async.leads.list", "get", "/api/v1/async/leads/"),
+        Case("async.leads.search", "get", f"/api/v1/async/leads/?search={lead.last_name}"),
+        Case("async.leads.retrieve", "get", f"/api/v1/async/leads/{lead.pk}/"),
+        Case("async.contacts.list", "get", "/api/v1/async/contacts/"),
+        Case("async.deals.list", "get", "/api/v1/async/deals/"),
+        Case("async.activities.list", "get", "/api/v1/async/activities/"),
+    ]
+    return cases
+
+
+def run(user, cases, iterations=30, warmup=3):
+    """Benchmark ``cases`` as ``user``; returns ``{case name: metrics}``."""
+    client = APIClient()
+    client.force_authenticate(user=user)
+    throttle_key = UserRateThrottle.cache_format % {"scope": "user", "ident": user.pk}
+
+    results = {}
+    for case in cases:
+        cache.delete(throttle_key)
+        for _ in range(warmup):
+            _request(client, case)
+
+        timings = []
+        counter = metrics.QueryCounter()
+        for _ in range(iterations):
+            counter.count = 0
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = _request(client, case)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        tracemalloc.start()
+        try:
+            _request(client, case)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        results[case.name] = {
+            "status": response.status_code,
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p90_ms": round(percentile(timings, 0.9), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "mean_ms": round(sum(timings) / len(timings), 3),
+            "queries": counter.count,
+            "peak_kib": round(peak / 1024, 1),
+        }
+    return results
+
+
+def metrics_overhead(iterations=20_000):
+    """Per-request cost of PrometheusMiddleware in microseconds, against a trivial view."""
+    from .middleware import PrometheusMiddleware
+
+    request = RequestFactory().get("/api/v1/health/")
+    request.resolver_match = resolve("/api/v1/health/")
+    response = HttpResponse()
+
+    def view(_request):
+        return response
+
+    timings = {}
+    for name, handler in (("bare", view), ("instrumented", PrometheusMiddleware(view))):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            handler(request)
+        timings[name] = (time.perf_counter() - started) / iterations * 1_000_000
+    return {
+        "bare_us": round(timings["bare"], 3),
+        "instrumented_us": round(timings["instrumented"], 3),
+        "overhead_us": round(timings["instrumented"] - timings["bare"], 3),
+    }
+
+
+def renderer_payloads(user, rows=1000):
+    """Large list payloads, shaped like a page of each list endpoint, for ``renderers()``."""
+    from deals.serializers import DealSerializer
+    from leads.serializers import LeadSerializer
+
+    payloads = {}
+    for name, model, serializer_class in (
+        ("leads", Lead, LeadSerializer),
+        ("deals", Deal, DealSerializer),
+    ):
+        queryset = model.objects.filter(owner=user).prefetch_related("tags").order_by("pk")
+        results = serializer_class(queryset[:rows], many=True).data
+        payloads[name] = {"count": len(results), "next": None, "previous": None, "results": results}
+    return payloads
+
+
+def renderers(payloads, iterations=20):
+    """Time to render each payload with every renderer, and the size of what each writes."""
+    from rest_framework.renderers import JSONRenderer as StdlibJSONRenderer
+
+    from . import renderers as fast
+
+    candidates = {
+        "json.stdlib": StdlibJSONRenderer().render,
+        f"json.{'orjson' if fast.orjson else 'stdlib'}": fast.JSONRenderer().render,
+        "ndjson": fast.NDJSONRenderer().render,
+        "msgpack": fast.MessagePackRenderer().render,
+        "msgpack.python": fast.packb,
+    }
+    results = {}
+    for payload_name, payload in payloads.items():
+        for name, render in candidates.items():
+            content = render(payload)
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                render(payload)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            results[f"{payload_name}.{name}"] = {
+                "rows": len(payload["results"]),
+                "p50_ms": round(percentile(timings, 0.5), 3),
+                "p90_ms": round(percentile(timings, 0.9), 3),
+                "kib": round(len(content) / 1024, 1),
+            }
+    return results
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(math.ceil(len(sorted_values) * fraction), 1)
+    return sorted_values[rank - 1]
+
+
+def metadata():
+    return {
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Regressions of ``current`` against ``baseline`` as ``(scale, case, metric, before, after)``.
+
+    Latency and peak memory regress when they grow by more than ``threshold``
+    (a fraction) and by more than the noise floor; any extra query regresses.
+    """
+    regressions = []
+    for scale, cases in current["results"].items():
+        for name, after in cases.items():
+            before = baseline.get("results", {}).get(scale, {}).get(name)
+            if before is None:
+                continue
+            for metric, floor in (("p50_ms", NOISE_FLOOR_MS), ("p90_ms", NOISE_FLOOR_MS)):
+                if _grew(before[metric], after[metric], threshold, floor):
+                    regressions.append((scale, name, metric, before[metric], after[metric]))
+            if after["queries"] > before["queries"]:
+                regressions.append((scale, name, "queries", before["queries"], after["queries"]))
+            if _grew(before["peak_kib"], after["peak_kib"], threshold, NOISE_FLOOR_KIB):
+                regressions.append((scale, name, "peak_kib", before["peak_kib"], after["peak_kib"]))
+    return regressions
+
+
+def _grew(before, after, threshold, floor):
+    return after > before * (1 + threshold) and after - before > floor
+
+
+def _request(client, case):
+    if case.method == "get":
+        return client.get(case.path)
+    data = case.data
+    if case.format == "multipart":
+        data = {key: _upload(*value) for key, value in data.items()}
+    with transaction.atomic():
+        response = getattr(client, case.method)(case.path, data, format=case.format)
+        transaction.set_rollback(True)
+    return response
+
+
+def _upload(name, content):
+    upload = io.BytesIO(content.encode())
+    upload.name = name
+    return upload
@@ -0,0 +1,205 @@
+"""
+Per-request query budget.
+
+``QueryBudgetMiddleware`` gives every request a budget of SQL queries and of
+time per statement, so one pathological request (a one-letter search over a
+text column, an unindexed ordering) cannot hold a worker and a database
+connection for long:
+
+- queries are counted by ``enforce``, which ``api.apps`` installs on every
+  connection; the one over ``max_queries`` is not run;
+- statements are bounded by the database itself where it can: PostgreSQL's
+  ``statement_timeout`` and MySQL's ``max_execution_time`` are set on the
+  connection before the request's first query (and reset before the next
+  query outside a budget), and on SQLite a progress handler interrupts a
+  statement that runs past its deadline.
+
+The request's ``Budget`` lives in a context variable, so it also applies to
+queries run from ``sync_to_async`` threads under ASGI, on those threads' own
+connections.
+
+A request over budget raises ``QueryBudgetExceeded``, which DRF turns into a
+503 response, and is logged on ``api.query_budget``. Only that query is
+refused: queries after it, such as the ones finishing the response, run
+without limits. Limits apply to DRF views only, so the admin and other Django
+views are not budgeted. They default to ``QUERY_BUDGET_MAX_QUERIES`` and
+``QUERY_BUDGET_TIMEOUT_MS`` (0 disables either); ``query_budget`` overrides
+them for a view class or a viewset action.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import APIView
+
+from . import metrics, slow_queries
+
+logger = logging.getLogger("api.query_budget")
+
+_current = ContextVar("query_budget", default=None)
+
+# Session variables holding the statement timeout in milliseconds.
+TIMEOUT_SETTINGS = {"postgresql": "statement_timeout", "mysql": "max_execution_time"}
+# SQLite VM instructions between progress handler calls.
+SQLITE_PROGRESS_STEPS = 1000
+
+
+class QueryBudgetExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "This request needed more database work than it is allowed."
+    default_code = "query_budget_exceeded"
+
+
+def query_budget(max_queries=None, timeout_ms=None):
+    """Set the budget of a view class or viewset action; 0 lifts a limit."""
+
+    def decorate(view):
+        if max_queries is not None:
+            view.max_queries = max_queries
+        if timeout_ms is not None:
+            view.query_timeout_ms = timeout_ms
+        return view
+
+    return decorate
+
+
+class Budget:
+    def __init__(self):
+        self.view = ""
+        # No limits until configure() finds an API view.
+        self.max_queries = 0
+        self.timeout_ms = 0
+        self.queries = 0
+        self.exceeded = False
+        # The deadline of the statement each thread is running.
+        self.local = threading.local()
+
+    def configure(self, request, view_func):
+        """Apply the limits the view, or the action it dispatches to, sets."""
+        self.view = f"{request.method} {request.resolver_match.view_name}"
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        # The async read views serve a viewset's reads: budget them as that viewset.
+        view_class = getattr(view_func, "view_initkwargs", {}).get("viewset") or view_class
+        if not (isinstance(view_class, type) and issubclass(view_class, APIView)):
+            return
+        self.max_queries = settings.QUERY_BUDGET_MAX_QUERIES
+        self.timeout_ms = settings.QUERY_BUDGET_TIMEOUT_MS
+        actions = getattr(view_func, "actions", None) or {}
+        handler = getattr(view_class, actions.get(request.method.lower(), ""), None)
+        for source in (view_class, handler):
+            self.max_queries = getattr(source, "max_queries", self.max_queries)
+            self.timeout_ms = getattr(source, "query_timeout_ms", self.timeout_ms)
+
+    def __call__(self, execute, sql, params, many, context):
+        """``execute_wrapper`` hook enforcing the budget."""
+        connection = context["connection"]
+        self.queries += 1
+        if self.exceeded:
+            # The request already gets its 503; let the response be completed.
+            set_timeout(connection, 0)
+            return execute(sql, params, many, context)
+        if self.max_queries and self.queries > self.max_queries:
+            self.exceed("queries", sql)
+        set_timeout(connection, self.timeout_ms)
+        if not self.timeout_ms:
+            return execute(sql, params, many, context)
+
+        self.local.deadline = time.perf_counter() + self.timeout_ms / 1000
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as exc:
+            if is_timeout(connection, exc):
+                self.exceed("time", sql, exc)
+            raise
+        finally:
+            self.local.deadline = None
+
+    def exceed(self, limit, sql, cause=None):
+        self.exceeded = True
+        entry = {
+            "view": self.view,
+            "limit": limit,
+            "queries": self.queries,
+            "max_queries": self.max_queries,
+            "timeout_ms": self.timeout_ms,
+            "sql": slow_queries.normalize(sql),
+        }
+        logger.warning(json.dumps(entry, sort_keys=True), extra={"query_budget": entry})
+        metrics.record_query_budget(self.view, limit)
+        raise QueryBudgetExceeded() from cause
+
+    def progress(self):
+        """Whether the statement running on this thread is past its deadline."""
+        deadline = getattr(self.local, "deadline", None)
+        return deadline is not None and time.perf_counter() > deadline
+
+
+def enforce(execute, sql, params, many, context):
+    """Hook installed on every connection by ``api.apps``: the current budget, if any."""
+    budget = _current.get()
+    if budget is None:
+        set_timeout(context["connection"], 0)
+        return execute(sql, params, many, context)
+    return budget(execute, sql, params, many, context)
+
+
+def set_timeout(connection, timeout_ms):
+    """Set the statement timeout of ``connection``'s session, unless it already has it."""
+    if connection.vendor not in TIMEOUT_SETTINGS:
+        return
+    if getattr(connection, "query_timeout_ms", 0) == timeout_ms:
+        return
+    # A raw cursor, so the statement is neither counted nor wrapped.
+    with connection.connection.cursor() as cursor:
+        value = int(timeout_ms) if timeout_ms else "DEFAULT"
+        cursor.execute(f"SET SESSION {TIMEOUT_SETTINGS[connection.vendor]} = {value}")
+    connection.query_timeout_ms = timeout_ms
+
+
+def prepare_connection(connection):
+    """Reset the budget state of a newly opened ``connection``."""
+    connection.query_timeout_ms = 0
+    if connection.vendor == "sqlite":
+        connection.connection.set_progress_handler(_sqlite_progress, SQLITE_PROGRESS_STEPS)
+
+
+def _sqlite_progress():
+    """SQLite progress handler: a non-zero result interrupts the statement."""
+    budget = _current.get()
+    return int(budget is not None and budget.progress())
+
+
+def is_timeout(connection, exc):
+    """Whether ``exc`` is the database cancelling a statement for its timeout."""
+    if connection.vendor == "postgresql":
+        cause = exc.__cause__
+        code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+        return code == "57014"
+    if connection.vendor == "mysql":
+        return bool(exc.args) and exc.args[0] == 3024
+    if connection.vendor == "sqlite":
+        return "interrupted" in str(exc)
+    return False
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def track():
+    """Enforce a fresh ``Budget`` on the queries of the current context."""
+    budget = Budget()
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
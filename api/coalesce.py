@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When many users of one account open the same dashboard at once, every
+request would run the same expensive query. For coalesced views, concurrent
+requests with the same key (user, host, path and query parameters) share one
+computation instead:
+
+- within a worker, the first request computes and the others wait on its
+  ``threading.Event`` and reuse its response data;
+- across workers, the first request to ``cache.add()`` the key's lock computes,
+  and requests in other workers flag that they are waiting and poll for its
+  result while the lock is held. The leader stores its result in the cache,
+  under its lock token, only when a request has flagged it, so an uncontended
+  read costs three cache calls and never pickles its data.
+
+Nothing is cached beyond the flight: a request arriving after the leader has
+finished computes afresh. A follower that does not get a result within
+``COALESCE_WAIT_SECONDS``, or whose leader failed, computes the data itself.
+Across workers this needs a shared cache backend; with the default per-process
+memory cache coalescing stays within each worker.
+"""
+
+import functools
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from . import metrics
+
+_MISSING = object()
+_lock = threading.Lock()
+_flights = {}
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = _MISSING
+
+
+def request_key(request):
+    """The user, host, path and query parameters (sorted, ``format`` aside) of ``request``."""
+    params = sorted(
+        (name, values)
+        for name, values in request.query_params.lists()
+        if name != api_settings.URL_FORMAT_OVERRIDE
+    )
+    identity = repr((request.user.pk, request.scheme, request.get_host(), request.path, params))
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def coalesce(name, key, compute):
+    """``compute()``, shared with every concurrent call for the same ``key``."""
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        if flight.done.wait(settings.COALESCE_WAIT_SECONDS) and flight.result is not _MISSING:
+            metrics.record_coalesce(name, "process")
+            return flight.result
+        metrics.record_coalesce(name, "fallback")
+        return compute()
+
+    try:
+        flight.result = _across_workers(name, key, compute)
+        return flight.result
+    finally:
+        with _lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _across_workers(name, key, compute):
+    lock_key = f"coalesce:lock:{key}"
+    wait = settings.COALESCE_WAIT_SECONDS
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, wait):
+        waiting_key = f"coalesce:waiting:{key}:{token}"
+        result = _MISSING
+        try:
+            result = compute()
+        finally:
+            state = cache.get_many([lock_key, waiting_key])
+            if result is not _MISSING and waiting_key in state:
+                cache.set(f"coalesce:result:{key}:{token}", result, wait)
+            if state.get(lock_key) == token:
+                cache.delete(lock_key)
+        metrics.record_coalesce(name, "computed")
+        return result
+
+    leader = cache.get(lock_key)
+    if leader is not None:
+        # Asks the leader to publish its result, which it otherwise skips.
+        cache.set(f"coalesce:waiting:{key}:{leader}", True, wait)
+    deadline = time.monotonic() + wait
+    while leader is not None and time.monotonic() < deadline:
+        result = cache.get(f"coalesce:result:{key}:{leader}", _MISSING)
+        if result is not _MISSING:
+            metrics.record_coalesce(name, "cache")
+            return result
+        if cache.get(lock_key) != leader:
+            # Finished without a result, or the lock expired.
+            break
+        time.sleep(settings.COALESCE_POLL_SECONDS)
+    metrics.record_coalesce(name, "fallback")
+    return compute()
+
+
+def coalesced(method):
+    """
+    Coalesce a view method's GETs. The shared value is the response's status
+    and data, so each request is still rendered with its own negotiation.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != "GET":
+            return method(self, request, *args, **kwargs)
+
+        def compute():
+            response = method(self, request, *args, **kwargs)
+            return response.status_code, response.data
+
+        name = f"{type(self).__name__}.{getattr(self, 'action', method.__name__)}"
+        status, data = coalesce(name, request_key(request), compute)
+        return Response(data, status=status)
+
+    return wrapper
+
+
+class CoalesceSearchMixin:
+    """Coalesces a viewset's list when it searches (``?search=``)."""
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(api_settings.SEARCH_PARAM):
+            return self.coalesced_list(request, *args, **kwargs)
+        return super().list(request, *args, **kwargs)
+
+    @coalesced
+    def coalesced_list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
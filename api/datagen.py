@@ -0,0 +1,403 @@
+"""
+Synthetic CRM data at production scale, for load and performance testing.
+
+Rows are built in memory and written in batches, with ``bulk_create`` where
+the new ids are needed and plain multi-row INSERTs for activities and tag
+links, which make up most of the volume. Each
+owner's organizations, contacts, leads, deals, activities and tag links are
+generated from a random stream seeded by ``(seed, owner index)``, so the data
+is the same for a given seed whether owners run in one process or several.
+Counter maintenance is suspended while writing and the denormalized counters
+are rebuilt once at the end.
+"""
+
+import math
+import multiprocessing
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import DateTimeField
+
+from accounts.models import Organization
+from activities import counters as activity_counters
+from activities.models import Activity
+from contacts.models import Contact
+from deals.models import Deal
+from leads.models import Lead
+from tags import counters as tag_counters
+from tags.models import Tag
+
+FIRST_NAMES = (
+    "James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth William Barbara "
+    "Richard Susan Joseph Jessica Thomas Sarah Charles Karen Priya Wei Aisha Carlos Yuki "
+    "Fatima Mateo Olga Kwame Ingrid Ravi Sofia Liam Noor Hana Diego Amara Lars Mei Omar"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez "
+    "Lopez Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Patel Nguyen "
+    "Kim Chen Singh Muller Rossi Silva Okafor Ivanova Tanaka Haddad Larsen Novak Cohen"
+).split()
+COMPANY_WORDS = (
+    "Acme Global Apex Blue Summit Northwind Vertex Pioneer Quantum Harbor Iron Cedar "
+    "Bright Nimbus Atlas Orion Falcon Silver Prime Evergreen Crescent Keystone Redwood"
+).split()
+COMPANY_SUFFIXES = ("Inc", "LLC", "Ltd", "Group", "Labs", "Systems", "Partners", "Co")
+DEAL_KINDS = ("renewal", "expansion", "pilot", "license")
+SOURCES = ("website", "referral", "linkedin", "cold-call", "trade-show", "webinar", "ads")
+SUMMARIES = {
+    "call": ("Intro call", "Follow-up call", "Pricing discussion", "Left voicemail"),
+    "email": ("Sent proposal", "Replied to questions", "Shared case study", "Sent follow-up"),
+    "meeting": ("Product demo", "Discovery meeting", "Contract review", "Onsite visit"),
+    "note": ("Budget confirmed", "Decision next quarter", "Champion identified", "Risk noted"),
+}
+
+LEAD_STATUSES = (("new", 40), ("contacted", 30), ("qualified", 20), ("lost", 10))
+DEAL_STAGES = (("prospecting", 35), ("negotiation", 25), ("closed_won", 25), ("closed_lost", 15))
+STAGE_PROBABILITY = {
+    "prospecting": (5, 30),
+    "negotiation": (40, 80),
+    "closed_won": (100, 100),
+    "closed_lost": (0, 0),
+}
+ACTIVITY_TYPES = (("email", 45), ("call", 30), ("note", 15), ("meeting", 10))
+# Number of tags on a tagged row: most rows carry none or one.
+TAGS_PER_ROW = ((0, 45), (1, 30), (2, 15), (3, 10))
+
+# Per-owner volume is scaled by a log-normal weight so a few owners carry much
+# more data than most, as in production; dividing by its mean keeps the totals.
+OWNER_SIGMA = 0.75
+OWNER_MEAN = math.exp(OWNER_SIGMA**2 / 2)
+
+TIMESTAMPED_MODELS = (Organization, Contact, Lead, Deal)
+ACTIVITY_COLUMNS = ("user", "contact", "lead", "activity_type", "summary", "details", "date")
+PASSWORD = "loadtest123"
+
+
+class Plan(NamedTuple):
+    seed: int
+    prefix: str
+    organizations: int
+    contacts: int
+    leads: int
+    deals: int
+    activities: int
+    tag_ids: tuple
+    batch_size: int
+    days: int
+    now: object
+
+
+class Created(NamedTuple):
+    pk: int
+    created_at: object
+
+
+@contextmanager
+def historical_timestamps(models=TIMESTAMPED_MODELS):
+    """Keep the timestamps set on generated rows instead of auto_now/auto_now_add."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def ensure_tags(count, prefix):
+    """Return the ids of at least ``count`` tags, creating numbered ones as needed."""
+    existing = list(Tag.objects.order_by("pk").values_list("pk", flat=True))
+    missing = count - len(existing)
+    if missing > 0:
+        Tag.objects.bulk_create(
+            [
+                Tag(name=f"{prefix}-tag-{i}", color=f"#{(i * 0x9E3779) % 0xFFFFFF:06X}")
+                for i in range(len(existing), count)
+            ],
+            ignore_conflicts=True,
+        )
+        existing = list(Tag.objects.order_by("pk").values_list("pk", flat=True))
+    return tuple(existing[:count])
+
+
+def create_users(plan, count):
+    """Bulk-create ``count`` owners sharing one password hash; returns their ids in order."""
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    users = [
+        User(
+            username=f"{plan.prefix}-{plan.seed}-{index}",
+            email=f"{plan.prefix}-{plan.seed}-{index}@example.com",
+            first_name=FIRST_NAMES[index % len(FIRST_NAMES)],
+            last_name=LAST_NAMES[index % len(LAST_NAMES)],
+            password=password,
+        )
+        for index in range(count)
+    ]
+    return [user.pk for user in User.objects.bulk_create(users, batch_size=plan.batch_size)]
+
+
+def generate(plan, user_ids, workers=1, progress=None):
+    """Generate every owner's data, then rebuild the activity and tag counters."""
+    totals = Counter(users=len(user_ids))
+    jobs = [(plan, index, user_id) for index, user_id in enumerate(user_ids)]
+    if workers > 1:
+        # Forked children open their own connections rather than share the parent's socket.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            for done, rows in enumerate(pool.imap_unordered(generate_owner, jobs), 1):
+                totals.update(rows)
+                if progress:
+                    progress(done, len(jobs))
+    else:
+        for done, job in enumerate(jobs, 1):
+            totals.update(generate_owner(job))
+            if progress:
+                progress(done, len(jobs))
+
+    activity_counters.rebuild()
+    tag_counters.rebuild()
+    return totals
+
+
+def generate_owner(job):
+    """Create one owner's rows in a single transaction; returns rows written per table."""
+    plan, index, user_id = job
+    rng = random.Random(f"{plan.seed}:{index}")
+    scale = rng.lognormvariate(0, OWNER_SIGMA) / OWNER_MEAN
+    rows = Counter()
+
+    def volume(per_owner):
+        return max(round(per_owner * scale), 0)
+
+    with transaction.atomic(), historical_timestamps(), activity_counters.suspended():
+        organizations = _insert(
+            Organization,
+            (_organization(rng, plan, user_id) for _ in range(max(volume(plan.organizations), 1))),
+            plan.batch_size,
+        )
+        org_ids = [org.pk for org in organizations]
+        rows["organizations"] = len(org_ids)
+
+        contacts = _insert(
+            Contact,
+            (_contact(rng, plan, user_id, org_ids, n) for n in range(volume(plan.contacts))),
+            plan.batch_size,
+        )
+        leads = _insert(
+            Lead,
+            (_lead(rng, plan, user_id, org_ids, n) for n in range(volume(plan.leads))),
+            plan.batch_size,
+        )
+        deals = _insert(
+            Deal,
+            (_deal(rng, plan, user_id, org_ids, contacts) for _ in range(volume(plan.deals))),
+            plan.batch_size,
+        )
+        rows.update(contacts=len(contacts), leads=len(leads), deals=len(deals))
+
+        targets = [("contact_id", item) for item in contacts]
+        targets += [("lead_id", item) for item in leads]
+        if targets:
+            activities = [
+                _activity(rng, plan, user_id, targets) for _ in range(volume(plan.activities))
+            ]
+            rows["activities"] = _insert_rows(
+                Activity, ACTIVITY_COLUMNS, activities, plan.batch_size
+            )
+
+        for model, items in ((Contact, contacts), (Lead, leads), (Deal, deals)):
+            rows["tag links"] += _link_tags(rng, plan, model, items)
+
+    return rows
+
+
+def _insert(model, objects, batch_size):
+    """bulk_create ``objects`` in batches; returns (pk, created_at) for each row."""
+    created = []
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            created.extend(_flush(model, batch))
+            batch = []
+    if batch:
+        created.extend(_flush(model, batch))
+    return created
+
+
+def _flush(model, batch):
+    objs = model.objects.bulk_create(batch)
+    return [Created(obj.pk, getattr(obj, "created_at", None)) for obj in objs]
+
+
+def _insert_rows(model, field_names, rows, batch_size):
+    """
+    Multi-row INSERT of plain tuples for tables whose ids are not needed back.
+
+    Skips model instances and per-value field preparation, which dominate
+    bulk_create's cost; only datetimes need adapting for the backend.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    adapters = [
+        connection.ops.adapt_datetimefield_value if isinstance(field, DateTimeField) else None
+        for field in fields
+    ]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+    size = max(min(batch_size, connection.ops.bulk_batch_size(fields, rows)), 1)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start : start + size]
+            params = [
+                adapt(value) if adapt else value
+                for row in batch
+                for adapt, value in zip(adapters, row)
+            ]
+            cursor.execute(
+                f"INSERT INTO {quote(model._meta.db_table)} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(batch))}",
+                params,
+            )
+    return len(rows)
+
+
+def _past(rng, plan, newest=None):
+    """A timestamp in the last ``plan.days`` days, skewed towards recent (the CRM grows)."""
+    age = plan.days * (1 - math.sqrt(rng.random()))
+    when = plan.now - timedelta(days=age)
+    if newest is not None and when < newest:
+        when = newest + (plan.now - newest) * rng.random()
+    return when
+
+
+def _pick(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _person(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _organization(rng, plan, user_id):
+    name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+    return Organization(name=name, owner_id=user_id, created_at=_past(rng, plan))
+
+
+def _contact(rng, plan, user_id, org_ids, n):
+    first, last = _person(rng)
+    created = _past(rng, plan)
+    return Contact(
+        owner_id=user_id,
+        organization_id=rng.choice(org_ids) if rng.random() < 0.9 else None,
+        first_name=first,
+        last_name=last,
+        # Contact.email is limited to 20 characters.
+        email=f"{first[0]}.{last[:5]}{n % 1000}@ex.io".lower(),
+        address=f"{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} St",
+        description="",
+        created_at=created,
+        updated_at=_past(rng, plan, created),
+    )
+
+
+def _lead(rng, plan, user_id, org_ids, n):
+    first, last = _person(rng)
+    created = _past(rng, plan)
+    return Lead(
+        owner_id=user_id,
+        organization_id=rng.choice(org_ids) if rng.random() < 0.8 else None,
+        first_name=first,
+        last_name=last,
+        email=f"{first}.{last}.{user_id}.{n}@example.com".lower(),
+        phone=f"+1{rng.randint(2000000000, 9999999999)}",
+        status=_pick(rng, LEAD_STATUSES),
+        source=rng.choice(SOURCES),
+        created_at=created,
+        updated_at=_past(rng, plan, created),
+    )
+
+
+def _deal(rng, plan, user_id, org_ids, contacts):
+    stage = _pick(rng, DEAL_STAGES)
+    created = _past(rng, plan)
+    changed = _past(rng, plan, created)
+    if stage.startswith("closed"):
+        closed = changed
+    else:
+        closed = plan.now + timedelta(days=rng.randint(7, 180))
+    low, high = STAGE_PROBABILITY[stage]
+    contact = rng.choice(contacts) if contacts and rng.random() < 0.8 else None
+    # Deal values are log-normal: many small deals, a long tail of large ones.
+    value = Decimal(min(rng.lognormvariate(9, 1.2), 9_999_999_999)).quantize(Decimal("0.01"))
+    return Deal(
+        owner_id=user_id,
+        organization_id=rng.choice(org_ids) if rng.random() < 0.9 else None,
+        contact_id=contact.pk if contact else None,
+        name=f"{rng.choice(COMPANY_WORDS)} {rng.choice(DEAL_KINDS)}",
+        value=value,
+        stage=stage,
+        stage_changed_at=changed,
+        probability=rng.randint(low, high),
+        closed_at=closed if rng.random() < 0.85 else None,
+        created_at=created,
+    )
+
+
+def _activity(rng, plan, user_id, targets):
+    column, target = rng.choice(targets)
+    activity_type = _pick(rng, ACTIVITY_TYPES)
+    return (
+        user_id,
+        target.pk if column == "contact_id" else None,
+        target.pk if column == "lead_id" else None,
+        activity_type,
+        rng.choice(SUMMARIES[activity_type]),
+        "",
+        _past(rng, plan, target.created_at),
+    )
+
+
+def _link_tags(rng, plan, model, items):
+    """Insert through rows; tag popularity follows a Zipf-like curve."""
+    if not plan.tag_ids or not items:
+        return 0
+    field = model._meta.get_field("tags")
+    through = field.remote_field.through
+    weights = [1 / rank for rank in range(1, len(plan.tag_ids) + 1)]
+
+    links = []
+    for item in items:
+        count = _pick(rng, TAGS_PER_ROW)
+        for tag_id in sorted(set(rng.choices(plan.tag_ids, weights=weights, k=count))):
+            links.append((item.pk, tag_id))
+    columns = (field.m2m_field_name(), field.m2m_reverse_field_name())
+    return _insert_rows(through, columns, links, plan.batch_size)
+
+
+def tune_connection():
+    """Trade durability for speed on SQLite while generating throwaway data."""
+    # PRAGMA synchronous cannot change inside a transaction (e.g. under tests).
+    if connection.vendor == "sqlite" and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA temp_store = MEMORY")
+            cursor.execute("PRAGMA cache_size = -200000")
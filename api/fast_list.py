@@ -0,0 +1,172 @@
+"""
+Read-only list serialization straight from ``.values()`` rows.
+
+A ``ModelSerializer`` list builds a model instance for every row and then
+resolves every field through ``get_attribute()``/``to_representation()``.
+``ValuesSerializer`` compiles a serializer class once into a plan, one
+``(name, column, converter)`` per field, and applies it to the dicts
+``.values()`` returns:
+
+- fields whose representation of a database value is the value itself
+  (integers, strings, string choices, foreign key ids) are copied;
+- every other supported field keeps its own ``to_representation()``, so
+  decimals, datetimes and so on are formatted exactly as before;
+- tag ids come from one query on the through table for the whole page.
+
+The result is the same data as the serializer's, key for key, and renders to
+the same bytes. Serializers with fields the plan cannot express (nested
+serializers, method fields, other many-to-many fields) or with a custom
+``to_representation()`` are not compiled, and their lists use the serializer.
+"""
+
+import functools
+
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api.timing import phase
+from tags.serializers import TagIdsField
+
+# DRF fields whose to_representation() returns database values unchanged.
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.EmailField)
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class, model, plan, files, many_to_many):
+        self.serializer_class = serializer_class
+        self.model = model
+        self.plan = plan
+        self.files = files
+        self.many_to_many = many_to_many
+        pk = model._meta.pk.attname
+        self.columns = tuple(dict.fromkeys([pk, *(column for _, column, _ in plan if column)]))
+
+    def related_querysets(self, ids):
+        """``(field name, queryset of (row id, related id) pairs)`` for each many-to-many field."""
+        for name, model_field in self.many_to_many:
+            through = model_field.remote_field.through
+            source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+            yield name, through.objects.filter(**{f"{source}__in": ids}).values_list(source, target)
+
+    def serialize(self, rows, request=None):
+        ids = [row[self.model._meta.pk.attname] for row in rows]
+        related = {name: list(pairs) for name, pairs in self.related_querysets(ids)} if ids else {}
+        return self.to_representation(rows, related, request)
+
+    async def aserialize(self, rows, request=None):
+        ids = [row[self.model._meta.pk.attname] for row in rows]
+        related = {}
+        if ids:
+            for name, pairs in self.related_querysets(ids):
+                related[name] = [pair async for pair in pairs]
+        return self.to_representation(rows, related, request)
+
+    def to_representation(self, rows, related, request=None):
+        with phase("serialize"):
+            pk = self.model._meta.pk.attname
+            by_row = {}
+            for name, pairs in related.items():
+                ids = by_row[name] = {}
+                for row_id, related_id in pairs:
+                    ids.setdefault(row_id, []).append(related_id)
+            files = {name: self.file_converter(field, request) for name, field in self.files}
+            plan = [(name, column, files.get(name, convert)) for name, column, convert in self.plan]
+
+            data = []
+            for row in rows:
+                item = {}
+                for name, column, convert in plan:
+                    if column is None:
+                        # Many-to-many ids, sorted like TagIdsField does.
+                        item[name] = sorted(by_row[name].get(row[pk], ()))
+                        continue
+                    value = row[column]
+                    if value is None:
+                        item[name] = None
+                    elif convert is None:
+                        item[name] = value
+                    else:
+                        item[name] = convert(value)
+                data.append(item)
+            return data
+
+    def file_converter(self, field, request):
+        """DRF's ``FileField.to_representation()`` for a stored file name."""
+        storage = self.model._meta.get_field(field.source).storage
+        use_url = getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL)
+
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return convert
+
+
+@functools.cache
+def values_serializer(serializer_class):
+    """A compiled ``ValuesSerializer`` for ``serializer_class``, or None if it cannot be."""
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    model = serializer_class.Meta.model
+    model_fields = {field.name: field for field in model._meta.get_fields()}
+
+    plan, files, many_to_many = [], [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        model_field = model_fields.get(field.source)
+        if model_field is None:
+            return None
+        if isinstance(field, TagIdsField):
+            many_to_many.append((name, model_field))
+            plan.append((name, None, None))
+        elif model_field.many_to_many or model_field.one_to_many or model_field.one_to_one:
+            return None
+        elif isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                return None
+            plan.append((name, field.source, None))
+        elif isinstance(field, serializers.FileField):
+            files.append((name, field))
+            plan.append((name, field.source, None))
+        elif isinstance(field, (serializers.RelatedField, serializers.BaseSerializer)):
+            return None
+        elif isinstance(field, serializers.ChoiceField):
+            # Choice keys that are strings map to themselves.
+            passthrough = all(isinstance(key, str) for key in field.choices)
+            plan.append((name, field.source, None if passthrough else field.to_representation))
+        elif type(field) in PASSTHROUGH_FIELDS:
+            plan.append((name, field.source, None))
+        elif isinstance(field, serializers.Field) and not isinstance(
+            field, (serializers.SerializerMethodField, serializers.HiddenField)
+        ):
+            plan.append((name, field.source, field.to_representation))
+        else:
+            return None
+    return ValuesSerializer(serializer_class, model, plan, files, many_to_many)
+
+
+class ValuesListMixin:
+    """
+    Serves a viewset's GET list from ``.values()`` through a ``ValuesSerializer``.
+
+    Filtering, ordering and pagination are the viewset's own; only loading and
+    serializing the rows changes.
+    """
+
+    def list(self, request, *args, **kwargs):
+        fast = values_serializer(self.get_serializer_class())
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*fast.columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page, request))
+        return Response(fast.serialize(list(queryset), request))
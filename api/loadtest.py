@@ -0,0 +1,353 @@
+"""
+End-to-end load tests against a running server.
+
+Unlike ``api.benchmark``, requests go over real sockets to a gunicorn or
+uvicorn server with several workers, so SQLite locking, per-worker caches and
+throttles, and connection handling all show up. Each virtual user is a thread
+with its own keep-alive connection and JWT, logged in as one of the owners
+created by ``generate_crm_data``, repeatedly picking a weighted action from a
+mix of the frontend's calls.
+"""
+
+import functools
+import http.client
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .benchmark import percentile
+from .datagen import LAST_NAMES, PASSWORD
+
+MIXES = {
+    "default": {
+        "login": 1,
+        "dashboard": 3,
+        "list": 8,
+        "search": 4,
+        "create": 2,
+        "upload": 1,
+    },
+    "read": {"dashboard": 3, "list": 8, "search": 4},
+    # Run "browse" under gunicorn and "async-browse" under uvicorn to compare the read paths.
+    "browse": {"list": 2, "search": 1},
+    "async-browse": {"async_list": 2, "async_search": 1},
+    "write": {"list": 2, "create": 6, "upload": 2},
+}
+
+SERVERS = {
+    "gunicorn": ("gunicorn", "dcrm.wsgi"),
+    "uvicorn": ("uvicorn", "dcrm.asgi:application"),
+}
+
+# Server settings that keep the throttles from dominating the results.
+UNTHROTTLED_ENV = {
+    "THROTTLE_ANON_RATE": "1000000/minute",
+    "THROTTLE_USER_RATE": "1000000/minute",
+}
+
+
+class Sample(NamedTuple):
+    action: str
+    status: int
+    ms: float
+
+
+def parse_mix(value):
+    """A mix name from ``MIXES``, or ``action=weight`` pairs such as ``list=5,create=1``."""
+    if value in MIXES:
+        return dict(MIXES[value])
+    mix = {}
+    for part in value.split(","):
+        action, _, weight = part.partition("=")
+        action = action.strip()
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action {action!r}; choose from {', '.join(ACTIONS)}")
+        try:
+            mix[action] = int(weight or 1)
+        except ValueError:
+            raise ValueError(f"Weight for {action!r} must be an integer") from None
+    return mix
+
+
+def credentials(users, seed=0, prefix="load"):
+    """Logins of the owners ``generate_crm_data --users N --seed S --prefix P`` creates."""
+    return [(f"{prefix}-{seed}-{index}", PASSWORD) for index in range(users)]
+
+
+class Session:
+    """One virtual user: a keep-alive connection, a JWT and the samples it produced."""
+
+    def __init__(self, base_url, username, password, rng):
+        url = urllib.parse.urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip("/")
+        self.username = username
+        self.password = password
+        self.rng = rng
+        self.token = None
+        self.connection = None
+        self.samples = []
+
+    def request(self, action, method, path, body=None, content_type="application/json"):
+        headers = {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            if content_type == "application/json":
+                body = json.dumps(body).encode()
+            headers["Content-Type"] = content_type
+
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Status 0 marks a connection error; the next request reconnects.
+            self.close()
+            payload, status = b"", 0
+        self.samples.append(Sample(action, status, (time.perf_counter() - started) * 1000))
+        return status, payload
+
+    def login(self):
+        status, payload = self.request(
+            "login",
+            "POST",
+            "/api/v1/token/",
+            {"username": self.username, "password": self.password},
+        )
+        if status == 200:
+            self.token = json.loads(payload)["access"]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def _dashboard(session):
+    # What frontend/src/Dashboard.jsx loads, in the same order.
+    for resource in ("leads", "deals", "organizations", "auth/me", "activities"):
+        session.request("dashboard", "GET", f"/api/v1/{resource}/")
+
+
+def _list(session, action="list", base="/api/v1/"):
+    resource = session.rng.choice(("leads", "contacts", "deals", "activities"))
+    status, payload = session.request(action, "GET", f"{base}{resource}/")
+    # Some users page on, following the link the API gives them.
+    next_url = json.loads(payload).get("next") if status == 200 else None
+    if next_url and session.rng.random() < 0.3:
+        url = urllib.parse.urlsplit(next_url)
+        path = url.path[len(session.prefix) :]
+        session.request(action, "GET", f"{path}?{url.query}")
+
+
+def _search(session, action="search", base="/api/v1/"):
+    resource = session.rng.choice(("leads", "contacts", "deals"))
+    term = urllib.parse.quote(session.rng.choice(LAST_NAMES))
+    session.request(action, "GET", f"{base}{resource}/?search={term}")
+
+
+def _create(session):
+    name = session.rng.choice(LAST_NAMES)
+    session.request(
+        "create",
+        "POST",
+        "/api/v1/leads/",
+        {"first_name": "Load", "last_name": name, "email": f"{uuid.uuid4().hex}@example.com"},
+    )
+
+
+def _upload(session):
+    rows = "".join(
+        f"Load,{session.rng.choice(LAST_NAMES)},{uuid.uuid4().hex}@example.com\n" for _ in range(25)
+    )
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="leads.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+        f"first_name,last_name,email\n{rows}\r\n"
+        f"--{boundary}--\r\n"
+    ).encode()
+    session.request(
+        "upload",
+        "POST",
+        "/api/v1/leads/upload_csv/",
+        body,
+        content_type=f"multipart/form-data; boundary={boundary}",
+    )
+
+
+ACTIONS = {
+    "login": Session.login,
+    "dashboard": _dashboard,
+    "list": _list,
+    "search": _search,
+    "async_list": functools.partial(_list, action="async_list", base="/api/v1/async/"),
+    "async_search": functools.partial(_search, action="async_search", base="/api/v1/async/"),
+    "create": _create,
+    "upload": _upload,
+}
+
+
+def run(base_url, logins, mix, concurrency=8, duration=30.0, max_requests=None, seed=0):
+    """
+    Drive ``base_url`` with ``concurrency`` virtual users; returns ``summarize()`` output.
+
+    Stops after ``duration`` seconds or once ``max_requests`` actions have
+    started, whichever comes first.
+    """
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    stop = threading.Event()
+    budget = itertools.count()
+    sessions = []
+
+    def virtual_user(index):
+        username, password = logins[index % len(logins)]
+        session = Session(base_url, username, password, random.Random(f"{seed}:{index}"))
+        sessions.append(session)
+        try:
+            session.login()
+            while not stop.is_set():
+                if max_requests is not None and next(budget) >= max_requests:
+                    return
+                ACTIONS[session.rng.choices(actions, weights)[0]](session)
+        finally:
+            session.close()
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index,), daemon=True)
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=max(duration - (time.perf_counter() - started), 0))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize([sample for session in sessions for sample in session.samples], elapsed)
+
+
+def summarize(samples, elapsed):
+    """Throughput, error rate and latency percentiles, overall and per action."""
+    report = _stats(samples, elapsed)
+    report["elapsed_s"] = round(elapsed, 2)
+    report["actions"] = {
+        action: _stats([sample for sample in samples if sample.action == action], elapsed)
+        for action in sorted({sample.action for sample in samples})
+    }
+    return report
+
+
+def _stats(samples, elapsed):
+    timings = sorted(sample.ms for sample in samples)
+    errors = sum(1 for sample in samples if sample.status == 0 or sample.status >= 500)
+    throttled = sum(1 for sample in samples if sample.status == 429)
+    rejected = sum(1 for sample in samples if 400 <= sample.status < 500 and sample.status != 429)
+    total = len(samples)
+    return {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "errors": errors,
+        "throttled": throttled,
+        "rejected": rejected,
+        "error_rate": round((errors + rejected) / total, 4) if total else 0.0,
+        "p50_ms": round(percentile(timings, 0.5), 2) if timings else None,
+        "p90_ms": round(percentile(timings, 0.9), 2) if timings else None,
+        "p99_ms": round(percentile(timings, 0.99), 2) if timings else None,
+    }
+
+
+def prepare_database(database_url, users, seed=0, prefix="load", reseed=False):
+    """Migrate and seed the database at ``database_url`` unless a SQLite file already exists."""
+    parsed = urllib.parse.urlsplit(database_url)
+    if parsed.scheme == "sqlite":
+        path = Path(parsed.path[1:] if parsed.path.startswith("//") else parsed.path.lstrip("/"))
+        if path.exists() and not reseed:
+            return False
+        path.unlink(missing_ok=True)
+
+    env = {**os.environ, "DATABASE_URL": database_url}
+    manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+    subprocess.run([*manage, "migrate", "--noinput", "-v", "0"], env=env, check=True)
+    subprocess.run(
+        [
+            *manage,
+            "generate_crm_data",
+            "--users",
+            str(users),
+            "--seed",
+            str(seed),
+            "--prefix",
+            prefix,
+        ],
+        env=env,
+        check=True,
+    )
+    return True
+
+
+@contextmanager
+def serve(kind, bind, workers, env, startup_timeout=60):
+    """Run ``kind`` (a key of ``SERVERS``) on ``bind`` until the block exits."""
+    module, app = SERVERS[kind]
+    host, _, port = bind.rpartition(":")
+    if kind == "gunicorn":
+        args = [app, "--workers", str(workers), "--bind", bind]
+    else:
+        args = [app, "--workers", str(workers), "--host", host, "--port", port, "--no-access-log"]
+    process = subprocess.Popen(
+        [sys.executable, "-m", module, *args],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **env},
+    )
+    try:
+        _wait_until_healthy(process, f"http://{bind}", startup_timeout)
+        yield f"http://{bind}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _wait_until_healthy(process, base_url, timeout):
+    url = urllib.parse.urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=2)
+        try:
+            connection.request("GET", "/api/v1/health/")
+            if connection.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.25)
+    raise RuntimeError(f"Server did not become healthy within {timeout}s")
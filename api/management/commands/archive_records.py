@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from activities.archive import archive_activities
+from leads.archive import archive_lost_leads
+
+
+class Command(BaseCommand):
+    help = "Move old activities and lost leads into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--activity-days",
+            type=int,
+            default=settings.ARCHIVE_ACTIVITIES_AFTER_DAYS,
+            help="Archive activities older than this many days",
+        )
+        parser.add_argument(
+            "--lost-lead-days",
+            type=int,
+            default=settings.ARCHIVE_LOST_LEADS_AFTER_DAYS,
+            help="Archive lost leads not updated for this many days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ARCHIVE_BATCH_SIZE,
+            help="Rows moved per transaction",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many rows would move"
+        )
+
+    def handle(self, *_args, **options):
+        now = timezone.now()
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        # Leads first: their remaining activities are archived along with them.
+        leads = archive_lost_leads(
+            now - timedelta(days=options["lost_lead_days"]), batch_size, dry_run
+        )
+        activities = archive_activities(
+            now - timedelta(days=options["activity_days"]), batch_size, dry_run
+        )
+
+        verb = "Would archive" if dry_run else "Archived"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {leads} lost leads and {activities} activities")
+        )
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api import benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the API endpoints against seeded datasets in a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            choices=sorted(benchmark.SCALES),
+            help="Dataset size to benchmark; repeat for several (default: 10k)",
+        )
+        parser.add_argument("--iterations", type=int, default=30, help="Timed requests per case")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per case")
+        parser.add_argument("--only", default="", help="Only run cases whose name contains this")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the generated data")
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Processes seeding data (PostgreSQL only)"
+        )
+        parser.add_argument(
+            "--output", default="benchmark-results.json", help="Where to write the JSON results"
+        )
+        parser.add_argument(
+            "--metrics-overhead",
+            action="store_true",
+            help="Also measure the per-request cost of the Prometheus middleware",
+        )
+        parser.add_argument(
+            "--renderers",
+            action="store_true",
+            help="Also time every response renderer on large list payloads",
+        )
+        parser.add_argument(
+            "--renderer-rows", type=int, default=1000, help="Rows per renderer payload"
+        )
+        parser.add_argument("--compare", help="Baseline JSON file to check for regressions")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Relative latency/memory growth that counts as a regression",
+        )
+
+    def handle(self, *_args, **options):
+        scales = options["scale"] or ["10k"]
+        report = {"meta": benchmark.metadata(), "results": {}}
+
+        setup_test_environment()
+        try:
+            for scale in scales:
+                report["results"][scale], renderer_results = self.run_scale(scale, options)
+                if renderer_results:
+                    report.setdefault("renderers", {})[scale] = renderer_results
+        finally:
+            teardown_test_environment()
+
+        if options["metrics_overhead"]:
+            report["metrics_overhead"] = benchmark.metrics_overhead()
+            self.stdout.write(
+                f"Prometheus middleware overhead: {report['metrics_overhead']['overhead_us']:.1f}us"
+            )
+
+        Path(options["output"]).write_text(json.dumps(report, indent=2, sort_keys=True))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text())
+            regressions = benchmark.compare(baseline, report, options["threshold"])
+            for scale, name, metric, before, after in regressions:
+                self.stdout.write(
+                    self.style.ERROR(f"  {scale} {name}: {metric} {before} -> {after}")
+                )
+            if regressions:
+                raise CommandError(f"{len(regressions)} regressions against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def run_scale(self, scale, options):
+        renderer_results = None
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {scale} rows...")
+            user = benchmark.seed(scale, options["seed"], options["workers"])
+            cases = [case for case in benchmark.build_cases(user) if options["only"] in case.name]
+            results = benchmark.run(user, cases, options["iterations"], options["warmup"])
+            if options["renderers"]:
+                payloads = benchmark.renderer_payloads(user, options["renderer_rows"])
+                renderer_results = benchmark.renderers(payloads, options["iterations"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"{scale} {'case':<24} {'p50':>8} {'p90':>8} {'p99':>8} {'q':>4} {'KiB':>8}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{'':{len(scale)}} {name:<24} {r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} "
+                f"{r['p99_ms']:>8.2f} {r['queries']:>4} {r['peak_kib']:>8.1f}"
+            )
+        if renderer_results:
+            self.print_renderers(scale, renderer_results)
+        return results, renderer_results
+
+    def print_renderers(self, scale, results):
+        self.stdout.write(f"{scale} {'renderer':<24} {'p50':>8} {'p90':>8} {'rows':>6} {'KiB':>8}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{'':{len(scale)}} {name:<24} {r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} "
+                f"{r['rows']:>6} {r['kib']:>8.1f}"
+            )
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served at api/schema/ for the current code version"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Where to write the schema (default OPENAPI_SCHEMA_DIR)")
+
+    def handle(self, *_args, **options):
+        directory = Path(options["dir"] or settings.OPENAPI_SCHEMA_DIR)
+        rendered = schema.build(directory)
+        for fmt, content in rendered.items():
+            path = directory / schema.FORMATS[fmt][0]
+            self.stdout.write(f"{path} ({len(content)} bytes)")
+        self.stdout.write(
+            self.style.SUCCESS(f"Built OpenAPI schema for code version {schema.code_version()}")
+        )
@@ -0,0 +1,48 @@
+from subprocess import CalledProcessError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import startup
+
+
+class Command(BaseCommand):
+    help = "Report what django.setup() and URLconf loading import, and how long they take"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25, help="Modules to list")
+        parser.add_argument(
+            "--sort",
+            choices=["self", "cumulative"],
+            default="cumulative",
+            help="Rank modules by their own import time or including their imports",
+        )
+        parser.add_argument(
+            "--budget-ms", type=float, help="Fail if start-up takes longer than this"
+        )
+
+    def handle(self, *_args, **options):
+        try:
+            rows = startup.import_times()
+            elapsed_ms, modules = startup.measure()
+        except CalledProcessError as error:
+            raise CommandError(f"Start-up failed:\n{error.stderr}") from None
+
+        key = "self_us" if options["sort"] == "self" else "cumulative_us"
+        self.stdout.write(f"{'self ms':>9} {'cumul. ms':>9}  module")
+        for row in sorted(rows, key=lambda row: getattr(row, key), reverse=True)[: options["top"]]:
+            self.stdout.write(
+                f"{row.self_us / 1000:>9.1f} {row.cumulative_us / 1000:>9.1f}  {row.module}"
+            )
+
+        self.stdout.write(f"\n{'self ms':>9}  package")
+        for package, self_us in startup.by_package(rows)[: options["top"]]:
+            self.stdout.write(f"{self_us / 1000:>9.1f}  {package}")
+
+        loaded = [module for module in startup.LAZY_MODULES if module in modules]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"\nImported at start-up: {', '.join(loaded)}"))
+        self.stdout.write(f"\n{len(modules)} modules, start-up took {elapsed_ms:.0f}ms")
+
+        budget = options["budget_ms"]
+        if budget is not None and elapsed_ms > budget:
+            raise CommandError(f"Start-up took {elapsed_ms:.0f}ms, over the {budget:g}ms budget")
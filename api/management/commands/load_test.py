@@ -0,0 +1,124 @@
+import importlib.util
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import loadtest
+
+
+class Command(BaseCommand):
+    help = "Load test the API over HTTP, against a seeded gunicorn/uvicorn server or a given URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server", choices=sorted(loadtest.SERVERS), default="gunicorn", help="Server to start"
+        )
+        parser.add_argument(
+            "--url", help="Load test an already running server instead of starting one"
+        )
+        parser.add_argument("--bind", default="127.0.0.1:8765", help="Address the server binds")
+        parser.add_argument("--server-workers", type=int, default=4, help="Server worker processes")
+        parser.add_argument(
+            "--database", default="loadtest.sqlite3", help="SQLite file to seed and serve"
+        )
+        parser.add_argument("--database-url", help="Seed and serve this database instead")
+        parser.add_argument("--reseed", action="store_true", help="Regenerate existing data")
+        parser.add_argument("--users", type=int, default=20, help="Owners to seed and log in as")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for data and request mix")
+        parser.add_argument("--prefix", default="load", help="Username prefix of the owners")
+        parser.add_argument(
+            "--mix",
+            default="default",
+            help=f"One of {', '.join(loadtest.MIXES)}, or weights such as list=5,create=1",
+        )
+        parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run for")
+        parser.add_argument("--requests", type=int, help="Stop after this many actions")
+        parser.add_argument(
+            "--throttled",
+            action="store_true",
+            help="Keep the production throttle rates on the started server",
+        )
+        parser.add_argument(
+            "--output", default="loadtest-results.json", help="Where to write the JSON report"
+        )
+
+    def handle(self, *_args, **options):
+        try:
+            mix = loadtest.parse_mix(options["mix"])
+        except ValueError as error:
+            raise CommandError(error) from None
+        logins = loadtest.credentials(options["users"], options["seed"], options["prefix"])
+
+        if options["url"]:
+            report = self.load(options["url"], logins, mix, options)
+        else:
+            report = self.serve_and_load(logins, mix, options)
+
+        report["config"] = {
+            key: options[key]
+            for key in ("server", "url", "server_workers", "users", "concurrency", "duration")
+        }
+        report["config"]["mix"] = mix
+        Path(options["output"]).write_text(json.dumps(report, indent=2, sort_keys=True))
+        self.print_report(report)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def serve_and_load(self, logins, mix, options):
+        module = loadtest.SERVERS[options["server"]][0]
+        if importlib.util.find_spec(module) is None:
+            raise CommandError(f"{module} is not installed")
+
+        database_url = options["database_url"] or (
+            f"sqlite:///{Path(options['database']).resolve()}"
+        )
+        self.stdout.write(f"Preparing {database_url}...")
+        seeded = loadtest.prepare_database(
+            database_url, options["users"], options["seed"], options["prefix"], options["reseed"]
+        )
+        if not seeded:
+            self.stdout.write("Reusing existing data (--reseed to regenerate)")
+
+        env = {"DATABASE_URL": database_url}
+        if not options["throttled"]:
+            env.update(loadtest.UNTHROTTLED_ENV)
+        try:
+            with loadtest.serve(
+                options["server"], options["bind"], options["server_workers"], env
+            ) as base_url:
+                return self.load(base_url, logins, mix, options)
+        except RuntimeError as error:
+            raise CommandError(error) from None
+
+    def load(self, base_url, logins, mix, options):
+        self.stdout.write(
+            f"Running {options['concurrency']} virtual users against {base_url} "
+            f"for {options['duration']:g}s..."
+        )
+        return loadtest.run(
+            base_url,
+            logins,
+            mix,
+            concurrency=options["concurrency"],
+            duration=options["duration"],
+            max_requests=options["requests"],
+            seed=options["seed"],
+        )
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'action':<12} {'requests':>8} {'rps':>8} {'errors':>7} {'429':>5} "
+            f"{'p50':>8} {'p90':>8} {'p99':>8}"
+        )
+        for name, stats in [*report["actions"].items(), ("total", report)]:
+            p50, p90, p99 = (
+                f"{stats[key]:.1f}" if stats[key] is not None else "-"
+                for key in ("p50_ms", "p90_ms", "p99_ms")
+            )
+            self.stdout.write(
+                f"{name:<12} {stats['requests']:>8} {stats['throughput_rps']:>8.1f} "
+                f"{stats['errors'] + stats['rejected']:>7} {stats['throttled']:>5} "
+                f"{p50:>8} {p90:>8} {p99:>8}"
+            )
+        self.stdout.write(f"Error rate: {report['error_rate']:.2%}")
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import memory
+
+
+class Command(BaseCommand):
+    help = "Print a signed token that enables memory profiling for requests sending it"
+
+    def handle(self, *_args, **options):
+        token = memory.make_token()
+        self.stdout.write(token)
+        self.stderr.write(
+            f"Send it as '{memory.HEADER}: <token>'; "
+            f"valid for {settings.MEMORY_PROFILE_TOKEN_MAX_AGE} seconds."
+        )
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import serving
+
+
+class Command(BaseCommand):
+    help = "Run the production server: gunicorn with workers sized for this machine"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=sorted(serving.APPS),
+            help="wsgi (gthread/sync workers) or asgi (uvicorn workers); default SERVER_MODE",
+        )
+        parser.add_argument("--bind", help="Address to listen on (default BIND or 0.0.0.0:$PORT)")
+        parser.add_argument("--workers", type=int, help="Worker processes (default: autotuned)")
+        parser.add_argument("--threads", type=int, help="Threads per worker (default: autotuned)")
+        parser.add_argument(
+            "--db-max-connections",
+            type=int,
+            help="Keep workers x threads within this (default 20 outside SQLite); 0 lifts the cap",
+        )
+        parser.add_argument(
+            "--max-memory-mb", type=int, help="Recycle workers above this RSS; 0 disables"
+        )
+        parser.add_argument("--max-requests", type=int, help="Recycle workers after N requests")
+        parser.add_argument(
+            "--no-preload", action="store_true", help="Import the app in each worker instead"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Print the settings and exit without serving"
+        )
+
+    def handle(self, *_args, **options):
+        env = dict(os.environ)
+        overrides = {
+            "SERVER_MODE": options["mode"],
+            "BIND": options["bind"],
+            "WEB_CONCURRENCY": options["workers"],
+            "SERVER_THREADS": options["threads"],
+            "DB_MAX_CONNECTIONS": options["db_max_connections"],
+            "WORKER_MAX_MEMORY_MB": options["max_memory_mb"],
+            "WORKER_MAX_REQUESTS": options["max_requests"],
+        }
+        env.update({key: str(value) for key, value in overrides.items() if value is not None})
+        if options["no_preload"]:
+            env["SERVER_PRELOAD"] = "false"
+
+        try:
+            plan = serving.plan(env)
+        except ValueError as error:
+            raise CommandError(error) from None
+        for module in ("gunicorn", "uvicorn") if plan.mode == "asgi" else ("gunicorn",):
+            if importlib.util.find_spec(module) is None:
+                raise CommandError(f"{module} is not installed")
+        for field, value in plan._asdict().items():
+            self.stdout.write(f"{field:<14} {value}")
+        if options["dry_run"]:
+            return
+
+        self.stdout.flush()
+        config = str(settings.BASE_DIR / "gunicorn.conf.py")
+        command = [sys.executable, "-m", "gunicorn", "--config", config]
+        os.chdir(settings.BASE_DIR)
+        os.execve(sys.executable, command, env)
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from api.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow query log: the worst query fingerprints by total time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="Look back this many hours")
+        parser.add_argument("--limit", type=int, default=10, help="Fingerprints to show")
+        parser.add_argument(
+            "--explain", action="store_true", help="Show the latest plan for each fingerprint"
+        )
+        parser.add_argument(
+            "--purge-days", type=int, help="Delete entries older than this many days and exit"
+        )
+
+    def handle(self, *_args, **options):
+        now = timezone.now()
+        if options["purge_days"] is not None:
+            deleted, _ = SlowQuery.objects.filter(
+                created_at__lt=now - timedelta(days=options["purge_days"])
+            ).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow query entries"))
+            return
+
+        entries = SlowQuery.objects.filter(created_at__gte=now - timedelta(hours=options["hours"]))
+        worst = (
+            entries.values("fingerprint")
+            .annotate(
+                count=Count("pk"),
+                total_ms=Sum("duration_ms"),
+                mean_ms=Avg("duration_ms"),
+                max_ms=Max("duration_ms"),
+            )
+            .order_by("-total_ms")[: options["limit"]]
+        )
+
+        for rank, row in enumerate(worst, 1):
+            latest = entries.filter(fingerprint=row["fingerprint"]).latest("created_at")
+            views = (
+                entries.filter(fingerprint=row["fingerprint"])
+                .values_list("view")
+                .annotate(n=Count("pk"))
+                .order_by("-n")[:3]
+            )
+            self.stdout.write(
+                f"{rank}. {row['fingerprint'][:12]}  total {row['total_ms']:.0f}ms  "
+                f"count {row['count']}  mean {row['mean_ms']:.1f}ms  max {row['max_ms']:.1f}ms"
+            )
+            self.stdout.write(f"   views: {', '.join(f'{view} ({n})' for view, n in views)}")
+            self.stdout.write(f"   {latest.sql[:500]}")
+            if options["explain"] and latest.explain:
+                for line in latest.explain.splitlines():
+                    self.stdout.write(f"     {line}")
+
+        if not worst:
+            self.stdout.write(self.style.SUCCESS("No slow queries recorded"))
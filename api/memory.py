@@ -0,0 +1,177 @@
+"""
+Per-request memory profiling with tracemalloc.
+
+A request is profiled when ``MEMORY_PROFILING`` is on, or when it carries an
+``X-Memory-Profile`` header holding a token from ``make_token()`` (see the
+``memory_profile_token`` command). Tracing slows Python allocations down
+considerably, so it only runs for profiled requests, and one at a time:
+tracemalloc is process-wide, and concurrent requests would be charged for
+each other's allocations. A profiled request arriving while another is being
+traced is served without profiling.
+
+Per-view aggregates live in the worker process that served the requests.
+"""
+
+import json
+import logging
+import threading
+import tracemalloc
+
+from django.conf import settings
+from django.core import signing
+
+logger = logging.getLogger("api.memory")
+
+HEADER = "X-Memory-Profile"
+TOKEN_SALT = "api.memory.profile"
+TOP_SITES = 10
+TRACE_FRAMES = 10
+
+_profiling = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {}
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def token_is_valid(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.MEMORY_PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def wants_profile(request):
+    if settings.MEMORY_PROFILING:
+        return True
+    token = request.headers.get(HEADER)
+    return bool(token) and token_is_valid(token)
+
+
+class Profile:
+    """The outcome of one traced request."""
+
+    def __init__(self, peak, net, sites):
+        self.peak = peak
+        self.net = net
+        self.sites = sites
+
+    def header(self):
+        return f"peak={self.peak / 1024:.1f}KiB; net={self.net / 1024:.1f}KiB"
+
+    def as_dict(self):
+        return {
+            "peak_kib": round(self.peak / 1024, 1),
+            "net_kib": round(self.net / 1024, 1),
+            "top_sites": self.sites,
+        }
+
+
+def begin():
+    """
+    Start tracing a request; returns the state to pass to ``end()``.
+
+    Returns None when another request is already being traced.
+    """
+    if not _profiling.acquire(blocking=False):
+        return None
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    except BaseException:
+        _finish(started_here)
+        raise
+    return started_here, base, before
+
+
+def end(state):
+    """Stop tracing the request started by ``begin()``; returns its Profile."""
+    started_here, base, before = state
+    try:
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    finally:
+        _finish(started_here)
+
+    diffs = after.compare_to(before, "lineno")
+    sites = [
+        {
+            "site": f"{diff.traceback[0].filename}:{diff.traceback[0].lineno}",
+            "size_kib": round(diff.size_diff / 1024, 1),
+            "count": diff.count_diff,
+        }
+        for diff in diffs[:TOP_SITES]
+        if diff.size_diff > 0
+    ]
+    return Profile(peak - base, current - base, sites)
+
+
+def _finish(started_here):
+    if started_here:
+        tracemalloc.stop()
+    _profiling.release()
+
+
+def profile(func):
+    """Run ``func()`` under tracemalloc; returns ``(result, Profile or None)``."""
+    state = begin()
+    if state is None:
+        return func(), None
+    try:
+        result = func()
+    except BaseException:
+        _finish(state[0])
+        raise
+    return result, end(state)
+
+
+def record(view, profile):
+    with _stats_lock:
+        stats = _stats.setdefault(
+            view, {"requests": 0, "peak_kib_max": 0.0, "peak_kib_total": 0.0, "net_kib_total": 0.0}
+        )
+        peak_kib = profile.peak / 1024
+        stats["requests"] += 1
+        stats["peak_kib_max"] = max(stats["peak_kib_max"], peak_kib)
+        stats["peak_kib_total"] += peak_kib
+        stats["net_kib_total"] += profile.net / 1024
+        stats["top_sites"] = profile.sites
+    entry = {"view": view, **profile.as_dict()}
+    logger.info(json.dumps(entry, sort_keys=True), extra={"memory_profile": entry})
+
+
+def stats():
+    """Per-view aggregates, worst peak first."""
+    with _stats_lock:
+        rows = [
+            {
+                "view": view,
+                "requests": item["requests"],
+                "peak_kib_max": round(item["peak_kib_max"], 1),
+                "peak_kib_mean": round(item["peak_kib_total"] / item["requests"], 1),
+                "net_kib_mean": round(item["net_kib_total"] / item["requests"], 1),
+                "top_sites": item["top_sites"],
+            }
+            for view, item in _stats.items()
+        ]
+    return sorted(rows, key=lambda row: row["peak_kib_max"], reverse=True)
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
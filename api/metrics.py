@@ -0,0 +1,141 @@
+"""
+Prometheus metrics for the API.
+
+Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory before
+the workers start: prometheus_client then keeps each worker's samples in
+memory-mapped files there and ``exposition()`` aggregates them, so a scrape
+sees the whole server rather than whichever worker answered.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+REQUESTS = Counter(
+    "crm_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+LATENCY = Histogram(
+    "crm_http_request_duration_seconds",
+    "Request latency by route and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "crm_http_request_db_queries", "SQL queries per request", ["route"], buckets=QUERY_BUCKETS
+)
+THROTTLED = Counter("crm_http_throttled_total", "Requests rejected with 429", ["route"])
+CACHE_REQUESTS = Counter(
+    "crm_cache_requests_total", "Application cache lookups by outcome", ["cache", "result"]
+)
+COALESCED = Counter(
+    "crm_coalesced_requests_total",
+    "Coalesced reads by outcome: computed, joined in-process, joined via cache, or fallback",
+    ["view", "result"],
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "crm_query_budget_exceeded_total",
+    "Requests stopped for running too many or too slow queries",
+    ["view", "limit"],
+)
+IMPORT_ROWS = Counter("crm_import_rows_total", "Rows created by import jobs", ["kind"])
+IMPORT_DURATION = Histogram(
+    "crm_import_duration_seconds", "Import job duration", ["kind"], buckets=LATENCY_BUCKETS
+)
+
+
+_counter = ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` hook that only counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Count the queries of the current context, in whichever thread they run."""
+    counter = QueryCounter()
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+def count_query(execute, sql, params, many, context):
+    """Hook installed on every connection by ``api.apps``, see ``count_queries``."""
+    counter = _counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def route(request):
+    """A bounded label for the request: the URL name, never the raw path."""
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "unmatched"
+
+
+def observe_request(request, response, seconds, queries):
+    name = route(request)
+    labels = (request.method, name, str(response.status_code))
+    REQUESTS.labels(*labels).inc()
+    LATENCY.labels(*labels).observe(seconds)
+    DB_QUERIES.labels(name).observe(queries)
+    if response.status_code == 429:
+        THROTTLED.labels(name).inc()
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_coalesce(view, result):
+    COALESCED.labels(view, result).inc()
+
+
+def record_query_budget(view, limit):
+    QUERY_BUDGET_EXCEEDED.labels(view, limit).inc()
+
+
+@contextmanager
+def import_job(kind):
+    """Time an import; set ``job.rows`` to the number of rows it created."""
+    job = SimpleNamespace(rows=0)
+    started = time.perf_counter()
+    try:
+        yield job
+    finally:
+        IMPORT_ROWS.labels(kind).inc(job.rows)
+        IMPORT_DURATION.labels(kind).observe(time.perf_counter() - started)
+
+
+def exposition():
+    """Return ``(body, content type)`` for a scrape, merged across workers if multiprocess."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,230 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import budget, memory, metrics, slow_queries, timing
+
+logger = logging.getLogger("api.timing")
+
+
+class HybridMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Django would otherwise run sync-only middleware in a thread for every
+    ASGI request, costing the async views a thread hop each. Subclasses define
+    ``call`` for WSGI and ``acall`` for ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.acall(request)
+        return self.call(request)
+
+
+class ServerTimingMiddleware(HybridMiddleware):
+    """
+    Adds a ``Server-Timing`` header and a structured log line to sampled requests.
+
+    Place it first in ``MIDDLEWARE`` so the total covers the other middleware
+    and ``process_template_response`` runs right before DRF renders.
+    """
+
+    def call(self, request):
+        if not self.sampled():
+            return self.get_response(request)
+        # Queries are timed by timing.sql_wrapper, installed on every connection.
+        with timing.activate(timing.Timings()) as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def acall(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with timing.activate(timing.Timings()) as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def sampled(self):
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def finish(self, request, response, timings):
+        timings.finish()
+        response["Server-Timing"] = timings.header()
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(),
+        }
+        logger.info(json.dumps(record, sort_keys=True), extra={"server_timing": record})
+        return response
+
+    def process_template_response(self, request, response):
+        timings = timing.current()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(_response):
+                timings.add("render", (time.perf_counter() - started) * 1000)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class PrometheusMiddleware(HybridMiddleware):
+    """Records request count, latency, status and SQL query count per route."""
+
+    def call(self, request):
+        started = time.perf_counter()
+        with metrics.count_queries() as counter:
+            response = self.get_response(request)
+        metrics.observe_request(request, response, time.perf_counter() - started, counter.count)
+        return response
+
+    async def acall(self, request):
+        started = time.perf_counter()
+        with metrics.count_queries() as counter:
+            response = await self.get_response(request)
+        metrics.observe_request(request, response, time.perf_counter() - started, counter.count)
+        return response
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Attributes slow queries to the view that ran them."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            self.process_view = self.aprocess_view
+
+    def call(self, request):
+        token = slow_queries.set_view(f"{request.method} {request.path}")
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.reset_view(token)
+
+    async def acall(self, request):
+        token = slow_queries.set_view(f"{request.method} {request.path}")
+        try:
+            return await self.get_response(request)
+        finally:
+            slow_queries.reset_view(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(f"{request.method} {request.resolver_match.view_name}")
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(f"{request.method} {request.resolver_match.view_name}")
+
+
+class QueryBudgetMiddleware(HybridMiddleware):
+    """Enforces the query budget of the view handling the request, see ``api.budget``."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            self.process_view = self.aprocess_view
+
+    def call(self, request):
+        with budget.track():
+            return self.get_response(request)
+
+    async def acall(self, request):
+        with budget.track():
+            return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget.current().configure(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        budget.current().configure(request, view_func)
+
+
+class MemoryProfileMiddleware(HybridMiddleware):
+    """
+    Traces allocations for requests selected by ``memory.wants_profile``.
+
+    Under ASGI, other requests served by the same event loop meanwhile are
+    traced too; profile with a single concurrent request for clean numbers.
+    """
+
+    def call(self, request):
+        if not memory.wants_profile(request):
+            return self.get_response(request)
+        response, profile = memory.profile(lambda: self.get_response(request))
+        return self.finish(request, response, profile)
+
+    async def acall(self, request):
+        if not memory.wants_profile(request):
+            return await self.get_response(request)
+        state = memory.begin()
+        if state is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            memory.end(state)
+            raise
+        return self.finish(request, response, memory.end(state))
+
+    def finish(self, request, response, profile):
+        if profile is not None:
+            memory.record(f"{request.method} {metrics.route(request)}", profile)
+            response[memory.HEADER] = profile.header()
+        return response
+
+
+class StaticFilesMiddleware(HybridMiddleware):
+    """
+    WhiteNoise for both WSGI and ASGI.
+
+    ``WhiteNoiseMiddleware`` is sync-only, so in ``MIDDLEWARE`` it would make
+    Django run the whole chain on a thread for every ASGI request. Here, under
+    ASGI, only requests under the static prefix are looked up (on a thread);
+    every other request goes straight on.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.whitenoise = WhiteNoiseMiddleware()
+
+    def call(self, request):
+        response = self.static_response(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def acall(self, request):
+        if request.path_info.startswith(self.whitenoise.static_prefix):
+            response = await sync_to_async(self.static_response)(request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+    def static_response(self, request):
+        """WhiteNoise's response for a static file, or None if ``request`` is not for one."""
+        whitenoise = self.whitenoise
+        if whitenoise.autorefresh:
+            static_file = whitenoise.find_file(request.path_info)
+        else:
+            static_file = whitenoise.files.get(request.path_info)
+        if static_file is None:
+            return None
+        return whitenoise.serve(static_file, request)
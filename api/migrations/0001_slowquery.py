@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(db_index=True, max_length=40)),
+                (
+                    "sql",
+                    models.TextField(help_text="Normalized SQL with literals replaced by ?"),
+                ),
+                ("view", models.CharField(blank=True, max_length=200)),
+                ("duration_ms", models.FloatField()),
+                ("explain", models.TextField(blank=True)),
+                ("vendor", models.CharField(max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,16 @@
-# from django.db import models  # noqa
+from django.db import models
 
-# Create your models here.
+
+class SlowQuery(models.Model):
+    """One query that ran longer than ``SLOW_QUERY_LOG_MS``, recorded by ``api.slow_queries``."""
+
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    sql = models.TextField(help_text="Normalized SQL with literals replaced by ?")
+    view = models.CharField(max_length=200, blank=True)
+    duration_ms = models.FloatField()
+    explain = models.TextField(blank=True)
+    vendor = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f}ms {self.sql[:80]}"
@@ -0,0 +1,27 @@
+"""
+JSON request parser backed by orjson when it is installed.
+
+Accepts and rejects the same documents as DRF's ``JSONParser``: bodies
+orjson refuses (or that are not UTF-8) are handed to DRF's parser, which
+either parses them or raises its usual ``ParseError``.
+"""
+
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from api.renderers import orjson
+
+
+class JSONParser(parsers.JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,192 @@
+"""
+Response renderers, chosen per request by ``Accept`` or ``?format=``.
+
+- ``JSONRenderer`` (``application/json``) writes the same bytes as DRF's, but
+  encodes with orjson when it is installed. Values orjson does not handle
+  natively (``Decimal``, datetimes, lazy strings) go through DRF's encoder, so
+  they serialize exactly as before. orjson writes exponents differently
+  (``1e16`` for ``1e+16``) and NaN and infinities as ``null``, so data holding
+  floats outside ``[1e-4, 1e16)`` is encoded by the stdlib encoder instead,
+  which also raises DRF's error for the non-finite ones.
+- ``NDJSONRenderer`` (``application/x-ndjson``) writes one JSON document per
+  line: each result of a list, or the single object otherwise. For paginated
+  lists the count and the next/previous links move to ``X-Total-Count`` and
+  ``Link`` headers.
+- ``MessagePackRenderer`` (``application/msgpack``) uses the msgpack package
+  when it is installed and an equivalent pure-Python encoder otherwise.
+"""
+
+import json
+import struct
+
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+# Handles whatever the fast encoders pass back: Decimal, datetimes, lazy strings...
+encode_default = JSONEncoder().default
+
+if orjson is not None:
+    # Datetimes are passed to DRF's encoder, which formats them differently.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(data):
+    """Compact UTF-8 JSON, as DRF's JSONRenderer writes it with default settings."""
+    if orjson is not None and _floats_as_repr(data):
+        try:
+            content = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder handles.
+            pass
+        else:
+            # Escaped by DRF so the output is also valid JavaScript.
+            return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    content = json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    )
+    return content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def _floats_as_repr(data):
+    """Whether orjson writes every float in ``data`` as ``repr()`` does."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float) and value and not 1e-4 <= abs(value) < 1e16:
+            # Exponent notation, or NaN and infinities (every comparison is False).
+            return False
+    return True
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Indented, ASCII-only or non-strict output is left to DRF's renderer.
+        if (
+            data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict) and isinstance(data.get("results"), list):
+            response = (renderer_context or {}).get("response")
+            if response is not None:
+                self.set_pagination_headers(response, data)
+            data = data["results"]
+        items = data if isinstance(data, list) else [data]
+        return b"".join(dumps(item) + b"\n" for item in items)
+
+    def set_pagination_headers(self, response, page):
+        if "count" in page:
+            response["X-Total-Count"] = page["count"]
+        links = [f'<{page[rel]}>; rel="{rel}"' for rel in ("next", "previous") if page.get(rel)]
+        if links:
+            response["Link"] = ", ".join(links)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if msgpack is not None:
+            return msgpack.packb(data, default=encode_default)
+        return packb(data)
+
+
+def packb(data):
+    """Encode ``data`` as MessagePack, choosing the same formats as ``msgpack.packb``."""
+    parts = []
+    _pack(data, parts)
+    return b"".join(parts)
+
+
+# (fix format marker, fix format limit, (marker, struct format) for longer lengths)
+_STR = (0xA0, 32, ((0xD9, "B"), (0xDA, "H"), (0xDB, "I")))
+_BIN = (0, 0, ((0xC4, "B"), (0xC5, "H"), (0xC6, "I")))
+_MAP = (0x80, 16, ((0xDE, "H"), (0xDF, "I")))
+_ARRAY = (0x90, 16, ((0xDC, "H"), (0xDD, "I")))
+_UINTS = ((0xCC, "B"), (0xCD, "H"), (0xCE, "I"), (0xCF, "Q"))
+_INTS = ((0xD0, "b"), (0xD1, "h"), (0xD2, "i"), (0xD3, "q"))
+
+
+def _pack(obj, parts):
+    if obj is None:
+        parts.append(b"\xc0")
+    elif obj is True:
+        parts.append(b"\xc3")
+    elif obj is False:
+        parts.append(b"\xc2")
+    elif isinstance(obj, int):
+        if -32 <= obj < 0x80:
+            parts.append(struct.pack(">b" if obj < 0 else ">B", obj))
+        else:
+            parts.append(_sized(obj, _UINTS if obj > 0 else _INTS))
+    elif isinstance(obj, float):
+        parts.append(b"\xcb" + struct.pack(">d", obj))
+    elif isinstance(obj, str):
+        encoded = obj.encode()
+        parts.append(_header(len(encoded), _STR))
+        parts.append(encoded)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        encoded = bytes(obj)
+        parts.append(_header(len(encoded), _BIN))
+        parts.append(encoded)
+    elif isinstance(obj, dict):
+        parts.append(_header(len(obj), _MAP))
+        for key, value in obj.items():
+            _pack(key, parts)
+            _pack(value, parts)
+    elif isinstance(obj, (list, tuple)):
+        parts.append(_header(len(obj), _ARRAY))
+        for item in obj:
+            _pack(item, parts)
+    else:
+        _pack(encode_default(obj), parts)
+
+
+def _header(length, kind):
+    fix, fix_limit, formats = kind
+    if length < fix_limit:
+        return bytes((fix | length,))
+    return _sized(length, formats)
+
+
+def _sized(value, formats):
+    """``value`` in the smallest of ``formats`` that holds it, after its marker byte."""
+    for marker, size in formats:
+        try:
+            return bytes((marker,)) + struct.pack(f">{size}", value)
+        except struct.error:
+            continue
+    raise OverflowError(f"{value} is too large for MessagePack")
@@ -0,0 +1,190 @@
+"""
+OpenAPI schema: generated once per code version and served as a static file.
+
+``AutoSchema`` is a lazy stand-in for drf-spectacular's. DRF instantiates
+``DEFAULT_SCHEMA_CLASS`` whenever a view's ``schema`` attribute is read, and
+the router reads it for every viewset while the URLconf loads, so pointing
+the setting at drf-spectacular directly imports its whole schema machinery in
+every worker. Until drf-spectacular has been imported (its schema generator
+does so before it inspects any view), views get a plain inspector instead.
+
+The schema itself is rendered to JSON and YAML under ``OPENAPI_SCHEMA_DIR``
+by ``manage.py build_schema``, or on the first request for it, and tagged
+with the code version it was generated from. ``SchemaView`` serves those
+bytes with an ETag and ``Cache-Control``; when the deployed code changes
+(``CODE_VERSION``, or a digest of the project's source) the files are
+regenerated on first use.
+"""
+
+import functools
+import hashlib
+import importlib.metadata
+import logging
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.views import View
+from rest_framework.schemas.inspectors import ViewInspector
+
+logger = logging.getLogger(__name__)
+
+REAL_SCHEMA = "drf_spectacular.openapi"
+VERSION_FILE = "openapi.version"
+FORMATS = {
+    "yaml": ("openapi.yaml", "application/vnd.oai.openapi"),
+    "json": ("openapi.json", "application/vnd.oai.openapi+json"),
+}
+# Packages whose upgrades can change the generated schema.
+SCHEMA_PACKAGES = ("django", "djangorestframework", "drf-spectacular", "django-filter")
+
+
+class AutoSchema(ViewInspector):
+    def __new__(cls, *args, **kwargs):
+        module = sys.modules.get(REAL_SCHEMA)
+        if module is not None:
+            return module.AutoSchema(*args, **kwargs)
+        return super().__new__(cls)
+
+
+class Document(NamedTuple):
+    content: bytes
+    content_type: str
+    etag: str
+
+
+def code_version():
+    """``CODE_VERSION`` if set, otherwise a digest of the project's source and schema packages."""
+    return settings.CODE_VERSION or _source_digest()
+
+
+@functools.cache
+def _source_digest():
+    digest = hashlib.sha256()
+    for package in SCHEMA_PACKAGES:
+        digest.update(f"{package}=={importlib.metadata.version(package)}\n".encode())
+    base_dir = Path(settings.BASE_DIR)
+    # The project package (settings, root URLconf) and every local app.
+    packages = {Path(importlib.import_module(settings.ROOT_URLCONF).__file__).parent}
+    packages.update(Path(app_config.path) for app_config in apps.get_app_configs())
+    paths = [
+        path
+        for package in packages
+        if package.is_relative_to(base_dir)
+        for path in package.rglob("*.py")
+    ]
+    for path in sorted(paths):
+        digest.update(str(path.relative_to(base_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def generate():
+    """Render the schema in every format, keyed by format."""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+    from api.openapi import SchemaGenerator
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return {
+        "yaml": OpenApiYamlRenderer().render(schema, renderer_context={}),
+        "json": OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def _write(path, content):
+    # Written to a temporary file and renamed, so concurrent readers see
+    # either the old file or the new one.
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp:
+        tmp.write(content)
+    os.replace(tmp.name, path)
+
+
+def build(directory=None):
+    """Generate the schema and write it, with the current code version, to ``directory``."""
+    directory = Path(directory or settings.OPENAPI_SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    rendered = generate()
+    for fmt, content in rendered.items():
+        _write(directory / FORMATS[fmt][0], content)
+    # Last, so a half-written build is never taken for a current one.
+    _write(directory / VERSION_FILE, code_version().encode())
+    return rendered
+
+
+def _read(directory):
+    try:
+        if (directory / VERSION_FILE).read_text() != code_version():
+            return None
+        return {fmt: (directory / filename).read_bytes() for fmt, (filename, _) in FORMATS.items()}
+    except FileNotFoundError:
+        return None
+
+
+def load():
+    """The schema for the current code version, built first if missing or stale."""
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    rendered = _read(directory)
+    if rendered is None:
+        logger.info("Generating OpenAPI schema for code version %s", code_version())
+        try:
+            rendered = build(directory)
+        except OSError as error:
+            logger.warning("Could not write OpenAPI schema to %s: %s", directory, error)
+            rendered = generate()
+    return {
+        fmt: Document(content, FORMATS[fmt][1], f'"{hashlib.sha256(content).hexdigest()[:32]}"')
+        for fmt, content in rendered.items()
+    }
+
+
+_documents = None
+_lock = threading.Lock()
+
+
+def documents():
+    """Schema documents by format, loaded once per process."""
+    global _documents
+    if _documents is None:
+        with _lock:
+            if _documents is None:
+                _documents = load()
+    return _documents
+
+
+def reset():
+    global _documents
+    with _lock:
+        _documents = None
+
+
+class SchemaView(View):
+    """
+    OpenAPI schema for this API. YAML by default; JSON with ``?format=json``
+    or an ``Accept`` header asking for JSON.
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request):
+        document = documents()[self.format(request)]
+        response = get_conditional_response(request, etag=document.etag)
+        if response is None:
+            response = HttpResponse(document.content, content_type=document.content_type)
+        response["ETag"] = document.etag
+        patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    def format(self, request):
+        requested = request.GET.get("format")
+        if requested in FORMATS:
+            return requested
+        return "json" if "json" in request.headers.get("Accept", "") else "yaml"
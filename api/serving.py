@@ -0,0 +1,189 @@
+"""
+Production server settings, sized for the machine gunicorn runs on.
+
+``gunicorn.conf.py`` reads its settings from ``plan()``, so ``gunicorn`` with no
+arguments and ``manage.py serve`` start the same server. Everything can be
+overridden from the environment:
+
+- ``SERVER_MODE``: ``wsgi`` (gthread, or sync with one thread) or ``asgi``
+  (uvicorn workers running ``dcrm.asgi``)
+- ``WEB_CONCURRENCY`` / ``SERVER_THREADS``: workers and threads per worker
+- ``DB_MAX_CONNECTIONS``: connections this instance may hold; workers x
+  threads is kept within it, since each thread keeps its own connection
+  (``CONN_MAX_AGE``). Defaults to ``DEFAULT_MAX_CONNECTIONS`` on a database
+  server, a share of PostgreSQL's default ``max_connections`` of 100 that
+  leaves room for other instances; 0 lifts the cap
+- ``WORKER_MAX_MEMORY_MB``: recycle a worker once its RSS passes this (0 disables)
+- ``WORKER_MAX_REQUESTS``: recycle a worker after this many requests
+- ``BIND`` or ``PORT``
+
+This module is imported by gunicorn before Django is configured and must not
+import Django at module level.
+"""
+
+import gc
+import math
+import os
+import signal
+import threading
+import time
+from typing import NamedTuple
+
+APPS = {"wsgi": "dcrm.wsgi:application", "asgi": "dcrm.asgi:application"}
+ASGI_WORKER = "uvicorn.workers.UvicornWorker"
+MEMORY_CHECK_SECONDS = 10
+DEFAULT_MAX_CONNECTIONS = 20
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+class ServerPlan(NamedTuple):
+    mode: str
+    app: str
+    bind: str
+    worker_class: str
+    workers: int
+    threads: int
+    max_memory_mb: int
+    max_requests: int
+
+
+def cgroup_cpu_limit(root=None):
+    """
+    CPUs the container's CPU quota allows, or ``None`` without a quota.
+
+    Reads ``cpu.max`` (cgroup v2) or ``cpu.cfs_quota_us`` and ``cpu.cfs_period_us``
+    (cgroup v1). A quota of 1.5 CPUs counts as 2.
+    """
+    root = root or CGROUP_ROOT
+    try:
+        with open(os.path.join(root, "cpu.max")) as cpu_max:
+            quota, period = cpu_max.read().split()
+    except OSError:
+        try:
+            with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as quota_file:
+                quota = quota_file.read().strip()
+            with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as period_file:
+                period = period_file.read().strip()
+        except OSError:
+            return None
+    # v2 writes "max" and v1 writes -1 for no quota.
+    if quota == "max" or int(quota) <= 0 or int(period) <= 0:
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def cpu_count():
+    """
+    CPUs this process may use, which in a container can be fewer than the host has.
+
+    The smaller of the CPUs it may be scheduled on and its cgroup CPU quota.
+    """
+    if hasattr(os, "process_cpu_count"):
+        cpus = os.process_cpu_count() or 1
+    else:
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+def plan(env=None):
+    env = os.environ if env is None else env
+    mode = env.get("SERVER_MODE", "wsgi")
+    if mode not in APPS:
+        raise ValueError(f"SERVER_MODE must be one of {', '.join(APPS)}, not {mode!r}")
+    cpus = cpu_count()
+    sqlite = env.get("DATABASE_URL", "sqlite").startswith("sqlite")
+
+    if mode == "asgi":
+        # One event loop per core; concurrency comes from the loop, not threads.
+        workers, threads = cpus, 1
+    else:
+        workers = 2 * cpus + 1
+        # SQLite serializes writers, so extra threads would only queue on its lock.
+        threads = 1 if sqlite else 4
+    workers = int(env.get("WEB_CONCURRENCY") or workers)
+    threads = int(env.get("SERVER_THREADS") or threads)
+
+    max_connections = env.get("DB_MAX_CONNECTIONS") or (0 if sqlite else DEFAULT_MAX_CONNECTIONS)
+    max_connections = int(max_connections)
+    if max_connections and workers * threads > max_connections:
+        threads = max(1, min(threads, max_connections // workers))
+        workers = max(1, min(workers, max_connections // threads))
+
+    if mode == "asgi":
+        worker_class = ASGI_WORKER
+    else:
+        worker_class = "gthread" if threads > 1 else "sync"
+
+    return ServerPlan(
+        mode=mode,
+        app=APPS[mode],
+        bind=env.get("BIND") or f"0.0.0.0:{env.get('PORT', '8000')}",
+        worker_class=worker_class,
+        workers=workers,
+        threads=threads,
+        max_memory_mb=int(env.get("WORKER_MAX_MEMORY_MB", "512")),
+        max_requests=int(env.get("WORKER_MAX_REQUESTS", "2000")),
+    )
+
+
+def warm_up():
+    """
+    Populate per-process caches in the gunicorn master, before it forks.
+
+    Workers then start with URL resolvers built and the tag registry loaded.
+    Database connections are closed so no worker inherits the master's socket,
+    and the warmed objects are moved out of the garbage collector's reach so
+    collections in the workers do not touch (and un-share) their pages.
+    """
+    from django.db import connections
+    from django.urls import get_resolver
+
+    from tags.registry import registry
+
+    # Building the reverse lookup imports every URLconf and view module.
+    get_resolver().reverse_dict
+    try:
+        registry.all()
+    finally:
+        connections.close_all()
+    gc.collect()
+    gc.freeze()
+
+
+def rss_mb():
+    """Resident memory of this process in MiB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+
+        # Peak rather than current RSS, on systems without /proc.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def watch_memory(log, limit_mb, interval=MEMORY_CHECK_SECONDS):
+    """
+    Stop this worker gracefully once its RSS passes ``limit_mb``.
+
+    SIGTERM lets the worker finish in-flight requests; the gunicorn master
+    then starts a fresh one. Works for sync, gthread and uvicorn workers alike.
+    """
+
+    def watch():
+        while True:
+            rss = rss_mb()
+            if rss > limit_mb:
+                log.info(
+                    "Worker %s uses %.0f MiB (limit %s MiB); recycling", os.getpid(), rss, limit_mb
+                )
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            time.sleep(interval)
+
+    threading.Thread(target=watch, name="memory-watch", daemon=True).start()
@@ -0,0 +1,145 @@
+"""
+Opt-in slow query log.
+
+Every query goes through ``record``, installed on each new connection by
+``api.apps``; when ``SLOW_QUERY_LOG_MS`` is above zero, queries slower than
+that are logged straight away with their fingerprint and originating view,
+then handed to a background thread that runs ``EXPLAIN`` on its own
+connection and stores a ``SlowQuery`` row. The request only pays for a queue
+put; when the queue is full the query is still logged but not explained.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger("api.slow_queries")
+
+_view = ContextVar("slow_query_view", default="")
+_local = threading.local()
+_queue = queue.Queue(maxsize=1000)
+_worker = None
+_worker_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUES = re.compile(r"\((?:\s*\?\s*,)*\s*\?\s*\)")
+_REPEATED = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """Replace literals and placeholders with ``?`` and collapse lists, so similar queries match."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _VALUES.sub("(...)", sql)
+    sql = _REPEATED.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def set_view(name):
+    """Attribute queries in the current context to ``name``; returns a token for ``reset_view``."""
+    return _view.set(name)
+
+
+def reset_view(token):
+    _view.reset(token)
+
+
+def record(execute, sql, params, many, context):
+    """``execute_wrapper`` hook: time the query and report it if it was slow."""
+    threshold = settings.SLOW_QUERY_LOG_MS
+    if threshold <= 0 or getattr(_local, "internal", False):
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= threshold:
+            _report(context["connection"].alias, sql, params, many, duration_ms)
+
+
+def _report(alias, sql, params, many, duration_ms):
+    normalized = normalize(sql)
+    entry = {
+        "fingerprint": fingerprint(normalized),
+        "sql": normalized,
+        "view": _view.get(),
+        "duration_ms": round(duration_ms, 2),
+    }
+    logger.warning(json.dumps(entry, sort_keys=True), extra={"slow_query": entry})
+    try:
+        _queue.put_nowait((alias, sql, params, many, entry))
+    except queue.Full:
+        return
+    _ensure_worker()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="slow-query-explain", daemon=True)
+            _worker.start()
+
+
+def _work():
+    _local.internal = True
+    while True:
+        item = _queue.get()
+        try:
+            save(*item)
+        except Exception:
+            logger.exception("Could not store slow query")
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def save(alias, sql, params, many, entry):
+    """EXPLAIN ``sql`` on this thread's connection and store the SlowQuery row."""
+    from .models import SlowQuery
+
+    connection = connections[alias]
+    SlowQuery.objects.using(alias).create(
+        # executemany() has no single statement to explain.
+        explain="" if many else explain(connection, sql, params),
+        vendor=connection.vendor,
+        **entry,
+    )
+
+
+def explain(connection, sql, params):
+    """The plan for a SELECT; other statements are not explained so nothing is re-run."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return ""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            rows = cursor.fetchall()
+    except Exception as error:
+        return f"EXPLAIN failed: {error}"
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+def drain():
+    """Wait until every queued query has been explained and stored."""
+    _queue.join()
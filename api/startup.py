@@ -0,0 +1,80 @@
+"""
+Worker start-up cost: what ``django.setup()`` and loading the URLconf import.
+
+Both measurements run in a fresh interpreter, since this one has long since
+imported everything.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import NamedTuple
+
+from django.conf import settings
+
+# What a worker does before serving its first request.
+STARTUP_CODE = """
+import json, os, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().reverse_dict
+elapsed = time.perf_counter() - started
+print(json.dumps({"ms": elapsed * 1000, "modules": sorted(sys.modules)}))
+"""
+
+# Imported only on first use; a worker that loads them at start-up regressed.
+LAZY_MODULES = ("drf_spectacular.openapi", "drf_spectacular.views", "boto3", "botocore")
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def _run(*flags, env=None):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", STARTUP_CODE],
+        cwd=settings.BASE_DIR,
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "dcrm.settings"),
+            **(env or {}),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure(env=None):
+    """Start-up wall time in ms and the modules it imported, from a fresh interpreter."""
+    result = json.loads(_run(env=env).stdout.strip().splitlines()[-1])
+    return result["ms"], result["modules"]
+
+
+def import_times(env=None):
+    """Per-module import times from ``python -X importtime``, in import order."""
+    rows = []
+    for line in _run("-X", "importtime", env=env).stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append(ImportTime(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def by_package(rows):
+    """Total self time per top-level package, most expensive first."""
+    totals = {}
+    for row in rows:
+        package = row.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + row.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
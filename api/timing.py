@@ -0,0 +1,124 @@
+"""
+Per-request phase timings for the Server-Timing header.
+
+``ServerTimingMiddleware`` activates a ``Timings`` for sampled requests in a
+context variable; the helpers here add to it and do nothing when no request
+is being timed, so instrumented code costs one context lookup otherwise.
+Phases may overlap: SQL time is also counted in the phase that ran the query.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("server_timing", default=None)
+
+# Header order; any other phase follows in the order it was first recorded.
+PHASE_ORDER = ("auth", "permissions", "throttle", "view", "serialize", "render")
+
+
+class Timings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.total_ms = None
+
+    def add(self, name, ms):
+        self.phases[name] = self.phases.get(name, 0.0) + ms
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def header(self):
+        names = [name for name in PHASE_ORDER if name in self.phases]
+        names += [name for name in self.phases if name not in PHASE_ORDER]
+        parts = [f"{name};dur={self.phases[name]:.2f}" for name in names]
+        parts.append(f'db;dur={self.sql_ms:.2f};desc="{self.queries} queries"')
+        parts.append(f"total;dur={self.total_ms:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        return {
+            "total_ms": round(self.total_ms, 2),
+            "db_ms": round(self.sql_ms, 2),
+            "db_queries": self.queries,
+            **{f"{name}_ms": round(ms, 2) for name, ms in self.phases.items()},
+        }
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def activate(timings):
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to ``name`` on the active request, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Hook installed on every connection by ``api.apps``, counting and timing queries."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql_ms += (time.perf_counter() - started) * 1000
+
+
+class ServerTimingMixin:
+    """Times the authentication, permission, throttle and view phases of a DRF view."""
+
+    def perform_authentication(self, request):
+        with phase("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase("permissions"):
+            super().check_permissions(request)
+
+    def check_throttles(self, request):
+        with phase("throttle"):
+            super().check_throttles(request)
+
+    def dispatch(self, request, *args, **kwargs):
+        with phase("view"):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class GenericServerTimingMixin(ServerTimingMixin):
+    """``ServerTimingMixin`` for ``GenericAPIView`` subclasses, also timing serialization."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None:
+            to_representation = serializer.to_representation
+
+            def timed_to_representation(*rep_args, **rep_kwargs):
+                with phase("serialize"):
+                    return to_representation(*rep_args, **rep_kwargs)
+
+            serializer.to_representation = timed_to_representation
+        return serializer
@@ -1,9 +1,6 @@
-from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from django.urls import include, path, re_path
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -15,6 +12,9 @@ from leads.views import LeadViewSet
 from tags.views import TagViewSet
 
 from . import views
+from .async_views import AsyncReadView
+from .batch import BatchView
+from .schema import SchemaView
 
 router = DefaultRouter()
 router.register(r"contacts", ContactViewSet, basename="contact")
@@ -25,19 +25,61 @@ router.register(r"tags", TagViewSet, basename="tag")
 router.register(r"organizations", OrganizationViewSet, basename="organization")
 
 
+def lazy_view(dotted_path, **initkwargs):
+    """
+    A view that imports its class on first request.
+
+    The docs views live in drf-spectacular, which imports its whole schema
+    machinery; importing them lazily keeps it out of worker startup.
+    """
+    view = None
+
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+# Async list/retrieve for the high-traffic viewsets, for ASGI deployments.
+async_urlpatterns = []
+for prefix, viewset, basename in [
+    ("leads", LeadViewSet, "lead"),
+    ("contacts", ContactViewSet, "contact"),
+    ("deals", DealViewSet, "deal"),
+    ("activities", ActivityViewSet, "activity"),
+]:
+    view = AsyncReadView.as_view(viewset=viewset)
+    async_urlpatterns += [
+        path(f"{prefix}/", view, name=f"async-{basename}-list"),
+        path(f"{prefix}/<str:pk>/", view, name=f"async-{basename}-detail"),
+    ]
+
+
 urlpatterns = [
     path("health/", views.HealthCheckView.as_view(), name="health-check"),
+    re_path(r"^metrics/?$", views.MetricsView.as_view(), name="metrics"),
+    path("debug/memory/", views.MemoryStatsView.as_view(), name="memory-stats"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("register/", RegisterView.as_view(), name="auth_register"),
     path("auth/me/", UserDetailView.as_view(), name="auth_me"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("async/", include(async_urlpatterns)),
     path("", include(router.urls)),
     # API Schema & Documentation
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/schema/", SchemaView.as_view(), name="schema"),
     path(
         "api/docs/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
+        lazy_view("drf_spectacular.views.SpectacularSwaggerView", url_name="schema"),
         name="swagger-ui",
     ),
-    path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    path(
+        "api/redoc/",
+        lazy_view("drf_spectacular.views.SpectacularRedocView", url_name="schema"),
+        name="redoc",
+    ),
 ]
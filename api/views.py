@@ -1,10 +1,80 @@
-from rest_framework import status
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions, status
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from . import memory, metrics
+from .timing import ServerTimingMixin
 
-class HealthCheckView(APIView):
+
+class HealthCheckView(ServerTimingMixin, APIView):
     permission_classes = []
 
     def get(self, request, *_args, **_kwargs):
         return Response({"status": "ok"}, status=status.HTTP_200_OK)
+
+
+METRICS_SCRAPER = "metrics-token"
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <METRICS_TOKEN>``, the credentials Prometheus sends."""
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not settings.METRICS_TOKEN or len(auth) != 2 or auth[0].lower() != b"bearer":
+            return None
+        if not constant_time_compare(auth[1], settings.METRICS_TOKEN.encode()):
+            # Possibly a staff user's JWT: left to the next authentication class.
+            return None
+        return AnonymousUser(), METRICS_SCRAPER
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
+
+
+class MetricsPermission(permissions.BasePermission):
+    """
+    Staff users and scrapers holding ``METRICS_TOKEN``. Clients whose address is in
+    ``METRICS_ALLOWED_IPS`` (empty by default) need no credentials; that only holds
+    without a proxy in front, which would make every request come from its address.
+    """
+
+    def has_permission(self, request, view):
+        if request.auth == METRICS_SCRAPER:
+            return True
+        if request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    authentication_classes = [
+        MetricsTokenAuthentication,
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+    ]
+    permission_classes = [MetricsPermission]
+    # Scrapers poll every few seconds; they must not use up a user's daily quota.
+    throttle_classes = []
+
+    def get(self, request, *_args, **_kwargs):
+        body, content_type = metrics.exposition()
+        return HttpResponse(body, content_type=content_type)
+
+
+class MemoryStatsView(APIView):
+    """Per-view memory profile aggregates for this worker process."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *_args, **_kwargs):
+        return Response({"profiling": settings.MEMORY_PROFILING, "views": memory.stats()})
+
+    def delete(self, request, *_args, **_kwargs):
+        memory.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -3,5 +3,12 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 python manage.py migrate
 
+# Generate the OpenAPI schema now rather than on the first docs request.
+python manage.py build_schema
+
+# Fail the build rather than the deploy if the server settings are invalid;
+# the start command is `python manage.py serve`.
+python manage.py serve --dry-run
+
 # Create superuser automatically if it doesn't exist
 echo "from django.contrib.auth import get_user_model; User = get_user_model(); User.objects.create_superuser('admin', 'admin@example.com', 'admin123') if not User.objects.filter(username='admin').exists() else None" | python manage.py shell
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+# (model, through column, index name): (tag_id, <model>_id) indexes let tag
+# filters probe the through table by tag and read the matching ids from the index.
+INDEXES = (
+    ("Contact", "contact", "contacts_tags_tag_idx"),
+)
+
+
+def _through_indexes(apps):
+    for model_name, column, name in INDEXES:
+        through = apps.get_model("contacts", model_name)._meta.get_field("tags").remote_field.through
+        yield through, models.Index(fields=["tag", column], name=name)
+
+
+def create_indexes(apps, schema_editor):
+    for through, index in _through_indexes(apps):
+        schema_editor.add_index(through, index)
+
+
+def drop_indexes(apps, schema_editor):
+    for through, index in _through_indexes(apps):
+        schema_editor.remove_index(through, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0004_contact_activity_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
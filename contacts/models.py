@@ -29,5 +29,19 @@ class Contact(models.Model):
     # Tags for categorization and filtering
     tags = models.ManyToManyField(Tag, blank=True, related_name="contacts")
 
+    # Denormalized from Activity and kept current by activities.counters
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    activity_count = models.PositiveIntegerField(default=0)
+    call_count = models.PositiveIntegerField(default=0)
+    email_count = models.PositiveIntegerField(default=0)
+    meeting_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "last_activity_at"], name="contact_owner_last_act_idx"),
+            models.Index(fields=["owner", "activity_count"], name="contact_owner_act_count_idx"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -1,13 +1,27 @@
 from rest_framework import serializers
 
+from tags.serializers import TaggedModelSerializerMixin, TagPrimaryKeyRelatedField
+
 from .models import Contact
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(TaggedModelSerializerMixin, serializers.ModelSerializer):
+    tags = TagPrimaryKeyRelatedField(many=True, required=False)
+
     class Meta:
         model = Contact
         fields = "__all__"
-        read_only_fields = ["owner", "created_at", "updated_at"]
+        read_only_fields = [
+            "owner",
+            "created_at",
+            "updated_at",
+            "last_activity_at",
+            "activity_count",
+            "call_count",
+            "email_count",
+            "meeting_count",
+            "note_count",
+        ]
 
     def create(self, validated_data):
 
@@ -1,15 +1,39 @@
 from rest_framework import permissions, viewsets
+from rest_framework.settings import api_settings
+
+from api.coalesce import CoalesceSearchMixin
+from api.expand import ExpandMixin
+from api.fast_list import ValuesListMixin
+from api.timing import GenericServerTimingMixin
+from tags.filters import TagFilterBackend
 
 from .models import Contact
 from .serializers import ContactSerializer
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(
+    GenericServerTimingMixin,
+    CoalesceSearchMixin,
+    ExpandMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ContactSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ["organization", "email"]
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TagFilterBackend]
+    filterset_fields = {
+        "organization": ["exact"],
+        "email": ["exact"],
+        "last_activity_at": ["isnull", "lt", "gte"],
+        "activity_count": ["exact", "lt", "gte"],
+    }
     search_fields = ["first_name", "last_name", "email", "description"]
-    ordering_fields = ["created_at", "first_name"]
+    ordering_fields = ["created_at", "first_name", "last_activity_at", "activity_count"]
+    expandable_fields = {
+        "organization": "accounts.views.OrganizationViewSet",
+        "owner": "accounts.views.UserDetailView",
+        "tags": "tags.views.TagViewSet",
+    }
 
     def get_queryset(self):
         return Contact.objects.filter(owner=self.request.user)
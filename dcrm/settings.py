@@ -2,7 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,8 +44,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.ServerTimingMiddleware",
+    "api.middleware.PrometheusMiddleware",
+    "api.middleware.SlowQueryMiddleware",
+    "api.middleware.MemoryProfileMiddleware",
+    "api.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise, wrapped so the chain stays async under ASGI.
+    "api.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -107,6 +113,18 @@ if db_from_env:
     DATABASES["default"] = db_from_env
 
 
+# Cache
+# Defaults to a per-process memory cache. Point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production
+# so cache invalidation reaches every worker.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -163,6 +181,18 @@ else:
     MEDIA_URL = "/media/"
     MEDIA_ROOT = BASE_DIR / "media"
 
+# Contract uploads
+# Chunks of in-progress uploads are assembled here before being hashed and
+# moved to the default storage. Must be shared by all workers of a host.
+CONTRACT_UPLOAD_DIR = config("CONTRACT_UPLOAD_DIR", default=str(BASE_DIR / "tmp" / "contracts"))
+CONTRACT_MAX_UPLOAD_SIZE = config("CONTRACT_MAX_UPLOAD_SIZE", default=200 * 1024 * 1024, cast=int)
+# Let the front-end server stream local contracts: "X-Sendfile" (Apache/lighttpd) or
+# "X-Accel-Redirect" (nginx, served from CONTRACT_ACCEL_REDIRECT_PREFIX).
+CONTRACT_SENDFILE_HEADER = config("CONTRACT_SENDFILE_HEADER", default="")
+CONTRACT_ACCEL_REDIRECT_PREFIX = config(
+    "CONTRACT_ACCEL_REDIRECT_PREFIX", default="/protected-media/"
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -184,8 +214,8 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "20/minute",
-        "user": "5000/day",
+        "anon": config("THROTTLE_ANON_RATE", default="20/minute"),
+        "user": config("THROTTLE_USER_RATE", default="5000/day"),
     },
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -196,7 +226,21 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.NamespaceVersioning",
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # JSON through orjson when installed (same bytes as DRF's renderer), plus
+    # NDJSON and MessagePack for clients that ask for them in `Accept`.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "api.renderers.NDJSONRenderer",
+        "api.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # drf-spectacular's AutoSchema, imported only once a schema is generated.
+    "DEFAULT_SCHEMA_CLASS": "api.schema.AutoSchema",
 }
 
 SIMPLE_JWT = {
@@ -205,6 +249,95 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Archival
+# ------------------------------------------------------------------
+# `manage.py archive_records` moves activities and lost leads older than
+# these ages into the archive tables, `ARCHIVE_BATCH_SIZE` rows at a time.
+ARCHIVE_ACTIVITIES_AFTER_DAYS = config("ARCHIVE_ACTIVITIES_AFTER_DAYS", default=365, cast=int)
+ARCHIVE_LOST_LEADS_AFTER_DAYS = config("ARCHIVE_LOST_LEADS_AFTER_DAYS", default=180, cast=int)
+ARCHIVE_BATCH_SIZE = config("ARCHIVE_BATCH_SIZE", default=1000, cast=int)
+
+# Tag registry
+# ------------------------------------------------------------------
+# Each process serves tags from memory (see tags/registry.py), reloading when a
+# tag is created, renamed or deleted and at least every TAG_REGISTRY_MAX_AGE
+# seconds, which bounds how stale the usage counters it shows can get.
+TAG_REGISTRY_MAX_AGE = config("TAG_REGISTRY_MAX_AGE", default=60.0, cast=float)
+
+# Server-Timing
+# ------------------------------------------------------------------
+# Fraction of requests that get a `Server-Timing` header and an `api.timing`
+# log line with per-phase (auth, throttle, view, serialize, render) and SQL timings.
+SERVER_TIMING_SAMPLE_RATE = config(
+    "SERVER_TIMING_SAMPLE_RATE", default=1.0 if DEBUG else 0.05, cast=float
+)
+
+# Metrics
+# ------------------------------------------------------------------
+# `/api/v1/metrics` serves Prometheus metrics to staff users and to scrapers
+# sending `Authorization: Bearer <METRICS_TOKEN>`. METRICS_ALLOWED_IPS opts
+# client addresses in without credentials; only use it when nothing proxies the
+# app, as behind a proxy every request comes from the proxy's address. Under
+# gunicorn also set the PROMETHEUS_MULTIPROC_DIR environment variable (see
+# gunicorn.conf.py).
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="", cast=Csv())
+
+# Slow query log
+# ------------------------------------------------------------------
+# Queries slower than this many milliseconds are logged on `api.slow_queries`
+# and stored, with their EXPLAIN plan, as api.SlowQuery rows by a background
+# thread; `manage.py slow_queries` summarizes them. 0 disables the log.
+SLOW_QUERY_LOG_MS = config("SLOW_QUERY_LOG_MS", default=0, cast=float)
+
+# Memory profiling
+# ------------------------------------------------------------------
+# Trace allocations with tracemalloc for every request, or only for requests
+# sending an X-Memory-Profile token from `manage.py memory_profile_token`.
+# Per-view results are served to staff at /api/v1/debug/memory/.
+MEMORY_PROFILING = config("MEMORY_PROFILING", default=False, cast=bool)
+MEMORY_PROFILE_TOKEN_MAX_AGE = config("MEMORY_PROFILE_TOKEN_MAX_AGE", default=3600, cast=int)
+
+# OpenAPI schema
+# ------------------------------------------------------------------
+# The schema at /api/v1/api/schema/ is generated once per code version
+# (`manage.py build_schema`, or on first request) into OPENAPI_SCHEMA_DIR and
+# served from there. CODE_VERSION identifies a deploy; without it a digest of
+# the source is used.
+OPENAPI_SCHEMA_DIR = config("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "openapi"))
+OPENAPI_SCHEMA_MAX_AGE = config("OPENAPI_SCHEMA_MAX_AGE", default=300, cast=int)
+CODE_VERSION = config("CODE_VERSION", default=config("RENDER_GIT_COMMIT", default=""))
+SPECTACULAR_SETTINGS = {
+    "DEFAULT_GENERATOR_CLASS": "api.openapi.SchemaGenerator",
+    "GET_LIB_DOC_EXCLUDES": "api.openapi.doc_excludes",
+}
+
+# Batch requests
+# ------------------------------------------------------------------
+# POST /api/v1/batch/ runs up to BATCH_MAX_REQUESTS API calls in one request.
+# Consecutive GETs run on up to BATCH_MAX_WORKERS threads; 1 runs them in turn.
+BATCH_MAX_REQUESTS = config("BATCH_MAX_REQUESTS", default=20, cast=int)
+BATCH_MAX_WORKERS = config("BATCH_MAX_WORKERS", default=4, cast=int)
+
+# Request coalescing
+# ------------------------------------------------------------------
+# Concurrent identical requests to the forecast, stage analytics and search
+# endpoints share one computation (see api/coalesce.py). Followers wait up to
+# COALESCE_WAIT_SECONDS for the leader, polling the cache every
+# COALESCE_POLL_SECONDS when it runs in another worker.
+COALESCE_WAIT_SECONDS = config("COALESCE_WAIT_SECONDS", default=10.0, cast=float)
+COALESCE_POLL_SECONDS = config("COALESCE_POLL_SECONDS", default=0.05, cast=float)
+
+# Query budget
+# ------------------------------------------------------------------
+# Each request may run QUERY_BUDGET_MAX_QUERIES queries, each for at most
+# QUERY_BUDGET_TIMEOUT_MS (statement_timeout on PostgreSQL, max_execution_time
+# on MySQL, a progress handler on SQLite). Requests over budget get a 503 and an
+# `api.query_budget` log line. 0 disables a limit; views override them with
+# `api.budget.query_budget`. Only DRF views are budgeted, not the admin.
+QUERY_BUDGET_MAX_QUERIES = config("QUERY_BUDGET_MAX_QUERIES", default=500, cast=int)
+QUERY_BUDGET_TIMEOUT_MS = config("QUERY_BUDGET_TIMEOUT_MS", default=5000, cast=int)
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 EMAIL_HOST_USER = "noreply@crm.com"
 
@@ -0,0 +1,216 @@
+"""
+Chunked, resumable contract uploads and range-enabled downloads.
+
+Chunks are appended to a temporary file under ``CONTRACT_UPLOAD_DIR`` straight
+from the request stream, so no chunk is ever held in memory. When the last
+byte arrives the file is hashed and stored once under a content-addressed
+name (``contracts/<ab>/<sha256>.<ext>``); identical contracts share one stored file.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.utils.text import get_valid_filename
+
+from .models import ContractUpload
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UploadError(Exception):
+    def __init__(self, status, detail, **extra):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.extra = extra
+
+
+def part_path(upload):
+    return Path(settings.CONTRACT_UPLOAD_DIR) / f"deal-{upload.deal_id}.part"
+
+
+def upload_state(upload):
+    return {
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": upload.offset,
+        "complete": upload.offset == upload.size,
+    }
+
+
+def start_upload(deal, filename, size):
+    """Begin (or restart) the upload of a ``size`` byte contract for ``deal``."""
+    if size > settings.CONTRACT_MAX_UPLOAD_SIZE:
+        raise UploadError(413, "Contract exceeds the maximum upload size.")
+    filename = os.path.basename(filename)
+    if filename:
+        try:
+            filename = get_valid_filename(filename)
+        except SuspiciousFileOperation:
+            raise UploadError(400, "Invalid filename.") from None
+    upload, _created = ContractUpload.objects.update_or_create(
+        deal=deal, defaults={"filename": filename, "size": size, "offset": 0}
+    )
+    path = part_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+    return upload
+
+
+def append_chunk(deal, offset, stream, length):
+    """Append ``length`` bytes from ``stream`` at ``offset``; finalize on the last byte.
+
+    Returns the upload state, including the ``sha256`` once the contract is stored.
+    """
+    with transaction.atomic():
+        upload = ContractUpload.objects.select_for_update().filter(deal=deal).first()
+        if upload is None:
+            raise UploadError(404, "No upload in progress; start one at offset 0.")
+        if offset != upload.offset:
+            raise UploadError(409, "Offset does not match the upload.", offset=upload.offset)
+        if upload.offset + length > upload.size:
+            raise UploadError(400, "Chunk runs past the declared size.", offset=upload.offset)
+
+        path = part_path(upload)
+        if not path.exists():
+            upload.offset = 0
+            upload.save(update_fields=["offset", "updated_at"])
+            raise UploadError(409, "Upload data was lost; restart at offset 0.", offset=0)
+
+        written = 0
+        with open(path, "r+b") as part:
+            part.seek(upload.offset)
+            while written < length and stream is not None:
+                data = stream.read(min(CHUNK_SIZE, length - written))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+            part.truncate()
+
+        upload.offset += written
+        upload.save(update_fields=["offset", "updated_at"])
+
+    state = upload_state(upload)
+    if state["complete"]:
+        state["sha256"] = finalize(deal, upload)
+    return state
+
+
+def finalize(deal, upload):
+    """Hash the assembled file and attach it to ``deal``, reusing identical contracts."""
+    path = part_path(upload)
+    digest = hashlib.sha256()
+    with open(path, "rb") as part:
+        for block in iter(lambda: part.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    name = f"contracts/{sha256[:2]}/{sha256}{Path(upload.filename).suffix.lower()}"
+    if not default_storage.exists(name):
+        with open(path, "rb") as part:
+            name = default_storage.save(name, File(part))
+
+    deal.contract.name = name
+    deal.contract_filename = upload.filename
+    deal.contract_sha256 = sha256
+    deal.contract_size = upload.size
+    deal.save(update_fields=["contract", "contract_filename", "contract_sha256", "contract_size"])
+    path.unlink(missing_ok=True)
+    upload.delete()
+    return sha256
+
+
+def download_response(deal, range_header):
+    """Serve ``deal.contract``, honouring a single-range ``Range`` header."""
+    name = deal.contract.name
+    filename = deal.contract_filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    try:
+        local_path = default_storage.path(name)
+    except NotImplementedError:
+        local_path = None
+
+    if local_path is None:
+        # Remote storage such as S3 serves Range requests itself.
+        return HttpResponseRedirect(default_storage.url(name))
+
+    sendfile = settings.CONTRACT_SENDFILE_HEADER
+    if sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile.lower() == "x-accel-redirect":
+            response[sendfile] = settings.CONTRACT_ACCEL_REDIRECT_PREFIX + name
+        else:
+            response[sendfile] = local_path
+        return _with_file_headers(response, deal, filename)
+
+    size = default_storage.size(name)
+    start, end = 0, size - 1
+    status = 200
+    # Malformed or multi-range headers are ignored and the whole file is sent.
+    if range_header and RANGE_RE.match(range_header.strip()):
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        start, end = byte_range
+        status = 206
+
+    response = StreamingHttpResponse(
+        _read_range(name, start, end), status=status, content_type=content_type
+    )
+    response["Content-Length"] = str(end - start + 1)
+    if status == 206:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return _with_file_headers(response, deal, filename)
+
+
+def parse_range(header, size):
+    """Return inclusive ``(start, end)`` for a single byte range, or None if unsatisfiable."""
+    match = RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def _read_range(name, start, end):
+    with default_storage.open(name, "rb") as contract:
+        contract.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = contract.read(min(CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _with_file_headers(response, deal, filename):
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if deal.contract_sha256:
+        response["ETag"] = f'"{deal.contract_sha256}"'
+    return response
@@ -0,0 +1,105 @@
+"""
+Weighted pipeline forecast for the deals of one owner.
+
+The forecast is a single grouped query over (stage, expected close month);
+the per-stage and per-month totals are rolled up from its rows. Results are
+cached per owner under a version key that deal writes delete.
+"""
+
+import hashlib
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import TruncMonth
+
+from api import metrics
+
+CACHE_TIMEOUT = 15 * 60
+CENTS = Decimal("0.01")
+
+# Multiplying by 0.01 rather than dividing by 100 keeps SQLite from
+# truncating the product with integer division.
+WEIGHTED_VALUE = ExpressionWrapper(
+    F("value") * F("probability") * Value(CENTS),
+    output_field=DecimalField(max_digits=16, decimal_places=4),
+)
+
+
+def _version_key(owner_id):
+    return f"deals:forecast-version:{owner_id}"
+
+
+def invalidate(owner_id):
+    """
+    Drop the owner's cached forecasts, now and again once the current transaction commits.
+
+    A forecast computed before the commit still sees the old rows; the second
+    delete keeps it from being served afterwards.
+    """
+    key = _version_key(owner_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def cached_forecast(owner_id, queryset, params):
+    """Return the forecast for ``queryset``, cached per owner and filter ``params``."""
+    version_key = _version_key(owner_id)
+    version = cache.get(version_key)
+    if version is None:
+        # Expires with the forecasts cached under it, so a missed invalidation does not last.
+        cache.add(version_key, uuid.uuid4().hex, CACHE_TIMEOUT)
+        version = cache.get(version_key)
+
+    digest = hashlib.sha256(repr(sorted(params.items())).encode()).hexdigest()[:16]
+    key = f"deals:forecast:{owner_id}:{version}:{digest}"
+    forecast = cache.get(key)
+    metrics.record_cache("forecast", forecast is not None)
+    if forecast is None:
+        forecast = compute(queryset)
+        cache.set(key, forecast, CACHE_TIMEOUT)
+    return forecast
+
+
+def compute(queryset):
+    rows = (
+        queryset.order_by()
+        .annotate(month=TruncMonth("closed_at"))
+        .values("stage", "month")
+        .annotate(deals=Count("pk"), total_value=Sum("value"), weighted_value=Sum(WEIGHTED_VALUE))
+    )
+
+    by_stage = defaultdict(_bucket)
+    by_month = defaultdict(_bucket)
+    total = _bucket()
+    for row in rows:
+        month = row["month"].date().isoformat() if row["month"] else None
+        for bucket in (by_stage[row["stage"]], by_month[month], total):
+            bucket["deals"] += row["deals"]
+            bucket["total_value"] += row["total_value"] or 0
+            bucket["weighted_value"] += row["weighted_value"] or 0
+
+    return {
+        "by_stage": [{"stage": stage, **_format(by_stage[stage])} for stage in sorted(by_stage)],
+        "by_month": [
+            {"month": month, **_format(by_month[month])}
+            # Deals without a close date sort last.
+            for month in sorted(by_month, key=lambda month: (month is None, month or ""))
+        ],
+        "total": _format(total),
+    }
+
+
+def _bucket():
+    return {"deals": 0, "total_value": Decimal(0), "weighted_value": Decimal(0)}
+
+
+def _format(bucket):
+    return {
+        "deals": bucket["deals"],
+        "total_value": str(Decimal(bucket["total_value"]).quantize(CENTS)),
+        "weighted_value": str(Decimal(bucket["weighted_value"]).quantize(CENTS)),
+    }
@@ -0,0 +1,183 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_stage_clock_at_creation(apps, schema_editor):
+    Deal = apps.get_model("deals", "Deal")
+    Deal.objects.update(stage_changed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_organization_api_key"),
+        ("deals", "0004_deal_tags"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deal",
+            name="stage_changed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(start_stage_clock_at_creation, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="DealStageRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_stage",
+                    models.CharField(
+                        choices=[
+                            ("prospecting", "Prospecting"),
+                            ("negotiation", "Negotiation"),
+                            ("closed_won", "Closed Won"),
+                            ("closed_lost", "Closed Lost"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "to_stage",
+                    models.CharField(
+                        choices=[
+                            ("prospecting", "Prospecting"),
+                            ("negotiation", "Negotiation"),
+                            ("closed_won", "Closed Won"),
+                            ("closed_lost", "Closed Lost"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("bucket", models.PositiveSmallIntegerField()),
+                ("count", models.BigIntegerField(default=0)),
+                ("total_ms", models.BigIntegerField(default=0)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deal_stage_rollups",
+                        to="accounts.organization",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deal_stage_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "owner",
+                            "organization",
+                            "from_stage",
+                            "to_stage",
+                            "bucket",
+                        ],
+                        name="deal_rollup_key_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DealStageTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_stage",
+                    models.CharField(
+                        choices=[
+                            ("prospecting", "Prospecting"),
+                            ("negotiation", "Negotiation"),
+                            ("closed_won", "Closed Won"),
+                            ("closed_lost", "Closed Lost"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "to_stage",
+                    models.CharField(
+                        choices=[
+                            ("prospecting", "Prospecting"),
+                            ("negotiation", "Negotiation"),
+                            ("closed_won", "Closed Won"),
+                            ("closed_lost", "Closed Lost"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "duration_ms",
+                    models.BigIntegerField(help_text="Time spent in from_stage"),
+                ),
+                (
+                    "transitioned_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "deal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stage_transitions",
+                        to="deals.deal",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deal_stage_transitions",
+                        to="accounts.organization",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deal_stage_transitions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["deal", "transitioned_at"],
+                        name="deal_transition_deal_idx",
+                    )
+                ],
+            },
+        ),
+    ]
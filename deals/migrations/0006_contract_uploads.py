@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("deals", "0005_deal_stage_history"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deal",
+            name="contract_filename",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="deal",
+            name="contract_sha256",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="deal",
+            name="contract_size",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ContractUpload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.BigIntegerField()),
+                ("offset", models.BigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "deal",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="contract_upload",
+                        to="deals.deal",
+                    ),
+                ),
+            ],
+        ),
+    ]
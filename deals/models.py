@@ -1,11 +1,95 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from accounts.models import Organization
 from contacts.models import Contact
 from tags.models import Tag
 
 
+class DealQuerySet(models.QuerySet):
+    """Records stage transitions for bulk stage changes as well as single saves."""
+
+    def update(self, **kwargs):
+        from . import forecast
+
+        owner_ids = set(self.values_list("owner_id", flat=True))
+        rows = self._update_recording_stages(**kwargs)
+        # After the UPDATE: a forecast read before it would re-cache the old rows.
+        for owner_id in owner_ids:
+            forecast.invalidate(owner_id)
+        return rows
+
+    def _update_recording_stages(self, **kwargs):
+        from . import stages
+
+        stage = kwargs.get("stage")
+        if stage is None or hasattr(stage, "resolve_expression"):
+            # bulk_update() passes CASE expressions here; it records its own transitions.
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            moving = list(
+                self.exclude(stage=stage).values(
+                    "pk", "owner_id", "organization_id", "stage", "stage_changed_at"
+                )
+            )
+            rows = super().update(**kwargs)
+            if moving:
+                now = timezone.now()
+                super(
+                    DealQuerySet, self.model.objects.filter(pk__in=[d["pk"] for d in moving])
+                ).update(stage_changed_at=now)
+                stages.record_transitions(
+                    stages.Transition(
+                        deal_id=deal["pk"],
+                        owner_id=deal["owner_id"],
+                        organization_id=deal["organization_id"],
+                        from_stage=deal["stage"],
+                        to_stage=stage,
+                        entered_at=deal["stage_changed_at"],
+                        left_at=now,
+                    )
+                    for deal in moving
+                )
+        return rows
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from . import stages
+
+        if "stage" not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+        objs = list(objs)
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            current = {
+                deal["pk"]: deal
+                for deal in self.model.objects.filter(pk__in=[obj.pk for obj in objs]).values(
+                    "pk", "stage", "stage_changed_at"
+                )
+            }
+            transitions = []
+            for obj in objs:
+                previous = current.get(obj.pk)
+                if previous and previous["stage"] != obj.stage:
+                    obj.stage_changed_at = now
+                    transitions.append(
+                        stages.Transition(
+                            deal_id=obj.pk,
+                            owner_id=obj.owner_id,
+                            organization_id=obj.organization_id,
+                            from_stage=previous["stage"],
+                            to_stage=obj.stage,
+                            entered_at=previous["stage_changed_at"],
+                            left_at=now,
+                        )
+                    )
+            rows = super().bulk_update(objs, {*fields, "stage_changed_at"}, *args, **kwargs)
+            stages.record_transitions(transitions)
+        return rows
+
+
 class Deal(models.Model):
     STAGE_CHOICES = (
         ("prospecting", "Prospecting"),
@@ -31,8 +115,13 @@ class Deal(models.Model):
     name = models.CharField(max_length=200)
     value = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default="prospecting")
+    stage_changed_at = models.DateTimeField(default=timezone.now)
     probability = models.IntegerField(default=0, help_text="Probability in %")
     contract = models.FileField(upload_to="contracts/", null=True, blank=True)
+    # Set by the chunked upload endpoint, which stores contracts by content hash.
+    contract_filename = models.CharField(max_length=255, blank=True)
+    contract_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    contract_size = models.BigIntegerField(null=True, blank=True)
 
     closed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -40,5 +129,93 @@ class Deal(models.Model):
     # Tags for categorization and filtering
     tags = models.ManyToManyField(Tag, blank=True, related_name="deals")
 
+    objects = DealQuerySet.as_manager()
+
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # A stage change also sets stage_changed_at (deals.signals), which a save
+        # limited to update_fields=["stage"] would otherwise leave unsaved.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "stage" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "stage_changed_at"}
+        super().save(*args, **kwargs)
+
+
+class ContractUpload(models.Model):
+    """A chunked contract upload in progress; the bytes so far live in a temp file."""
+
+    deal = models.OneToOneField(Deal, on_delete=models.CASCADE, related_name="contract_upload")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class DealStageTransition(models.Model):
+    """One stage change of a Deal, with the time it spent in ``from_stage``."""
+
+    deal = models.ForeignKey(Deal, on_delete=models.CASCADE, related_name="stage_transitions")
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="deal_stage_transitions",
+    )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="deal_stage_transitions",
+        null=True,
+        blank=True,
+    )
+    from_stage = models.CharField(max_length=20, choices=Deal.STAGE_CHOICES)
+    to_stage = models.CharField(max_length=20, choices=Deal.STAGE_CHOICES)
+    duration_ms = models.BigIntegerField(help_text="Time spent in from_stage")
+    transitioned_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deal", "transitioned_at"], name="deal_transition_deal_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.deal}: {self.from_stage} -> {self.to_stage}"
+
+
+class DealStageRollup(models.Model):
+    """
+    Histogram bucket of time spent in ``from_stage`` before moving to ``to_stage``.
+
+    Maintained incrementally by ``deals.stages.record_transitions`` so the
+    analytics endpoint never scans the transition log. Concurrent writers may
+    create duplicate rows for the same key; readers always sum them.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="deal_stage_rollups"
+    )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="deal_stage_rollups",
+        null=True,
+        blank=True,
+    )
+    from_stage = models.CharField(max_length=20, choices=Deal.STAGE_CHOICES)
+    to_stage = models.CharField(max_length=20, choices=Deal.STAGE_CHOICES)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.BigIntegerField(default=0)
+    total_ms = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "organization", "from_stage", "to_stage", "bucket"],
+                name="deal_rollup_key_idx",
+            )
+        ]
@@ -1,13 +1,24 @@
 from rest_framework import serializers
 
+from tags.serializers import TaggedModelSerializerMixin, TagPrimaryKeyRelatedField
+
 from .models import Deal
 
 
-class DealSerializer(serializers.ModelSerializer):
+class DealSerializer(TaggedModelSerializerMixin, serializers.ModelSerializer):
+    tags = TagPrimaryKeyRelatedField(many=True, required=False)
+
     class Meta:
         model = Deal
         fields = "__all__"
-        read_only_fields = ["owner", "created_at"]
+        read_only_fields = [
+            "owner",
+            "created_at",
+            "stage_changed_at",
+            "contract_filename",
+            "contract_sha256",
+            "contract_size",
+        ]
 
     def create(self, validated_data):
         validated_data["owner"] = self.context["request"].user
@@ -0,0 +1,52 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import forecast, stages
+from .models import Deal
+
+
+@receiver(pre_save, sender=Deal)
+def track_stage_change(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and "stage" not in update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values("stage", "stage_changed_at").first()
+    if previous and previous["stage"] != instance.stage:
+        now = timezone.now()
+        instance._stage_transition = stages.Transition(
+            deal_id=instance.pk,
+            owner_id=instance.owner_id,
+            organization_id=instance.organization_id,
+            from_stage=previous["stage"],
+            to_stage=instance.stage,
+            entered_at=previous["stage_changed_at"],
+            left_at=now,
+        )
+        instance.stage_changed_at = now
+
+
+@receiver(post_save, sender=Deal)
+def record_stage_change(sender, instance, **kwargs):
+    transition = instance.__dict__.pop("_stage_transition", None)
+    if transition:
+        stages.record_transitions([transition])
+
+
+@receiver(post_save, sender=Deal)
+@receiver(post_delete, sender=Deal)
+def invalidate_forecast(sender, instance, **kwargs):
+    # After the write; invalidate() repeats itself once the transaction commits.
+    forecast.invalidate(instance.owner_id)
+
+
+@receiver(m2m_changed, sender=Deal.tags.through)
+def invalidate_forecast_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        forecast.invalidate(instance.owner_id)
+        return
+    # tag.deals.add(...) and friends can touch deals of several owners.
+    deals = instance.deals.all() if pk_set is None else Deal.objects.filter(pk__in=pk_set)
+    for owner_id in set(deals.values_list("owner_id", flat=True)):
+        forecast.invalidate(owner_id)
@@ -0,0 +1,138 @@
+"""
+Deal stage history and time-in-stage analytics.
+
+Every stage change appends a DealStageTransition and bumps one
+DealStageRollup histogram bucket. Durations are bucketed on a log scale
+(four buckets per doubling), so the median and p90 reported from the
+rollups are within about 10% of the exact value while reading only a few
+hundred rows, however long the transition log grows.
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from django.db.models import F, Sum
+
+from .models import Deal, DealStageRollup, DealStageTransition
+
+BUCKETS_PER_DOUBLING = 4
+
+
+class Transition(NamedTuple):
+    deal_id: int
+    owner_id: int
+    organization_id: int
+    from_stage: str
+    to_stage: str
+    entered_at: object
+    left_at: object
+
+    @property
+    def duration_ms(self):
+        return max(int((self.left_at - self.entered_at).total_seconds() * 1000), 0)
+
+
+def bucket_for(duration_ms):
+    return int(math.log2(max(duration_ms, 1)) * BUCKETS_PER_DOUBLING)
+
+
+def bucket_value(bucket):
+    """Representative duration of a bucket: the geometric middle of its range."""
+    return int(2 ** ((bucket + 0.5) / BUCKETS_PER_DOUBLING))
+
+
+def record_transitions(transitions):
+    """Append ``transitions`` to the log and fold them into the rollups."""
+    transitions = list(transitions)
+    if not transitions:
+        return
+
+    DealStageTransition.objects.bulk_create(
+        [
+            DealStageTransition(
+                deal_id=t.deal_id,
+                owner_id=t.owner_id,
+                organization_id=t.organization_id,
+                from_stage=t.from_stage,
+                to_stage=t.to_stage,
+                duration_ms=t.duration_ms,
+                transitioned_at=t.left_at,
+            )
+            for t in transitions
+        ]
+    )
+
+    counts = Counter()
+    totals = Counter()
+    for t in transitions:
+        key = (t.owner_id, t.organization_id, t.from_stage, t.to_stage, bucket_for(t.duration_ms))
+        counts[key] += 1
+        totals[key] += t.duration_ms
+
+    for key, count in counts.items():
+        owner_id, organization_id, from_stage, to_stage, bucket = key
+        lookup = {
+            "owner_id": owner_id,
+            "organization_id": organization_id,
+            "from_stage": from_stage,
+            "to_stage": to_stage,
+            "bucket": bucket,
+        }
+        updated = DealStageRollup.objects.filter(**lookup).update(
+            count=F("count") + count, total_ms=F("total_ms") + totals[key]
+        )
+        if not updated:
+            DealStageRollup.objects.create(count=count, total_ms=totals[key], **lookup)
+
+
+def analytics(rollups, group_by):
+    """Median/p90 time in stage and conversion rates per ``group_by`` value."""
+    rows = (
+        rollups.order_by()
+        .values(group_by, "from_stage", "to_stage", "bucket")
+        .annotate(n=Sum("count"), ms=Sum("total_ms"))
+    )
+
+    histograms = defaultdict(Counter)
+    exits = defaultdict(Counter)
+    total_ms = Counter()
+    for row in rows:
+        key = (row[group_by], row["from_stage"])
+        histograms[key][row["bucket"]] += row["n"]
+        exits[key][row["to_stage"]] += row["n"]
+        total_ms[key] += row["ms"]
+
+    stage_order = [stage for stage, _label in Deal.STAGE_CHOICES]
+    results = defaultdict(list)
+    for (group, stage), histogram in histograms.items():
+        count = sum(histogram.values())
+        results[group].append(
+            {
+                "stage": stage,
+                "transitions": count,
+                "mean_ms": total_ms[(group, stage)] // count,
+                "median_ms": _percentile(histogram, count, 0.5),
+                "p90_ms": _percentile(histogram, count, 0.9),
+                "conversion": {
+                    to_stage: round(n / count, 4)
+                    for to_stage, n in sorted(exits[(group, stage)].items())
+                },
+            }
+        )
+
+    return [
+        {group_by: group, "stages": sorted(stages, key=lambda s: stage_order.index(s["stage"]))}
+        # Deals without an organization sort last.
+        for group, stages in sorted(results.items(), key=lambda item: (item[0] is None, item[0]))
+    ]
+
+
+def _percentile(histogram, count, fraction):
+    rank = max(math.ceil(count * fraction), 1)
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket_value(bucket)
+    return 0
@@ -1,15 +1,120 @@
-from rest_framework import permissions, viewsets
+from django.db.models import Q
+from django.http import Http404
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .models import Deal
+from api.coalesce import CoalesceSearchMixin, coalesced
+from api.expand import ExpandMixin
+from api.fast_list import ValuesListMixin
+from api.timing import GenericServerTimingMixin
+from tags.filters import TagFilterBackend
+
+from . import contracts, stages
+from .forecast import cached_forecast
+from .models import Deal, DealStageRollup
 from .serializers import DealSerializer
 
 
-class DealViewSet(viewsets.ModelViewSet):
+class DealViewSet(
+    GenericServerTimingMixin,
+    CoalesceSearchMixin,
+    ExpandMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = DealSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TagFilterBackend]
     filterset_fields = ["stage", "organization"]
     search_fields = ["name", "value", "stage"]
     ordering_fields = ["created_at", "value", "stage"]
+    expandable_fields = {
+        "contact": "contacts.views.ContactViewSet",
+        "organization": "accounts.views.OrganizationViewSet",
+        "owner": "accounts.views.UserDetailView",
+        "tags": "tags.views.TagViewSet",
+    }
 
     def get_queryset(self):
         return Deal.objects.filter(owner=self.request.user)
+
+    @action(detail=False, methods=["GET"], filter_backends=[])
+    @coalesced
+    def forecast(self, request):
+        """Weighted pipeline (value * probability / 100) by stage and expected close month."""
+        queryset = self.get_queryset()
+        params = {}
+
+        organization = request.query_params.get("organization")
+        if organization:
+            if not (organization.isascii() and organization.isdecimal()):
+                raise ValidationError({"organization": "A valid integer is required."})
+            params["organization"] = organization
+            queryset = queryset.filter(organization_id=organization)
+
+        if request.query_params.get("tags"):
+            params["tags"] = request.query_params["tags"]
+            params["tags_mode"] = request.query_params.get("tags_mode", "any")
+            queryset = TagFilterBackend().filter_queryset(request, queryset, self)
+
+        return Response(cached_forecast(request.user.pk, queryset, params))
+
+    @action(detail=False, methods=["GET"], url_path="stage-analytics", filter_backends=[])
+    @coalesced
+    def stage_analytics(self, request):
+        """Median/p90 time in stage (ms) and conversion rates per owner or organization."""
+        group_by = request.query_params.get("group_by", "owner")
+        if group_by not in ("owner", "organization"):
+            raise ValidationError({"group_by": "Must be 'owner' or 'organization'."})
+
+        rollups = DealStageRollup.objects.filter(
+            Q(owner=request.user) | Q(organization__owner=request.user)
+        )
+        return Response({"group_by": group_by, "results": stages.analytics(rollups, group_by)})
+
+    @action(detail=True, methods=["GET"], url_path="contract")
+    def contract(self, request, pk=None):
+        """Download the contract; supports single byte ranges and X-Sendfile/X-Accel-Redirect."""
+        deal = self.get_object()
+        if not deal.contract:
+            raise Http404("This deal has no contract.")
+        return contracts.download_response(deal, request.headers.get("Range"))
+
+    @action(detail=True, methods=["GET", "POST"], url_path="contract/upload")
+    def contract_upload(self, request, pk=None):
+        """
+        Resumable chunked upload. POST raw bytes with ``?offset=N``; the first chunk
+        also carries ``size`` and ``filename``. GET reports the offset to resume from.
+        """
+        deal = self.get_object()
+        if request.method == "GET":
+            upload = getattr(deal, "contract_upload", None)
+            if upload is None:
+                raise Http404("No upload in progress.")
+            return Response(contracts.upload_state(upload))
+
+        try:
+            offset = int(request.query_params.get("offset", ""))
+            size = int(request.query_params.get("size", "")) if offset == 0 else None
+        except ValueError:
+            raise ValidationError({"offset": "offset (and size on the first chunk) are required."})
+        try:
+            length = int(request.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"Content-Length": "Must be the chunk size in bytes."})
+
+        try:
+            if offset == 0:
+                contracts.start_upload(deal, request.query_params.get("filename", ""), size)
+            state = contracts.append_chunk(deal, offset, request.stream, length)
+        except contracts.UploadError as error:
+            return Response({"detail": error.detail, **error.extra}, status=error.status)
+
+        return Response(
+            state, status=status.HTTP_201_CREATED if state["complete"] else status.HTTP_200_OK
+        )
@@ -0,0 +1,50 @@
+# Loaded automatically by gunicorn from the working directory; sizing lives in
+# api/serving.py so `manage.py serve --dry-run` can show it.
+import os
+from pathlib import Path
+
+from api import serving
+
+_plan = serving.plan()
+
+wsgi_app = _plan.app
+bind = _plan.bind
+worker_class = _plan.worker_class
+workers = _plan.workers
+threads = _plan.threads
+max_requests = _plan.max_requests
+max_requests_jitter = _plan.max_requests // 10
+preload_app = os.environ.get("SERVER_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Heartbeat files on tmpfs: a disk-backed /tmp can stall workers in containers.
+if Path("/dev/shm").is_dir():
+    worker_tmp_dir = "/dev/shm"
+
+
+def on_starting(server):
+    # Samples left by a previous run would otherwise be merged into this one.
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        for stale in Path(directory).glob("*.db"):
+            stale.unlink()
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before any fork.
+    if server.cfg.preload_app:
+        serving.warm_up()
+
+
+def post_worker_init(worker):
+    if _plan.max_memory_mb:
+        serving.watch_memory(worker.log, _plan.max_memory_mb)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,57 @@
+from activities import counters
+from activities.archive import copy_activities
+from activities.models import Activity
+from api.archive import move_in_chunks
+
+from .models import ArchivedLead, Lead
+
+
+def copy_leads(leads):
+    ids = [lead.id for lead in leads]
+    ArchivedLead.objects.bulk_create(
+        [
+            ArchivedLead(
+                id=lead.id,
+                owner_id=lead.owner_id,
+                organization_id=lead.organization_id,
+                first_name=lead.first_name,
+                last_name=lead.last_name,
+                email=lead.email,
+                phone=lead.phone,
+                status=lead.status,
+                source=lead.source,
+                created_at=lead.created_at,
+                updated_at=lead.updated_at,
+                last_activity_at=lead.last_activity_at,
+                activity_count=lead.activity_count,
+                call_count=lead.call_count,
+                email_count=lead.email_count,
+                meeting_count=lead.meeting_count,
+                note_count=lead.note_count,
+            )
+            for lead in leads
+        ],
+        ignore_conflicts=True,
+    )
+    ArchivedLead.tags.through.objects.bulk_create(
+        [
+            ArchivedLead.tags.through(archivedlead_id=lead_id, tag_id=tag_id)
+            for lead_id, tag_id in Lead.tags.through.objects.filter(lead_id__in=ids).values_list(
+                "lead_id", "tag_id"
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    # Deleting a lead cascades to its activities, so they go to cold storage with it.
+    copy_activities(Activity.objects.filter(lead_id__in=ids))
+
+
+def archive_lost_leads(cutoff, batch_size, dry_run=False):
+    """Move leads that have been ``lost`` since before ``cutoff`` into ``ArchivedLead``."""
+    with counters.suspended():
+        return move_in_chunks(
+            Lead.objects.filter(status="lost", updated_at__lt=cutoff),
+            copy_leads,
+            batch_size,
+            dry_run,
+        )
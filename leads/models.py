@@ -40,5 +40,64 @@ class Lead(models.Model):
     # Tags for categorization and filtering
     tags = models.ManyToManyField(Tag, blank=True, related_name="leads")
 
+    # Denormalized from Activity and kept current by activities.counters
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    activity_count = models.PositiveIntegerField(default=0)
+    call_count = models.PositiveIntegerField(default=0)
+    email_count = models.PositiveIntegerField(default=0)
+    meeting_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "last_activity_at"], name="lead_owner_last_act_idx"),
+            models.Index(fields=["owner", "activity_count"], name="lead_owner_act_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name}"
+
+
+class ArchivedLead(models.Model):
+    """Cold-storage copy of a lost Lead, moved here by ``archive_records``.
+
+    Primary keys are preserved so archived rows keep the ids clients already
+    know.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_leads"
+    )
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="archived_leads",
+        null=True,
+        blank=True,
+    )
+
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20, blank=True)
+
+    status = models.CharField(max_length=20, choices=Lead.STATUS_CHOICES, default="lost")
+    source = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    tags = models.ManyToManyField(Tag, blank=True, related_name="archived_leads")
+
+    # Denormalized from Activity and kept current by activities.counters
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    activity_count = models.PositiveIntegerField(default=0)
+    call_count = models.PositiveIntegerField(default=0)
+    email_count = models.PositiveIntegerField(default=0)
+    meeting_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -1,13 +1,27 @@
 from rest_framework import serializers
 
-from .models import Lead
+from tags.serializers import TaggedModelSerializerMixin, TagPrimaryKeyRelatedField
 
+from .models import ArchivedLead, Lead
+
+
+class LeadSerializer(TaggedModelSerializerMixin, serializers.ModelSerializer):
+    tags = TagPrimaryKeyRelatedField(many=True, required=False)
 
-class LeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
         fields = "__all__"
-        read_only_fields = ["owner", "created_at", "updated_at"]
+        read_only_fields = [
+            "owner",
+            "created_at",
+            "updated_at",
+            "last_activity_at",
+            "activity_count",
+            "call_count",
+            "email_count",
+            "meeting_count",
+            "note_count",
+        ]
 
     def create(self, validated_data):
         validated_data["owner"] = self.context["request"].user
@@ -20,3 +34,9 @@ class LeadSerializer(serializers.ModelSerializer):
                 "request"
             ].user.owned_organizations.first()
         return super().create(validated_data)
+
+
+class ArchivedLeadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedLead
+        fields = "__all__"
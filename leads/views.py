@@ -5,19 +5,50 @@ from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .models import Lead
-from .serializers import LeadSerializer
+from api import metrics
+from api.archive import IncludeArchivedMixin
+from api.budget import query_budget
+from api.coalesce import CoalesceSearchMixin
+from api.expand import ExpandMixin
+from api.fast_list import ValuesListMixin
+from api.timing import GenericServerTimingMixin
+from tags.filters import TagFilterBackend
 
+from .models import ArchivedLead, Lead
+from .serializers import ArchivedLeadSerializer, LeadSerializer
 
-class LeadViewSet(viewsets.ModelViewSet):
+
+class LeadViewSet(
+    GenericServerTimingMixin,
+    CoalesceSearchMixin,
+    ExpandMixin,
+    IncludeArchivedMixin,
+    ValuesListMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = LeadSerializer
+    archive_serializer_class = ArchivedLeadSerializer
+    archive_ordering = ["-created_at"]
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ["status", "organization"]
+    filter_backends = [*api_settings.DEFAULT_FILTER_BACKENDS, TagFilterBackend]
+    filterset_fields = {
+        "status": ["exact"],
+        "organization": ["exact"],
+        "last_activity_at": ["isnull", "lt", "gte"],
+        "activity_count": ["exact", "lt", "gte"],
+    }
     search_fields = ["first_name", "last_name", "email", "status"]
-    ordering_fields = ["created_at", "status"]
+    ordering_fields = ["created_at", "status", "last_activity_at", "activity_count"]
+    expandable_fields = {
+        "organization": "accounts.views.OrganizationViewSet",
+        "owner": "accounts.views.UserDetailView",
+        "tags": "tags.views.TagViewSet",
+    }
 
     @action(detail=False, methods=["POST"], parser_classes=[MultiPartParser, FormParser])
+    @query_budget(max_queries=0)  # One insert per row.
     def upload_csv(self, request):
         file_obj = request.FILES["file"]
         decoded_file = file_obj.read().decode("utf-8")
@@ -26,17 +57,22 @@ class LeadViewSet(viewsets.ModelViewSet):
 
         leads_created = 0
 
-        for row in reader:
-            Lead.objects.create(
-                owner=request.user,
-                first_name=row.get("first_name", ""),
-                last_name=row.get("last_name", ""),
-                email=row.get("email", ""),
-                status="new",
-            )
-            leads_created += 1
+        with metrics.import_job("leads_csv") as job:
+            for row in reader:
+                Lead.objects.create(
+                    owner=request.user,
+                    first_name=row.get("first_name", ""),
+                    last_name=row.get("last_name", ""),
+                    email=row.get("email", ""),
+                    status="new",
+                )
+                leads_created += 1
+            job.rows = leads_created
 
         return Response({"status": f"Created {leads_created} leads"})
 
     def get_queryset(self):
         return Lead.objects.filter(owner=self.request.user)
+
+    def get_archive_queryset(self):
+        return ArchivedLead.objects.filter(owner=self.request.user)
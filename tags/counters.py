@@ -0,0 +1,71 @@
+"""
+Maintenance of the per-tag usage counters.
+
+``lead_count``, ``contact_count`` and ``deal_count`` follow the lead, contact
+and deal tag through tables. Adds and removes, from either side of the
+relation and in bulk, move them with ``UPDATE ... SET x = x + n``; deleting a
+tagged row uncounts its tags before the cascade drops the through rows.
+
+Counter moves do not invalidate the tag registry, which would reload it on
+every tagging: the registry refreshes its copy on a timer, and ordering by a
+counter reads the table.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from contacts.models import Contact
+from deals.models import Deal
+from leads.models import Lead
+
+from .models import Tag
+from .registry import registry
+
+# (tagged model, Tag counter field)
+COUNTERS = (
+    (Lead, "lead_count"),
+    (Contact, "contact_count"),
+    (Deal, "deal_count"),
+)
+
+
+def adjust(field, deltas):
+    """Apply ``{tag_id: delta}`` to ``field``, one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for tag_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(tag_id)
+    for delta, tag_ids in by_delta.items():
+        Tag.objects.filter(pk__in=tag_ids).update(**{field: F(field) + delta})
+
+
+def linked(model, object_ids=None, tag_ids=None):
+    """``{tag_id: through rows}`` for ``model``, optionally limited to some objects or tags."""
+    field = model._meta.get_field("tags")
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    rows = field.remote_field.through.objects.order_by()
+    if object_ids is not None:
+        rows = rows.filter(**{f"{source}__in": object_ids})
+    if tag_ids is not None:
+        rows = rows.filter(**{f"{target}__in": tag_ids})
+    return dict(rows.values_list(target).annotate(rows=Count("pk")))
+
+
+def rebuild():
+    """Recompute every counter in one UPDATE with a grouped subquery per through table."""
+    counts = {}
+    for model, field in COUNTERS:
+        m2m = model._meta.get_field("tags")
+        target = m2m.m2m_reverse_field_name()
+        rows = (
+            m2m.remote_field.through.objects.filter(**{target: OuterRef("pk")})
+            .order_by()
+            .values(target)
+            .annotate(rows=Count("pk"))
+            .values("rows")
+        )
+        counts[field] = Coalesce(Subquery(rows), 0)
+    Tag.objects.update(**counts)
+    registry.invalidate()
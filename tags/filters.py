@@ -0,0 +1,87 @@
+from django.db.models import Count, Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .registry import registry
+
+TAG_MODES = ("any", "all", "none")
+
+
+def resolve_tag_ids(values):
+    """Map tag names or ids to ids through the registry; unknown tags map to None."""
+    ids = []
+    for value in values:
+        if value.isascii() and value.isdecimal():
+            tag = registry.get(int(value))
+        else:
+            tag = registry.get_by_name(value)
+            if tag is None and value.isdigit():
+                # Digits int() rejects, such as "²": neither an id nor a tag name.
+                raise ValidationError({"tags": f"{value!r} is not a valid tag id or name."})
+        ids.append(tag.pk if tag else None)
+    return ids
+
+
+def filter_by_tags(queryset, tag_ids, mode="any"):
+    """
+    Filter ``queryset`` by its ``tags`` relation without joining it into the outer query.
+
+    ``any`` and ``none`` compile to a correlated ``EXISTS`` on the through table,
+    ``all`` to ``pk IN (... GROUP BY <model>_id HAVING COUNT(*) = n)``, so rows are
+    never duplicated and no ``DISTINCT`` is needed.
+    """
+    known = sorted({pk for pk in tag_ids if pk is not None})
+    if mode == "all" and len(known) < len(set(tag_ids)):
+        return queryset.none()
+    if not known:
+        return queryset if mode == "none" else queryset.none()
+
+    field = queryset.model._meta.get_field("tags")
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(**{f"{target}__in": known})
+
+    if mode == "all":
+        matching = (
+            links.order_by()
+            .values(source)
+            .annotate(matched=Count(target))
+            .filter(matched=len(known))
+            .values(source)
+        )
+        return queryset.filter(pk__in=matching)
+
+    tagged = Exists(links.filter(**{source: OuterRef("pk")}))
+    return queryset.filter(~tagged if mode == "none" else tagged)
+
+
+class TagFilterBackend(BaseFilterBackend):
+    """``?tags=hot-lead,enterprise&tags_mode=any|all|none``; tags by name or id."""
+
+    def filter_queryset(self, request, queryset, view):
+        values = [value.strip() for value in request.query_params.get("tags", "").split(",")]
+        values = [value for value in values if value]
+        if not values:
+            return queryset
+        mode = request.query_params.get("tags_mode", "any")
+        if mode not in TAG_MODES:
+            raise ValidationError({"tags_mode": f"Must be one of: {', '.join(TAG_MODES)}."})
+        return filter_by_tags(queryset, resolve_tag_ids(values), mode)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "tags",
+                "required": False,
+                "in": "query",
+                "description": "Comma-separated tag names or ids",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": "tags_mode",
+                "required": False,
+                "in": "query",
+                "description": "Match any (default), all or none of the tags",
+                "schema": {"type": "string", "enum": list(TAG_MODES)},
+            },
+        ]
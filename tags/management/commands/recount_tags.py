@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tags.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute lead, contact and deal counts on tags from the tag through tables"
+
+    def handle(self, *_args, **_kwargs):
+        rebuild()
+        self.stdout.write(self.style.SUCCESS("Recounted tag usage"))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# (app label, model, Tag counter field)
+COUNTERS = (
+    ("leads", "Lead", "lead_count"),
+    ("contacts", "Contact", "contact_count"),
+    ("deals", "Deal", "deal_count"),
+)
+
+
+def count_tag_usage(apps, schema_editor):
+    Tag = apps.get_model("tags", "Tag")
+    for app_label, model_name, field in COUNTERS:
+        through = apps.get_model(app_label, model_name)._meta.get_field("tags").remote_field.through
+        rows = through.objects.order_by().values_list("tag").annotate(rows=Count("pk"))
+        for tag_id, count in rows:
+            Tag.objects.filter(pk=tag_id).update(**{field: count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0003_contact_tags"),
+        ("deals", "0004_deal_tags"),
+        ("leads", "0002_lead_tags"),
+        ("tags", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="contact_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="deal_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="lead_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_tag_usage, migrations.RunPython.noop),
+    ]
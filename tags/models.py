@@ -5,5 +5,10 @@ class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     color = models.CharField(max_length=7, default="#CCCCCC")
 
+    # Maintained by tags.counters; rebuild with ``manage.py recount_tags``.
+    lead_count = models.PositiveIntegerField(default=0)
+    contact_count = models.PositiveIntegerField(default=0)
+    deal_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.name
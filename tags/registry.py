@@ -0,0 +1,71 @@
+"""
+Process-wide registry of the global Tag table.
+
+All tags are loaded once per process and served from memory. A version token
+in the shared cache is dropped whenever a tag changes; each process compares
+it with the version it loaded and reloads on mismatch, so in the steady state
+resolving a tag costs a cache lookup and no database query. The usage
+counters are not versioned: they are refreshed by reloading at least every
+``TAG_REGISTRY_MAX_AGE`` seconds.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from api import metrics
+
+from .models import Tag
+
+VERSION_KEY = "tags:registry-version"
+
+
+class TagRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        self._by_id = {}
+        self._by_name = {}
+
+    def all(self):
+        return list(self._tags().values())
+
+    def get(self, pk):
+        return self._tags().get(pk)
+
+    def get_by_name(self, name):
+        self._tags()
+        return self._by_name.get(name)
+
+    def invalidate(self):
+        """Make every process reload, now and again once the current transaction commits."""
+        cache.delete(VERSION_KEY)
+        transaction.on_commit(lambda: cache.delete(VERSION_KEY))
+
+    def _tags(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        fresh = version == self._version and not self._expired()
+        metrics.record_cache("tag_registry", fresh)
+        if not fresh:
+            with self._lock:
+                if version != self._version or self._expired():
+                    tags = list(Tag.objects.order_by("pk"))
+                    self._by_id = {tag.pk: tag for tag in tags}
+                    self._by_name = {tag.name: tag for tag in tags}
+                    self._version = version
+                    self._loaded_at = time.monotonic()
+        return self._by_id
+
+    def _expired(self):
+        return time.monotonic() - self._loaded_at >= settings.TAG_REGISTRY_MAX_AGE
+
+
+registry = TagRegistry()
@@ -1,9 +1,84 @@
 from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
 
 from .models import Tag
+from .registry import registry
 
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = "__all__"
+        read_only_fields = ["lead_count", "contact_count", "deal_count"]
+
+
+def tag_ids(instance, field_name="tags"):
+    """Tag ids of ``instance`` read from the through table, without joining the tag table."""
+    field = instance._meta.get_field(field_name)
+    return list(
+        field.remote_field.through.objects.filter(
+            **{field.m2m_field_name(): instance.pk}
+        ).values_list(field.m2m_reverse_field_name(), flat=True)
+    )
+
+
+class TagIdsField(ManyRelatedField):
+    def get_attribute(self, instance):
+        if instance.pk is None:
+            return []
+        prefetched = getattr(instance, "_prefetched_objects_cache", {}).get(self.source)
+        if prefetched is not None:
+            return [tag.pk for tag in prefetched]
+        return tag_ids(instance, self.source)
+
+    def to_representation(self, ids):
+        return sorted(ids)
+
+
+class TagPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Validates tag ids against the in-process tag registry instead of the database."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", Tag.objects.all())
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        return TagIdsField(
+            child_relation=cls(), required=kwargs.get("required", False), allow_empty=True
+        )
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        tag = registry.get(pk)
+        if tag is None:
+            self.fail("does_not_exist", pk_value=data)
+        return tag
+
+
+class TaggedModelSerializerMixin:
+    """Writes ``tags`` with through-table queries only; ids were already checked by the registry."""
+
+    def create(self, validated_data):
+        tags = validated_data.pop("tags", None)
+        instance = super().create(validated_data)
+        if tags:
+            instance.tags.add(*tags)
+        return instance
+
+    def update(self, instance, validated_data):
+        tags = validated_data.pop("tags", None)
+        instance = super().update(instance, validated_data)
+        if tags is not None:
+            current = set(tag_ids(instance))
+            wanted = {tag.pk for tag in tags}
+            if current - wanted:
+                instance.tags.remove(*(current - wanted))
+            if wanted - current:
+                instance.tags.add(*(wanted - current))
+        return instance
@@ -0,0 +1,43 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .counters import COUNTERS, adjust, linked
+from .models import Tag
+from .registry import registry
+
+COUNTER_FIELDS = {model: field for model, field in COUNTERS}
+THROUGH_MODELS = {model.tags.through: model for model, _field in COUNTERS}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    registry.invalidate()
+
+
+def count_tag_changes(sender, instance, action, reverse, pk_set, **kwargs):
+    model = THROUGH_MODELS[sender]
+    field = COUNTER_FIELDS[model]
+    if action == "post_add":
+        # pk_set only holds the links that were actually created.
+        adjust(field, {instance.pk: len(pk_set)} if reverse else dict.fromkeys(pk_set, 1))
+    elif action in ("pre_remove", "pre_clear"):
+        # pk_set may name links that do not exist, so count the rows about to go.
+        if reverse:
+            removed = linked(model, object_ids=pk_set, tag_ids=[instance.pk])
+        else:
+            removed = linked(model, object_ids=[instance.pk], tag_ids=pk_set)
+        instance._uncounted_tags = removed
+    elif action in ("post_remove", "post_clear"):
+        removed = instance.__dict__.pop("_uncounted_tags", {})
+        adjust(field, {tag_id: -rows for tag_id, rows in removed.items()})
+
+
+def uncount_deleted_tags(sender, instance, **kwargs):
+    removed = linked(sender, object_ids=[instance.pk])
+    adjust(COUNTER_FIELDS[sender], {tag_id: -rows for tag_id, rows in removed.items()})
+
+
+for _model, _field in COUNTERS:
+    m2m_changed.connect(count_tag_changes, sender=_model.tags.through)
+    pre_delete.connect(uncount_deleted_tags, sender=_model)
@@ -1,10 +1,40 @@
+from operator import attrgetter
+
 from rest_framework import permissions, viewsets
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+
+from api.timing import GenericServerTimingMixin
 
+from .counters import COUNTERS
 from .models import Tag
+from .registry import registry
 from .serializers import TagSerializer
 
+COUNTER_FIELDS = {field for _model, field in COUNTERS}
+
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(GenericServerTimingMixin, viewsets.ModelViewSet):
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Tag.objects.all()
+    ordering_fields = ["id", "name", "lead_count", "contact_count", "deal_count"]
+
+    def list(self, request, *args, **kwargs):
+        ordering = OrderingFilter().get_ordering(request, self.queryset, self) or []
+        if any(key.lstrip("-") in COUNTER_FIELDS for key in ordering):
+            # The registry's counters may be behind: rank popularity by the table.
+            return super().list(request, *args, **kwargs)
+        # Served from the in-process registry: no queries in the steady state.
+        tags = registry.all()
+        # Stable sorts applied from the last key to the first give a multi-key ordering.
+        for key in reversed(ordering):
+            tags.sort(key=attrgetter(key.lstrip("-")), reverse=key.startswith("-"))
+        page = self.paginate_queryset(tags)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(tags, many=True).data)
+
+    def get_expansion_objects(self, ids):
+        # Expanded tags come from the registry too, see api.expand.
+        return [tag for tag in map(registry.get, sorted(ids)) if tag is not None]
@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+
+from api import schema
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keep cached results from leaking between tests that reuse row ids"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def openapi_schema_dir(settings, tmp_path):
+    """Build the OpenAPI schema in a temporary directory rather than the checkout"""
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path / "openapi")
+    schema.reset()
+    yield settings.OPENAPI_SCHEMA_DIR
+    schema.reset()
@@ -3,12 +3,21 @@ API tests for CRM application.
 Tests CRUD operations, authentication, permissions, and filtering.
 """
 
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from deals import forecast
+from deals.models import Deal
 from tests.factories import (
+    ActivityFactory,
     ContactFactory,
     DealFactory,
     LeadFactory,
@@ -139,6 +148,59 @@ class TestLeadAPI:
         assert response.status_code == status.HTTP_201_CREATED
         assert len(response.data["tags"]) == 2
 
+    def test_update_lead_tags(self, authenticated_client, authenticated_user):
+        """Test replacing a lead's tags"""
+        keep, drop, add = TagFactory.create_batch(3)
+        lead = LeadFactory(owner=authenticated_user, tags=[keep, drop])
+        url = reverse("lead-detail", args=[lead.id])
+        response = authenticated_client.patch(url, {"tags": [keep.id, add.id]}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["tags"] == sorted([keep.id, add.id])
+        assert set(lead.tags.values_list("id", flat=True)) == {keep.id, add.id}
+
+    def test_filter_leads_by_tags(self, authenticated_client, authenticated_user):
+        """Test tags_mode any/all/none on lead tag names and ids"""
+        hot, enterprise = TagFactory(name="hot-lead"), TagFactory(name="enterprise")
+        both = LeadFactory(owner=authenticated_user, tags=[hot, enterprise])
+        only_hot = LeadFactory(owner=authenticated_user, tags=[hot])
+        untagged = LeadFactory(owner=authenticated_user)
+        url = reverse("lead-list")
+
+        def ids(**params):
+            response = authenticated_client.get(url, {"tags": "hot-lead,enterprise", **params})
+            return {lead["id"] for lead in response.data["results"]}
+
+        assert ids() == {both.id, only_hot.id}
+        assert ids(tags_mode="all") == {both.id}
+        assert ids(tags_mode="none") == {untagged.id}
+        response = authenticated_client.get(url, {"tags": f"{hot.id},missing", "tags_mode": "all"})
+        assert response.data["count"] == 0
+
+    def test_filter_leads_by_tags_without_duplicates(
+        self, authenticated_client, authenticated_user
+    ):
+        """Test a lead matching several tags is listed once, without DISTINCT"""
+        tags = TagFactory.create_batch(3)
+        LeadFactory(owner=authenticated_user, tags=tags)
+        names = ",".join(tag.name for tag in tags)
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse("lead-list"), {"tags": names})
+        assert response.data["count"] == 1
+        assert len(response.data["results"]) == 1
+        assert not [q for q in queries if "DISTINCT" in q["sql"]]
+
+    def test_invalid_tags_mode(self, authenticated_client):
+        """Test tags_mode only accepts any, all or none"""
+        response = authenticated_client.get(reverse("lead-list"), {"tags": "x", "tags_mode": "y"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize("url", ["lead-list", "contact-list", "deal-list"])
+    def test_non_ascii_digit_tags(self, authenticated_client, url):
+        """Test digits int() rejects, such as superscripts, are a 400 rather than a 500"""
+        response = authenticated_client.get(reverse(url), {"tags": "²"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "tags" in response.data
+
 
 # ============================================================================
 # CONTACT API TESTS
@@ -193,6 +255,20 @@ class TestContactAPI:
         response = authenticated_client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
+    def test_filter_and_order_by_activity(self, authenticated_client, authenticated_user):
+        """Test contacts can be filtered and ordered by their activity counters"""
+        idle = ContactFactory(owner=authenticated_user)
+        busy = ContactFactory(owner=authenticated_user)
+        ActivityFactory.create_batch(2, user=authenticated_user, contact=busy, lead=None)
+        url = reverse("contact-list")
+
+        response = authenticated_client.get(url, {"last_activity_at__isnull": "true"})
+        assert [item["id"] for item in response.data["results"]] == [idle.id]
+
+        response = authenticated_client.get(url, {"ordering": "-activity_count"})
+        assert [item["id"] for item in response.data["results"]] == [busy.id, idle.id]
+        assert response.data["results"][0]["activity_count"] == 2
+
 
 # ============================================================================
 # DEAL API TESTS
@@ -249,6 +325,97 @@ class TestDealAPI:
         response = authenticated_client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
+    def test_forecast_groups_by_stage_and_month(self, authenticated_client, authenticated_user):
+        """Test the forecast weights deal values by probability"""
+        closing = datetime(2026, 3, 15, tzinfo=dt_timezone.utc)
+        DealFactory(owner=authenticated_user, value="1000.00", probability=50, closed_at=closing)
+        DealFactory(owner=authenticated_user, value="99.00", probability=33, stage="negotiation")
+        DealFactory(value="5000.00", probability=100)  # another owner's deal
+
+        response = authenticated_client.get(reverse("deal-forecast"))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total"] == {
+            "deals": 2,
+            "total_value": "1099.00",
+            "weighted_value": "532.67",
+        }
+        assert [row["stage"] for row in response.data["by_stage"]] == [
+            "negotiation",
+            "prospecting",
+        ]
+        assert [row["month"] for row in response.data["by_month"]] == ["2026-03-01", None]
+
+    def test_forecast_is_invalidated_by_deal_writes(self, authenticated_client, authenticated_user):
+        """Test a cached forecast is recomputed after a deal changes"""
+        deal = DealFactory(owner=authenticated_user, value="100.00", probability=10)
+        url = reverse("deal-forecast")
+        assert authenticated_client.get(url).data["total"]["weighted_value"] == "10.00"
+
+        deal.probability = 90
+        deal.save()
+        assert authenticated_client.get(url).data["total"]["weighted_value"] == "90.00"
+
+    def test_forecast_is_invalidated_on_commit(
+        self, authenticated_client, authenticated_user, django_capture_on_commit_callbacks
+    ):
+        """Test a forecast cached while a deal update is uncommitted is dropped on commit"""
+        DealFactory(owner=authenticated_user, value="100.00", probability=10)
+        url = reverse("deal-forecast")
+        version_key = forecast._version_key(authenticated_user.id)
+        with django_capture_on_commit_callbacks() as callbacks:
+            Deal.objects.filter(owner=authenticated_user).update(probability=90)
+            # A read between the UPDATE and the commit caches the forecast again.
+            authenticated_client.get(url)
+        assert cache.get(version_key) is not None
+
+        for callback in callbacks:
+            callback()
+        assert cache.get(version_key) is None
+
+    def test_forecast_filters_by_tag(self, authenticated_client, authenticated_user):
+        """Test the forecast can be limited to tagged deals"""
+        tag = TagFactory()
+        DealFactory(owner=authenticated_user, value="10.00", tags=[tag])
+        DealFactory(owner=authenticated_user, value="20.00")
+
+        response = authenticated_client.get(reverse("deal-forecast"), {"tags": str(tag.id)})
+        assert response.data["total"]["total_value"] == "10.00"
+
+        response = authenticated_client.get(
+            reverse("deal-forecast"), {"tags": tag.name, "tags_mode": "none"}
+        )
+        assert response.data["total"]["total_value"] == "20.00"
+
+    @pytest.mark.parametrize("organization", ["²", "abc", "-1"])
+    def test_forecast_rejects_invalid_organization(self, authenticated_client, organization):
+        """Test the organization filter only accepts an integer id"""
+        response = authenticated_client.get(
+            reverse("deal-forecast"), {"organization": organization}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stage_analytics(self, authenticated_client, authenticated_user):
+        """Test time-in-stage percentiles and conversion rates per owner"""
+        for stage in ("closed_won", "closed_won", "closed_lost"):
+            deal = DealFactory(owner=authenticated_user, stage="negotiation")
+            deal.stage = stage
+            deal.save()
+
+        response = authenticated_client.get(reverse("deal-stage-analytics"))
+        assert response.status_code == status.HTTP_200_OK
+        [owner] = response.data["results"]
+        assert owner["owner"] == authenticated_user.id
+        [negotiation] = owner["stages"]
+        assert negotiation["stage"] == "negotiation"
+        assert negotiation["transitions"] == 3
+        assert negotiation["conversion"] == {"closed_lost": 0.3333, "closed_won": 0.6667}
+        assert negotiation["median_ms"] <= negotiation["p90_ms"]
+
+    def test_stage_analytics_rejects_unknown_grouping(self, authenticated_client):
+        """Test group_by only accepts owner or organization"""
+        response = authenticated_client.get(reverse("deal-stage-analytics"), {"group_by": "x"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 # ============================================================================
 # TAG API TESTS
@@ -282,6 +449,73 @@ class TestTagAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.data["id"] == tag.id
 
+    def test_list_tags_from_registry(self, authenticated_client, django_assert_num_queries):
+        """Test a warm tag list is served without database queries"""
+        TagFactory.create_batch(3)
+        url = reverse("tag-list")
+        authenticated_client.get(url)
+        with django_assert_num_queries(0):
+            response = authenticated_client.get(url)
+        assert response.data["count"] == 3
+
+    def test_order_tags_by_usage(self, authenticated_client, authenticated_user):
+        """Test tags can be ordered by their maintained usage counters"""
+        rare, popular = TagFactory(name="rare"), TagFactory(name="popular")
+        LeadFactory.create_batch(2, owner=authenticated_user, tags=[popular])
+        DealFactory(owner=authenticated_user, tags=[rare, popular])
+
+        response = authenticated_client.get(reverse("tag-list"), {"ordering": "-lead_count"})
+        assert [tag["name"] for tag in response.data["results"]] == ["popular", "rare"]
+        assert response.data["results"][0]["lead_count"] == 2
+        assert response.data["results"][0]["deal_count"] == 1
+
+    def test_tagging_keeps_registry_warm(
+        self, authenticated_client, authenticated_user, django_assert_num_queries
+    ):
+        """Test tagging records moves the counters without reloading the registry"""
+        tag = TagFactory()
+        url = reverse("tag-list")
+        authenticated_client.get(url)
+        LeadFactory(owner=authenticated_user, tags=[tag])
+        with django_assert_num_queries(0):
+            authenticated_client.get(url)
+
+        response = authenticated_client.get(url, {"ordering": "-lead_count"})
+        assert response.data["results"][0]["lead_count"] == 1
+
+    def test_registry_refreshes_counters(self, authenticated_client, authenticated_user, settings):
+        """Test the registry reloads the counters once TAG_REGISTRY_MAX_AGE has passed"""
+        tag = TagFactory()
+        url = reverse("tag-list")
+        authenticated_client.get(url)
+        LeadFactory(owner=authenticated_user, tags=[tag])
+        settings.TAG_REGISTRY_MAX_AGE = 0
+        response = authenticated_client.get(url)
+        assert response.data["results"][0]["lead_count"] == 1
+
+    def test_new_tag_is_visible_after_write(self, authenticated_client):
+        """Test creating a tag invalidates the registry"""
+        url = reverse("tag-list")
+        authenticated_client.get(url)
+        TagFactory(name="fresh")
+        response = authenticated_client.get(url)
+        assert [tag["name"] for tag in response.data["results"]] == ["fresh"]
+
+    def test_tag_ids_validated_without_tag_queries(self, authenticated_client):
+        """Test lead tag ids are validated against the registry"""
+        tag = TagFactory()
+        authenticated_client.get(reverse("tag-list"))
+        url = reverse("lead-list")
+        data = {"first_name": "A", "last_name": "B", "email": "a@b.co", "tags": [tag.id]}
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(url, data, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        assert not [q for q in queries if 'FROM "tags_tag"' in q["sql"]]
+
+        data["tags"] = [tag.id + 1000]
+        response = authenticated_client.post(url, data, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 # ============================================================================
 # ACTIVITY API TESTS
@@ -292,8 +526,6 @@ class TestTagAPI:
 class TestActivityAPI:
     def test_list_activities(self, authenticated_client, authenticated_user):
         """Test listing activities"""
-        from tests.factories import ActivityFactory
-
         ActivityFactory.create_batch(3, user=authenticated_user)
         url = reverse("activity-list")
         response = authenticated_client.get(url)
@@ -0,0 +1,131 @@
+"""
+Archival tests for CRM application.
+Tests the archive_records command and the ?include_archived=true read path.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from activities.models import Activity, ArchivedActivity
+from api.archive import IncludeArchivedMixin
+from leads.models import ArchivedLead, Lead
+from leads.views import LeadViewSet
+from tests.factories import ActivityFactory, LeadFactory, TagFactory, UserFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def age(queryset, days, field):
+    queryset.update(**{field: timezone.now() - timedelta(days=days)})
+
+
+@pytest.mark.django_db
+class TestArchiveRecordsCommand:
+    def test_old_activities_are_moved(self, user):
+        """Test activities past the cutoff move to the archive table"""
+        old = ActivityFactory(user=user, lead=None)
+        recent = ActivityFactory(user=user, lead=None)
+        age(Activity.objects.filter(pk=old.pk), 400, "date")
+
+        call_command("archive_records", activity_days=365, batch_size=1)
+
+        assert list(Activity.objects.values_list("id", flat=True)) == [recent.id]
+        archived = ArchivedActivity.objects.get()
+        assert archived.id == old.id
+        assert archived.summary == old.summary
+
+    def test_archiving_keeps_activity_counters(self, user):
+        """Test archived activities still count towards their contact"""
+        old = ActivityFactory(user=user, lead=None)
+        age(Activity.objects.filter(pk=old.pk), 400, "date")
+
+        call_command("archive_records")
+        call_command("rebuild_activity_counters")
+
+        old.contact.refresh_from_db()
+        assert old.contact.activity_count == 1
+        assert old.contact.last_activity_at is not None
+
+    def test_lost_leads_move_with_tags_and_activities(self, user):
+        """Test lost leads keep their tags and take their activities along"""
+        tag = TagFactory()
+        lost = LeadFactory(owner=user, status="lost", tags=[tag])
+        ActivityFactory(user=user, lead=lost, contact=None)
+        LeadFactory(owner=user, status="new")
+        age(Lead.objects.all(), 200, "updated_at")
+
+        call_command("archive_records", lost_lead_days=180)
+
+        assert not Lead.objects.filter(pk=lost.pk).exists()
+        assert Lead.objects.count() == 1
+        archived = ArchivedLead.objects.get(pk=lost.pk)
+        assert list(archived.tags.all()) == [tag]
+        assert ArchivedActivity.objects.get().lead == lost.pk
+
+    def test_dry_run_moves_nothing(self, user):
+        """Test --dry-run leaves the hot tables untouched"""
+        ActivityFactory(user=user, lead=None)
+        age(Activity.objects.all(), 400, "date")
+
+        call_command("archive_records", dry_run=True)
+
+        assert Activity.objects.count() == 1
+        assert not ArchivedActivity.objects.exists()
+
+
+@pytest.mark.django_db
+class TestIncludeArchived:
+    def test_archived_rows_hidden_by_default(self, client, user):
+        """Test archived activities are not listed unless requested"""
+        old, _recent = ActivityFactory.create_batch(2, user=user, lead=None)
+        age(Activity.objects.filter(pk=old.pk), 400, "date")
+        call_command("archive_records")
+
+        response = client.get(reverse("activity-list"))
+        assert response.data["count"] == 1
+
+    def test_include_archived_merges_and_orders(self, client, user):
+        """Test include_archived lists both tables, newest first"""
+        old = ActivityFactory.create_batch(3, user=user, lead=None)[0]
+        age(Activity.objects.filter(pk=old.pk), 400, "date")
+        call_command("archive_records")
+
+        response = client.get(reverse("activity-list"), {"include_archived": "true"})
+        assert response.data["count"] == 3
+        results = response.data["results"]
+        assert [item["archived"] for item in results] == [False, False, True]
+
+    def test_include_archived_applies_filters(self, client, user):
+        """Test filter parameters apply to archived leads as well"""
+        LeadFactory(owner=user, status="lost")
+        LeadFactory(owner=user, status="new")
+        age(Lead.objects.all(), 200, "updated_at")
+        call_command("archive_records")
+
+        response = client.get(reverse("lead-list"), {"include_archived": "true", "status": "lost"})
+        assert response.data["count"] == 1
+        assert response.data["results"][0]["archived"] is True
+
+    def test_missing_archive_queryset(self, client, monkeypatch):
+        """Test a view without get_archive_queryset() names what it must define"""
+        monkeypatch.setattr(
+            LeadViewSet, "get_archive_queryset", IncludeArchivedMixin.get_archive_queryset
+        )
+        with pytest.raises(ImproperlyConfigured, match="LeadViewSet must override"):
+            client.get(reverse("lead-list"), {"include_archived": "true"})
@@ -0,0 +1,177 @@
+"""
+Async endpoint tests for CRM application.
+Tests that the ASGI read path matches the sync endpoints and stays off the event loop's thread.
+"""
+
+import asyncio
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tests.factories import (
+    ActivityFactory,
+    ContactFactory,
+    DealFactory,
+    LeadFactory,
+    TagFactory,
+    UserFactory,
+)
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def headers(user):
+    return {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+def get(headers, *paths):
+    """Request ``paths`` concurrently through the ASGI handler."""
+    client = AsyncClient()
+
+    async def fetch():
+        return await asyncio.gather(*(client.get(path, headers=headers) for path in paths))
+
+    return async_to_sync(fetch)()
+
+
+def timed_queries(response):
+    """The query count in a response's Server-Timing header."""
+    return int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+
+def observed_queries(route):
+    return REGISTRY.get_sample_value("crm_http_request_db_queries_sum", {"route": route}) or 0
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.mark.parametrize("resource", ["leads", "contacts", "deals", "activities"])
+    def test_list_matches_sync_endpoint(self, headers, user, resource):
+        """Test each async list returns the same payload as the sync list"""
+        tag = TagFactory()
+        for lead in LeadFactory.create_batch(3, owner=user):
+            lead.tags.add(tag)
+        for deal in DealFactory.create_batch(2, owner=user):
+            deal.tags.add(tag)
+        ContactFactory.create_batch(2, owner=user)
+        ActivityFactory.create_batch(2, user=user)
+        LeadFactory()
+
+        path = f"/api/v1/{resource}/?ordering=-created_at"
+        if resource == "activities":
+            path = "/api/v1/activities/?ordering=-date"
+        async_response, sync_response = get(headers, path.replace("/v1/", "/v1/async/"), path)
+
+        assert async_response.status_code == 200
+        assert async_response["Content-Type"] == sync_response["Content-Type"]
+        assert async_response.content == sync_response.content
+
+    def test_pagination_and_filters(self, headers, user):
+        """Test page links, search and tag filters go through the viewset's backends"""
+        tag = TagFactory(name="vip")
+        leads = LeadFactory.create_batch(25, owner=user, status="new")
+        leads[0].tags.add(tag)
+        LeadFactory(owner=user, status="qualified")
+
+        page_two, tagged, missing = get(
+            headers,
+            "/api/v1/async/leads/?status=new&ordering=created_at&page=2",
+            "/api/v1/async/leads/?tags=vip",
+            "/api/v1/async/leads/?page=9",
+        )
+
+        assert page_two.json()["count"] == 25
+        assert len(page_two.json()["results"]) == 5
+        assert page_two.json()["previous"].endswith(
+            "/api/v1/async/leads/?ordering=created_at&status=new"
+        )
+        assert [row["id"] for row in tagged.json()["results"]] == [leads[0].pk]
+        assert missing.status_code == 404
+
+    def test_retrieve(self, headers, user):
+        """Test retrieve matches sync and hides other owners' rows"""
+        lead = LeadFactory(owner=user)
+        other = LeadFactory()
+
+        mine, sync_mine, theirs, bogus = get(
+            headers,
+            f"/api/v1/async/leads/{lead.pk}/",
+            f"/api/v1/leads/{lead.pk}/",
+            f"/api/v1/async/leads/{other.pk}/",
+            "/api/v1/async/leads/not-a-number/",
+        )
+
+        assert mine.content == sync_mine.content
+        assert theirs.status_code == 404
+        assert theirs.json() == {"detail": "No Lead matches the given query."}
+        assert bogus.status_code == 404
+
+    def test_requires_authentication(self):
+        """Test anonymous requests get the same 401 as the sync endpoint"""
+        [response] = get({}, "/api/v1/async/leads/")
+        assert response.status_code == 401
+        assert response["WWW-Authenticate"].startswith("Bearer")
+
+    @pytest.mark.parametrize(
+        "path, route",
+        [("/api/v1/leads/", "lead-list"), ("/api/v1/async/leads/", "async-lead-list")],
+    )
+    def test_counted_and_budgeted_like_sync(self, headers, user, settings, path, route):
+        """Test the async endpoints' queries are timed, counted and held to the query budget"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+        LeadFactory.create_batch(2, owner=user)
+        get(headers, path)
+        before = observed_queries(route)
+        [response] = get(headers, path)
+        queries = timed_queries(response)
+        assert queries > 0
+        assert observed_queries(route) - before == queries
+
+        settings.QUERY_BUDGET_MAX_QUERIES = queries
+        assert get(headers, path)[0].status_code == 200
+        settings.QUERY_BUDGET_MAX_QUERIES = queries - 1
+        assert get(headers, path)[0].status_code == 503
+
+    def test_include_archived_falls_back_to_sync_list(self, headers, user):
+        """Test include_archived is still served on the async path"""
+        LeadFactory(owner=user)
+        [response] = get(headers, "/api/v1/async/leads/?include_archived=true")
+        assert response.status_code == 200
+        assert response.json()["count"] == 1
+
+
+class TestAsyncMiddleware:
+    def test_no_middleware_adapted(self, caplog):
+        """Test the ASGI handler runs every middleware natively, without a thread hop"""
+        with caplog.at_level(logging.DEBUG, logger="django.request"):
+            ASGIHandler()
+        assert not [r for r in caplog.records if "adapted for middleware" in r.getMessage()]
+
+    def test_static_files_served(self, settings, tmp_path):
+        """Test static files are still served through the ASGI handler"""
+        (tmp_path / "app.css").write_text("body {}")
+        settings.STATIC_ROOT = tmp_path
+        settings.WHITENOISE_AUTOREFRESH = True
+        settings.WHITENOISE_USE_FINDERS = False
+        response = async_to_sync(AsyncClient().get)(f"{settings.STATIC_URL}app.css")
+        assert response.status_code == 200
+
+    @pytest.mark.django_db
+    def test_queries_counted(self, headers, user, settings):
+        """Test Server-Timing and the metrics count the queries a sync view runs under ASGI"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+        LeadFactory(owner=user)
+        before = observed_queries("lead-list")
+        [response] = get(headers, "/api/v1/leads/")
+        assert timed_queries(response) > 0
+        assert observed_queries("lead-list") - before == timed_queries(response)
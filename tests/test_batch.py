@@ -0,0 +1,163 @@
+"""
+Batch endpoint tests for CRM application.
+Tests that sub-requests behave like separate API calls, in order, with one authentication.
+"""
+
+import threading
+
+import pytest
+from django.db import connections
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.factories import DealFactory, LeadFactory, UserFactory
+
+URL = "/api/v1/batch/"
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def data(user):
+    LeadFactory.create_batch(3, owner=user, status="new")
+    LeadFactory(owner=user, status="qualified")
+    return DealFactory(owner=user)
+
+
+def batch(client, *requests, parallel=True):
+    response = client.post(URL, {"requests": requests, "parallel": parallel}, format="json")
+    assert response.status_code == 200
+    return response.json()["responses"]
+
+
+@pytest.mark.django_db
+class TestBatch:
+    def test_matches_separate_requests(self, client, data):
+        """Test each sub-response equals the response of the same call on its own"""
+        responses = batch(
+            client,
+            {"path": "/api/v1/leads/", "query": {"status": "new", "ordering": "created_at"}},
+            {"path": f"/api/v1/deals/{data.pk}/?expand=owner"},
+            {"path": "/api/v1/deals/forecast/"},
+            {"path": "/api/v1/async/leads/"},
+            parallel=False,
+        )
+        assert [response["status"] for response in responses] == [200] * 4
+        assert responses[0]["body"] == (
+            client.get("/api/v1/leads/?status=new&ordering=created_at").json()
+        )
+        assert responses[0]["body"]["count"] == 3
+        assert responses[1]["body"] == client.get(f"/api/v1/deals/{data.pk}/?expand=owner").json()
+        assert responses[2]["body"] == client.get("/api/v1/deals/forecast/").json()
+        assert responses[3]["body"]["count"] == 4
+
+    def test_writes_in_order(self, client, user):
+        """Test reads after a write see it, and write errors come back per request"""
+        responses = batch(
+            client,
+            {
+                "method": "POST",
+                "path": "/api/v1/leads/",
+                "body": {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"},
+            },
+            {"path": "/api/v1/leads/"},
+            {"method": "POST", "path": "/api/v1/deals/", "body": {}},
+            {"method": "DELETE", "path": "/api/v1/leads/999999/"},
+            parallel=False,
+        )
+        assert [response["status"] for response in responses] == [201, 200, 400, 404]
+        assert responses[1]["body"]["results"][0]["first_name"] == "Ada"
+        assert "name" in responses[2]["body"]
+
+    def test_authenticates_once(self, user, data, monkeypatch):
+        """Test the batch's credentials are checked once and used for every sub-request"""
+        calls = []
+        authenticate = JWTAuthentication.authenticate
+
+        def counting(self, request):
+            calls.append(request.path)
+            return authenticate(self, request)
+
+        monkeypatch.setattr(JWTAuthentication, "authenticate", counting)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        responses = batch(
+            client, {"path": "/api/v1/leads/"}, {"path": "/api/v1/deals/"}, parallel=False
+        )
+        assert [response["body"]["count"] for response in responses] == [4, 1]
+        assert calls == [URL]
+
+    def test_requires_authentication(self):
+        """Test anonymous batches are rejected before any sub-request runs"""
+        response = APIClient().post(URL, {"requests": [{"path": "/api/v1/leads/"}]}, format="json")
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize(
+        "path", ["/admin/", "https://example.com/api/v1/leads/", "/api/v1/nothing/", URL]
+    )
+    def test_invalid_paths(self, client, path):
+        """Test paths outside the API, unknown endpoints and nested batches are rejected"""
+        response = client.post(URL, {"requests": [{"path": path}]}, format="json")
+        assert response.status_code == 400
+
+    def test_query_budget_per_sub_request(self, client, data, settings):
+        """Test each sub-request run in turn has its own query budget"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 2
+        assert client.get("/api/v1/leads/").status_code == 503
+        requests = [{"path": "/api/v1/leads/"}, {"path": "/api/v1/tags/"}] * 2
+        responses = batch(client, *requests, parallel=False)
+        assert [response["status"] for response in responses] == [503, 200, 503, 200]
+
+    def test_size_limit(self, client, settings):
+        """Test batches larger than BATCH_MAX_REQUESTS are rejected"""
+        settings.BATCH_MAX_REQUESTS = 2
+        requests = [{"path": "/api/v1/leads/"}] * 3
+        response = client.post(URL, {"requests": requests}, format="json")
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_reads(client, data):
+    """Test reads on the thread pool return the same responses as in turn"""
+    requests = [
+        {"path": "/api/v1/leads/", "query": {"status": status}} for status in ("new", "qualified")
+    ] + [{"path": "/api/v1/deals/"}, {"path": "/api/v1/leads/999999/"}]
+    parallel = batch(client, *requests)
+    assert [response["status"] for response in parallel] == [200, 200, 200, 404]
+    assert [response["body"].get("count") for response in parallel[:3]] == [3, 1, 1]
+    assert parallel == batch(client, *requests, parallel=False)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pool_threads_keep_no_connection(client, data, monkeypatch):
+    """Test the batch threads close their database connections after each sub-request"""
+    closed = []
+    close_all = connections.close_all
+
+    def recording_close_all():
+        closed.append(threading.current_thread().name)
+        close_all()
+
+    monkeypatch.setattr(connections, "close_all", recording_close_all)
+    batch(client, *[{"path": "/api/v1/leads/"}] * 8)
+    assert len(closed) == 8
+    assert all(name.startswith("batch") for name in closed)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_query_budget(client, data, settings):
+    """Test reads on the thread pool are held to their own query budget"""
+    settings.QUERY_BUDGET_MAX_QUERIES = 2
+    responses = batch(client, *[{"path": "/api/v1/leads/"}] * 3)
+    assert [response["status"] for response in responses] == [503] * 3
@@ -0,0 +1,75 @@
+"""
+Benchmark suite tests for CRM application.
+Tests that every benchmark case runs cleanly and that regressions are detected.
+"""
+
+import pytest
+
+from api import benchmark
+from tests.factories import (
+    ActivityFactory,
+    ContactFactory,
+    DealFactory,
+    LeadFactory,
+    OrganizationFactory,
+    TagFactory,
+    UserFactory,
+)
+
+
+def report(**metrics):
+    result = {"p50_ms": 10.0, "p90_ms": 20.0, "queries": 3, "peak_kib": 100.0, **metrics}
+    return {"results": {"10k": {"leads.list": result}}}
+
+
+@pytest.mark.django_db
+class TestBenchmarkRun:
+    def test_every_case_succeeds(self):
+        """Test every benchmark case returns a success status with metrics"""
+        user = UserFactory()
+        organization = OrganizationFactory(owner=user)
+        contact = ContactFactory(owner=user, organization=organization)
+        LeadFactory(owner=user, organization=organization, tags=[TagFactory()])
+        DealFactory(owner=user, organization=organization, contact=contact)
+        ActivityFactory(user=user, contact=contact)
+
+        results = benchmark.run(user, benchmark.build_cases(user), iterations=2, warmup=0)
+
+        assert len(results) == len(benchmark.build_cases(user))
+        for name, result in results.items():
+            assert result["status"] < 400, name
+            assert result["p50_ms"] <= result["p99_ms"]
+        assert results["leads.retrieve"]["queries"] > 0
+
+    def test_renderers(self):
+        """Test every renderer is timed on the list payloads"""
+        user = UserFactory()
+        LeadFactory(owner=user, tags=[TagFactory()])
+        DealFactory(owner=user, organization=OrganizationFactory(owner=user))
+
+        results = benchmark.renderers(benchmark.renderer_payloads(user, rows=10), iterations=2)
+
+        assert {"leads.json.stdlib", "deals.ndjson", "deals.msgpack.python"} <= set(results)
+        assert results["leads.msgpack"]["rows"] == 1
+        assert results["leads.msgpack"]["kib"] == results["leads.msgpack.python"]["kib"]
+
+
+class TestBenchmarkCompare:
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        assert benchmark.percentile(values, 0.5) == 50
+        assert benchmark.percentile(values, 0.99) == 99
+        assert benchmark.percentile([7], 0.9) == 7
+
+    def test_flags_regressions(self):
+        """Test slower, query-heavier or larger results are flagged"""
+        current = report(p50_ms=15.0, queries=4, peak_kib=300.0)
+        metrics = {row[2] for row in benchmark.compare(report(), current, 0.25)}
+        assert metrics == {"p50_ms", "queries", "peak_kib"}
+
+    def test_ignores_noise(self):
+        """Test changes within the threshold or noise floor are not regressions"""
+        assert benchmark.compare(report(), report(p50_ms=12.0), 0.25) == []
+        small = report(p50_ms=0.5, p90_ms=0.6)
+        assert benchmark.compare(small, report(p50_ms=1.2, p90_ms=1.3), 0.25) == []
@@ -0,0 +1,148 @@
+"""
+Query budget tests for CRM application.
+Tests that requests over their query count or statement time get a 503 and are logged.
+"""
+
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from leads.models import Lead
+from leads.views import LeadViewSet
+from tests.factories import LeadFactory, UserFactory
+
+# Counts to a hundred million: seconds of work on any database.
+SLOW_CONDITION = (
+    "(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000000)"
+    " SELECT count(*) FROM c) > 0"
+)
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def slow_leads(view):
+    return Lead.objects.filter(owner=view.request.user).extra(where=[SLOW_CONDITION])
+
+
+def asgi_get(user, path):
+    """GET ``path`` through the ASGI handler, where views query from sync_to_async threads."""
+    token = RefreshToken.for_user(user).access_token
+    return async_to_sync(AsyncClient().get)(path, headers={"Authorization": f"Bearer {token}"})
+
+
+def budget_logs(caplog):
+    return [json.loads(r.message) for r in caplog.records if r.name == "api.query_budget"]
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    def test_within_budget(self, client, user, settings):
+        """Test requests within the budget are unaffected"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 3
+        LeadFactory.create_batch(5, owner=user)
+        assert client.get("/api/v1/leads/").status_code == 200
+
+    def test_too_many_queries(self, client, user, settings, caplog):
+        """Test the query over the count limit is refused with a 503 and logged"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 2
+        LeadFactory(owner=user)
+        response = client.get("/api/v1/leads/")
+        assert response.status_code == 503
+        assert response.json()["detail"].startswith("This request needed more database work")
+        [entry] = budget_logs(caplog)
+        assert entry["view"] == "GET lead-list"
+        assert entry["limit"] == "queries"
+        assert entry["queries"] == 3
+
+    def test_queries_after_the_refused_one_run(self, client, user, settings, monkeypatch):
+        """Test only the query over the limit is refused, so the 503 response completes"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 2
+        LeadFactory(owner=user)
+        finalize_response = LeadViewSet.finalize_response
+
+        def finalize_with_query(view, request, response, *args, **kwargs):
+            response = finalize_response(view, request, response, *args, **kwargs)
+            User.objects.count()
+            return response
+
+        monkeypatch.setattr(LeadViewSet, "finalize_response", finalize_with_query)
+        assert client.get("/api/v1/leads/").status_code == 503
+
+    def test_admin_not_budgeted(self, user, settings):
+        """Test Django views such as the admin are not limited"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 1
+        user.is_staff = user.is_superuser = True
+        user.save()
+        client = Client()
+        client.force_login(user)
+        assert client.get("/admin/auth/group/").status_code == 200
+
+    def test_view_override(self, client, user, settings, monkeypatch):
+        """Test a view's own limit replaces the default"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 1
+        monkeypatch.setattr(LeadViewSet, "max_queries", 0, raising=False)
+        assert client.get("/api/v1/leads/").status_code == 200
+
+    def test_action_override(self, client, settings):
+        """Test the CSV import, one query per row, is not limited"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 2
+        rows = "first_name,last_name,email\n" + "Ada,Lovelace,ada@example.com\n" * 5
+        upload = SimpleUploadedFile("leads.csv", rows.encode(), content_type="text/csv")
+        response = client.post("/api/v1/leads/upload_csv/", {"file": upload})
+        assert response.status_code == 200
+        assert Lead.objects.count() == 5
+
+    def test_statement_timeout(self, client, user, settings, monkeypatch, caplog):
+        """Test a statement running past the time limit is interrupted with a 503"""
+        if connection.vendor not in ("sqlite", "postgresql"):
+            pytest.skip("needs recursive CTEs without a depth limit")
+        settings.QUERY_BUDGET_TIMEOUT_MS = 100
+        LeadFactory(owner=user)
+        monkeypatch.setattr(LeadViewSet, "get_queryset", slow_leads)
+        response = client.get("/api/v1/leads/")
+        assert response.status_code == 503
+        [entry] = budget_logs(caplog)
+        assert entry["limit"] == "time"
+
+        monkeypatch.undo()
+        assert client.get("/api/v1/leads/").json()["count"] == 1
+
+
+@pytest.mark.django_db
+class TestQueryBudgetUnderASGI:
+    def test_too_many_queries(self, user, settings):
+        """Test the query count is enforced on queries run from sync_to_async threads"""
+        settings.QUERY_BUDGET_MAX_QUERIES = 2
+        LeadFactory(owner=user)
+        assert asgi_get(user, "/api/v1/leads/").status_code == 503
+
+        settings.QUERY_BUDGET_MAX_QUERIES = 10
+        assert asgi_get(user, "/api/v1/leads/").status_code == 200
+
+    def test_statement_timeout(self, user, settings, monkeypatch, caplog):
+        """Test the statement time limit is enforced under ASGI"""
+        if connection.vendor not in ("sqlite", "postgresql"):
+            pytest.skip("needs recursive CTEs without a depth limit")
+        settings.QUERY_BUDGET_TIMEOUT_MS = 100
+        LeadFactory(owner=user)
+        monkeypatch.setattr(LeadViewSet, "get_queryset", slow_leads)
+        assert asgi_get(user, "/api/v1/leads/").status_code == 503
+        [entry] = budget_logs(caplog)
+        assert entry["limit"] == "time"
@@ -0,0 +1,170 @@
+"""
+Request coalescing tests for CRM application.
+Tests that concurrent identical reads share one computation in and across workers.
+"""
+
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from api import coalesce
+from tests.factories import DealFactory, LeadFactory, UserFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+class Computation:
+    """A compute() that blocks until released and counts its calls."""
+
+    def __init__(self, result="data"):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def run_in_thread(key, compute, results):
+    def target():
+        try:
+            results.append(coalesce.coalesce("test", key, compute))
+        except Exception as exc:
+            results.append(exc)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+class TestCoalesce:
+    def test_followers_share_the_leader_result(self):
+        """Test concurrent calls in one worker run compute() once"""
+        compute = Computation()
+        results = []
+        leader = run_in_thread("key", compute, results)
+        assert compute.started.wait(5)
+        followers = [run_in_thread("key", compute, results) for _ in range(3)]
+        time.sleep(0.2)
+        compute.release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        assert results == ["data"] * 4
+        assert compute.calls == 1
+
+    def test_followers_compute_when_leader_fails(self):
+        """Test an exception in the leader is not handed to followers"""
+        compute = Computation(ValueError("boom"))
+        results = []
+        leader = run_in_thread("failing", compute, results)
+        assert compute.started.wait(5)
+        follower = run_in_thread("failing", lambda: "own", results)
+        time.sleep(0.2)
+        compute.release.set()
+        leader.join(5)
+        follower.join(5)
+        assert "own" in results
+        assert any(isinstance(result, ValueError) for result in results)
+
+    def test_result_from_another_worker(self):
+        """Test a call waits for the result of a leader in another worker"""
+        cache.add("coalesce:lock:shared", "other-worker")
+        cache.set("coalesce:result:shared:other-worker", "theirs")
+        assert coalesce.coalesce("test", "shared", lambda: "ours") == "theirs"
+
+    def test_result_published_only_to_waiting_workers(self):
+        """Test the leader stores its result in the cache only when another worker waits"""
+        for waiting in (False, True):
+            compute = Computation()
+            results = []
+            leader = run_in_thread("published", compute, results)
+            assert compute.started.wait(5)
+            token = cache.get("coalesce:lock:published")
+            if waiting:
+                cache.set(f"coalesce:waiting:published:{token}", True)
+            compute.release.set()
+            leader.join(5)
+            assert results == ["data"]
+            published = cache.get(f"coalesce:result:published:{token}")
+            assert published == ("data" if waiting else None)
+
+    def test_gives_up_on_a_stuck_leader(self, settings):
+        """Test a call computes itself once the wait for another worker runs out"""
+        settings.COALESCE_WAIT_SECONDS = 0.2
+        settings.COALESCE_POLL_SECONDS = 0.01
+        cache.add("coalesce:lock:stuck", "other-worker")
+        assert coalesce.coalesce("test", "stuck", lambda: "ours") == "ours"
+
+    def test_nothing_kept_after_the_flight(self):
+        """Test calls after the leader finished compute afresh"""
+        assert coalesce.coalesce("test", "fresh", lambda: 1) == 1
+        assert coalesce.coalesce("test", "fresh", lambda: 2) == 2
+        assert cache.get("coalesce:lock:fresh") is None
+
+
+@pytest.mark.django_db
+class TestRequestKey:
+    def key(self, user, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user)
+        return coalesce.request_key(Request(request))
+
+    def test_normalized(self, user):
+        """Test parameter order and the format override do not change the key"""
+        key = self.key(user, "/api/v1/leads/?search=ada&ordering=status")
+        assert self.key(user, "/api/v1/leads/?ordering=status&search=ada&format=json") == key
+        assert self.key(user, "/api/v1/leads/?search=ada") != key
+
+    def test_per_user(self, user):
+        """Test different users never share a flight"""
+        url = "/api/v1/deals/forecast/"
+        assert self.key(user, url) != self.key(UserFactory(), url)
+
+
+@pytest.mark.django_db
+class TestCoalescedViews:
+    def test_search_sees_fresh_data(self, client, user):
+        """Test coalesced searches are not cached between requests"""
+        LeadFactory(owner=user, first_name="Ada")
+        assert client.get("/api/v1/leads/", {"search": "Ada"}).json()["count"] == 1
+        LeadFactory(owner=user, first_name="Ada")
+        assert client.get("/api/v1/leads/", {"search": "Ada"}).json()["count"] == 2
+
+    def test_forecast_from_another_worker(self, client, user, monkeypatch):
+        """Test the forecast is taken from a leader in another worker"""
+        DealFactory(owner=user)
+        expected = client.get("/api/v1/deals/forecast/").json()
+        calls = []
+        original = coalesce._across_workers
+
+        def hold_lock(name, key, compute):
+            cache.add(f"coalesce:lock:{key}", "leader")
+            cache.set(f"coalesce:result:{key}:leader", (200, {"total": "from leader"}))
+            calls.append(key)
+            return original(name, key, compute)
+
+        monkeypatch.setattr(coalesce, "_across_workers", hold_lock)
+        assert client.get("/api/v1/deals/forecast/").json() == {"total": "from leader"}
+        assert client.get("/api/v1/deals/").status_code == 200
+        assert len(calls) == 1
+        assert expected["total"]["deals"] == 1
@@ -0,0 +1,171 @@
+"""
+Contract upload/download tests for CRM application.
+Tests chunked resumable uploads, content-hash deduplication and Range downloads.
+"""
+
+from urllib.parse import urlencode
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from deals.models import Deal
+from tests.factories import DealFactory, UserFactory
+
+CONTENT = b"%PDF-1.4 " + bytes(range(256)) * 40
+
+
+@pytest.fixture(autouse=True)
+def storage_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    settings.CONTRACT_UPLOAD_DIR = str(tmp_path / "uploads")
+    settings.CONTRACT_SENDFILE_HEADER = ""
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def upload(client, deal, data, offset, **params):
+    url = reverse("deal-contract-upload", args=[deal.id])
+    query = urlencode({"offset": offset, **params})
+    return client.post(f"{url}?{query}", data, content_type="application/octet-stream")
+
+
+def upload_whole(client, deal, content=CONTENT):
+    upload(client, deal, content[:4000], 0, size=len(content), filename="msa.pdf")
+    return upload(client, deal, content[4000:], 4000)
+
+
+@pytest.mark.django_db
+class TestContractUpload:
+    def test_chunked_upload_completes(self, client, user):
+        """Test a contract uploaded in chunks is stored and hashed"""
+        deal = DealFactory(owner=user)
+        first = upload(client, deal, CONTENT[:4000], 0, size=len(CONTENT), filename="msa.pdf")
+        assert first.status_code == status.HTTP_200_OK
+        assert first.data["offset"] == 4000
+        assert first.data["complete"] is False
+
+        last = upload(client, deal, CONTENT[4000:], 4000)
+        assert last.status_code == status.HTTP_201_CREATED
+        deal.refresh_from_db()
+        assert deal.contract_size == len(CONTENT)
+        assert deal.contract_sha256 == last.data["sha256"]
+        assert deal.contract_filename == "msa.pdf"
+        assert deal.contract.read() == CONTENT
+
+    def test_resume_reports_offset(self, client, user):
+        """Test a client can ask where to resume and wrong offsets are rejected"""
+        deal = DealFactory(owner=user)
+        upload(client, deal, CONTENT[:100], 0, size=len(CONTENT), filename="msa.pdf")
+
+        url = reverse("deal-contract-upload", args=[deal.id])
+        assert client.get(url).data["offset"] == 100
+
+        response = upload(client, deal, CONTENT[200:300], 200)
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.data["offset"] == 100
+
+    def test_identical_contracts_share_storage(self, client, user):
+        """Test identical files are stored once"""
+        first, second = DealFactory.create_batch(2, owner=user)
+        upload_whole(client, first)
+        upload_whole(client, second)
+        names = set(Deal.objects.values_list("contract", flat=True))
+        assert len(names) == 1
+
+    def test_malformed_content_length(self, client, user):
+        """Test a Content-Length that is not a byte count is a 400, not a 500"""
+        deal = DealFactory(owner=user)
+        url = reverse("deal-contract-upload", args=[deal.id])
+        response = client.post(
+            f"{url}?offset=0&size=10",
+            b"",
+            content_type="application/octet-stream",
+            HTTP_CONTENT_LENGTH="ten",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_oversized_upload_rejected(self, client, user, settings):
+        """Test uploads above the configured limit are refused up front"""
+        settings.CONTRACT_MAX_UPLOAD_SIZE = 10
+        deal = DealFactory(owner=user)
+        response = upload(client, deal, CONTENT[:5], 0, size=len(CONTENT), filename="msa.pdf")
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.django_db
+class TestContractDownload:
+    def test_full_download(self, client, user):
+        """Test downloading the whole contract"""
+        deal = DealFactory(owner=user)
+        upload_whole(client, deal)
+        response = client.get(reverse("deal-contract", args=[deal.id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert b"".join(response.streaming_content) == CONTENT
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["Content-Disposition"] == 'attachment; filename="msa.pdf"'
+
+    def test_filename_sanitized(self, client, user):
+        """Test the uploaded filename is cleaned and escaped in Content-Disposition"""
+        deal = DealFactory(owner=user)
+        name = '../x"; filename*=evil\r\nSet-Cookie: a=b.pdf'
+        upload(client, deal, CONTENT[:4000], 0, size=len(CONTENT), filename=name)
+        upload(client, deal, CONTENT[4000:], 4000)
+        deal.refresh_from_db()
+        assert deal.contract_filename == "x_filenameevilSet-Cookie_ab.pdf"
+
+        response = client.get(reverse("deal-contract", args=[deal.id]))
+        assert response["Content-Disposition"] == (
+            'attachment; filename="x_filenameevilSet-Cookie_ab.pdf"'
+        )
+        assert "\n" not in response["Content-Disposition"]
+
+    def test_non_ascii_filename(self, client, user):
+        """Test non-ASCII filenames are sent RFC 5987 encoded"""
+        deal = DealFactory(owner=user)
+        upload(
+            client, deal, CONTENT[:4000], 0, size=len(CONTENT), filename="Vertrag für Müller.pdf"
+        )
+        upload(client, deal, CONTENT[4000:], 4000)
+        response = client.get(reverse("deal-contract", args=[deal.id]))
+        assert response["Content-Disposition"] == (
+            "attachment; filename*=utf-8''Vertrag_f%C3%BCr_M%C3%BCller.pdf"
+        )
+
+    def test_range_download(self, client, user):
+        """Test a byte range is served as partial content"""
+        deal = DealFactory(owner=user)
+        upload_whole(client, deal)
+        response = client.get(reverse("deal-contract", args=[deal.id]), HTTP_RANGE="bytes=10-19")
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b"".join(response.streaming_content) == CONTENT[10:20]
+        assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    def test_unsatisfiable_range(self, client, user):
+        """Test a range past the end of the file is rejected"""
+        deal = DealFactory(owner=user)
+        upload_whole(client, deal)
+        response = client.get(
+            reverse("deal-contract", args=[deal.id]), HTTP_RANGE=f"bytes={len(CONTENT)}-"
+        )
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    def test_accel_redirect(self, client, user, settings):
+        """Test nginx X-Accel-Redirect hands the file off to the proxy"""
+        settings.CONTRACT_SENDFILE_HEADER = "X-Accel-Redirect"
+        deal = DealFactory(owner=user)
+        upload_whole(client, deal)
+        deal.refresh_from_db()
+        response = client.get(reverse("deal-contract", args=[deal.id]))
+        assert response["X-Accel-Redirect"] == f"/protected-media/{deal.contract.name}"
@@ -0,0 +1,81 @@
+"""
+Synthetic data generator tests for CRM application.
+Tests the generate_crm_data command used to seed load-test databases.
+"""
+
+import io
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.utils import timezone
+
+from activities.models import Activity
+from contacts.models import Contact
+from deals.models import Deal
+from leads.models import Lead
+from tags.models import Tag
+
+User = get_user_model()
+
+SMALL = {
+    "users": 3,
+    "organizations": 2,
+    "contacts": 10,
+    "leads": 15,
+    "deals": 5,
+    "activities": 40,
+    "tags": 6,
+    "batch_size": 7,
+    "stdout": io.StringIO(),
+}
+
+
+def snapshot(prefix):
+    owners = User.objects.filter(username__startswith=f"{prefix}-")
+    return sorted(
+        Lead.objects.filter(owner__in=owners).values_list(
+            "first_name", "last_name", "status", "source", "created_at"
+        )
+    )
+
+
+@pytest.mark.django_db
+class TestGenerateCrmData:
+    def test_generates_related_rows(self):
+        """Test every table is populated and the counters are rebuilt"""
+        call_command("generate_crm_data", **SMALL)
+
+        assert User.objects.filter(username__startswith="load-0-").count() == 3
+        assert Lead.objects.exists() and Contact.objects.exists() and Deal.objects.exists()
+        activities = Activity.objects.count()
+        assert activities > 0
+        counted = (
+            Lead.objects.aggregate(n=Sum("activity_count"))["n"]
+            + Contact.objects.aggregate(n=Sum("activity_count"))["n"]
+        )
+        assert counted == activities
+        assert Tag.objects.aggregate(n=Sum("lead_count"))["n"] == Lead.tags.through.objects.count()
+
+    def test_timestamps_are_historical(self):
+        """Test creation dates are spread over the requested window"""
+        call_command("generate_crm_data", days=365, **SMALL)
+        oldest = Lead.objects.order_by("created_at").first().created_at
+        assert oldest < timezone.now() - timedelta(days=30)
+        assert not Activity.objects.filter(date__gt=timezone.now()).exists()
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed produces the same data"""
+        call_command("generate_crm_data", prefix="a", seed=7, **SMALL)
+        call_command("generate_crm_data", prefix="b", seed=7, **SMALL)
+        first, second = snapshot("a"), snapshot("b")
+        assert [row[:4] for row in first] == [row[:4] for row in second]
+
+    def test_refuses_to_generate_twice(self):
+        """Test rerunning with the same seed and prefix is rejected"""
+        call_command("generate_crm_data", **SMALL)
+        with pytest.raises(CommandError):
+            call_command("generate_crm_data", **SMALL)
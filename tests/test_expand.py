@@ -0,0 +1,123 @@
+"""
+Expansion tests for CRM application.
+Tests ?expand= output, validation, visibility and that queries do not grow with the page.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.factories import (
+    ActivityFactory,
+    ContactFactory,
+    DealFactory,
+    LeadFactory,
+    OrganizationFactory,
+    TagFactory,
+    UserFactory,
+)
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def organization(user):
+    return OrganizationFactory(owner=user)
+
+
+def create_deals(user, organization, count):
+    tags = TagFactory.create_batch(2)
+    for _ in range(count):
+        contact = ContactFactory(owner=user, organization=organization)
+        DealFactory(owner=user, organization=organization, contact=contact, tags=tags)
+
+
+@pytest.mark.django_db
+class TestExpand:
+    def test_expands_to_detail_representation(self, client, user, organization):
+        """Test expanded objects match what their own endpoints return"""
+        create_deals(user, organization, 1)
+        deal = client.get("/api/v1/deals/?expand=contact,organization,tags,owner").json()
+        deal = deal["results"][0]
+        assert deal["contact"] == client.get(f"/api/v1/contacts/{deal['contact']['id']}/").json()
+        assert (
+            deal["organization"] == client.get(f"/api/v1/organizations/{organization.pk}/").json()
+        )
+        assert deal["owner"] == client.get("/api/v1/auth/me/").json()
+        assert [tag["id"] for tag in deal["tags"]] == sorted(tag["id"] for tag in deal["tags"])
+        assert {"name", "lead_count"} <= set(deal["tags"][0])
+
+    def test_nested(self, client, user, organization):
+        """Test a second level expands inside the first"""
+        create_deals(user, organization, 1)
+        deal = client.get("/api/v1/deals/?expand=contact.organization").json()
+        contact = deal["results"][0]["contact"]
+        assert contact["organization"]["name"] == organization.name
+        assert contact["owner"] == user.pk
+
+    def test_retrieve(self, client, user, organization):
+        """Test detail responses expand too"""
+        lead = LeadFactory(owner=user, organization=organization)
+        response = client.get(f"/api/v1/leads/{lead.pk}/", {"expand": "organization.owner"})
+        assert response.json()["organization"]["owner"]["username"] == user.username
+
+    def test_query_count_independent_of_page(self, client, user, organization):
+        """Test each expanded field costs one query however many rows the page holds"""
+        url = "/api/v1/deals/?expand=contact.organization,organization,owner,tags"
+        create_deals(user, organization, 2)
+        client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            client.get(url)
+        create_deals(user, organization, 15)
+        # Warmed again: the new tags reload the tag registry once.
+        client.get(url)
+        with CaptureQueriesContext(connection) as many:
+            client.get(url)
+        assert len(many) == len(few)
+
+    def test_invisible_rows_stay_ids(self, client, user, organization):
+        """Test related rows the user cannot see are not expanded"""
+        other = ContactFactory()
+        ActivityFactory(user=user, contact=other, lead=None)
+        activity = client.get("/api/v1/activities/?expand=contact,user").json()["results"][0]
+        assert activity["contact"] == other.pk
+        assert activity["user"]["id"] == user.pk
+
+        foreign = OrganizationFactory()
+        lead = LeadFactory(owner=user, organization=foreign)
+        data = client.get(f"/api/v1/leads/{lead.pk}/", {"expand": "organization.owner"}).json()
+        assert data["organization"]["owner"] == foreign.owner_id
+
+    @pytest.mark.parametrize(
+        "expand", ["stage", "contact.deals", "contact.organization.owner", "organization.api_key"]
+    )
+    def test_invalid(self, client, expand):
+        """Test unknown or too deeply nested fields are rejected"""
+        response = client.get("/api/v1/deals/", {"expand": expand})
+        assert response.status_code == 400
+        assert "expand" in response.json()
+
+    def test_async_matches_sync(self, client, user, organization):
+        """Test the async endpoint expands like the sync one"""
+        create_deals(user, organization, 3)
+        url = "/api/v1/deals/?expand=contact.organization,tags"
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        response = async_to_sync(AsyncClient().get)(
+            url.replace("v1/", "v1/async/"), headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == client.get(url).json()["results"]
@@ -0,0 +1,83 @@
+"""
+Load test harness tests for CRM application.
+Tests mix parsing, report aggregation and a short run against a live server.
+"""
+
+import pytest
+
+from api import loadtest
+from api.datagen import PASSWORD
+from tests.factories import LeadFactory, UserFactory
+
+
+class TestMix:
+    def test_named_mix(self):
+        """Test a mix name expands to its weights"""
+        assert loadtest.parse_mix("read") == loadtest.MIXES["read"]
+
+    def test_custom_weights(self):
+        """Test action=weight pairs, with a weight of one when omitted"""
+        assert loadtest.parse_mix("list=5, create") == {"list": 5, "create": 1}
+
+    def test_unknown_action(self):
+        """Test an unknown action is rejected"""
+        with pytest.raises(ValueError):
+            loadtest.parse_mix("list=5,export=1")
+
+    def test_dashboard_replays_frontend(self, monkeypatch):
+        """Test the dashboard action requests what the frontend dashboard loads"""
+        session = loadtest.Session("http://localhost:8000", "user", "password", None)
+        paths = []
+        monkeypatch.setattr(session, "request", lambda action, method, path: paths.append(path))
+        loadtest.ACTIONS["dashboard"](session)
+        assert paths == [
+            "/api/v1/leads/",
+            "/api/v1/deals/",
+            "/api/v1/organizations/",
+            "/api/v1/auth/me/",
+            "/api/v1/activities/",
+        ]
+
+
+class TestSummary:
+    def test_error_rate_and_percentiles(self):
+        """Test 5xx, connection errors and 4xx count as errors but 429s do not"""
+        samples = [loadtest.Sample("list", 200, float(ms)) for ms in range(1, 97)]
+        samples += [
+            loadtest.Sample("create", 500, 10.0),
+            loadtest.Sample("create", 0, 10.0),
+            loadtest.Sample("create", 400, 10.0),
+            loadtest.Sample("create", 429, 10.0),
+        ]
+        report = loadtest.summarize(samples, elapsed=2.0)
+
+        assert report["requests"] == 100
+        assert report["throughput_rps"] == 50.0
+        assert report["error_rate"] == 0.03
+        assert report["throttled"] == 1
+        assert report["actions"]["list"]["p50_ms"] == 48.0
+        assert report["actions"]["create"]["errors"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRun:
+    def test_run_against_live_server(self, live_server):
+        """Test virtual users log in and run the mix over HTTP"""
+        users = [UserFactory(username=f"load-0-{i}", password=PASSWORD) for i in range(2)]
+        for user in users:
+            LeadFactory.create_batch(3, owner=user)
+
+        report = loadtest.run(
+            live_server.url,
+            loadtest.credentials(2),
+            loadtest.parse_mix("dashboard=1,list=2,search=1,create=1,upload=1,async_list=1"),
+            concurrency=2,
+            duration=30,
+            max_requests=12,
+        )
+
+        assert report["actions"]["login"]["requests"] == 2
+        assert report["errors"] == 0
+        assert report["rejected"] == 0
+        assert report["requests"] >= 14
+        assert report["p99_ms"] > 0
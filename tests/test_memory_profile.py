@@ -0,0 +1,93 @@
+"""
+Memory profiling tests for CRM application.
+Tests request selection, per-view aggregation and the staff stats endpoint.
+"""
+
+import io
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api import memory
+from tests.factories import LeadFactory, UserFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    memory.reset()
+    yield
+    memory.reset()
+
+
+@pytest.mark.django_db
+class TestMemoryProfiling:
+    def test_not_profiled_by_default(self, client):
+        """Test requests are not traced without the setting or a token"""
+        response = client.get(reverse("lead-list"))
+        assert memory.HEADER not in response
+        assert memory.stats() == []
+
+    def test_signed_header_enables_profiling(self, client, user):
+        """Test a valid token profiles the request and records its view"""
+        LeadFactory.create_batch(3, owner=user)
+        response = client.get(reverse("lead-list"), HTTP_X_MEMORY_PROFILE=memory.make_token())
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response[memory.HEADER].startswith("peak=")
+        [row] = memory.stats()
+        assert row["view"] == "GET lead-list"
+        assert row["requests"] == 1
+        assert row["peak_kib_max"] > 0
+        assert row["top_sites"]
+
+    def test_forged_token_is_ignored(self, client):
+        """Test a token with a bad signature does not enable profiling"""
+        response = client.get(reverse("lead-list"), HTTP_X_MEMORY_PROFILE="profile:forged:sig")
+        assert memory.HEADER not in response
+
+    def test_setting_profiles_every_request(self, client, settings):
+        """Test MEMORY_PROFILING traces all requests and aggregates per view"""
+        settings.MEMORY_PROFILING = True
+        client.get(reverse("lead-list"))
+        client.get(reverse("lead-list"))
+        client.get(reverse("tag-list"))
+
+        stats = {row["view"]: row for row in memory.stats()}
+        assert stats["GET lead-list"]["requests"] == 2
+        assert stats["GET tag-list"]["requests"] == 1
+
+    def test_stats_endpoint_is_staff_only(self, client, user):
+        """Test the stats endpoint rejects regular users and serves staff"""
+        url = reverse("memory-stats")
+        assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+        user.is_staff = True
+        user.save()
+        client.get(reverse("lead-list"), HTTP_X_MEMORY_PROFILE=memory.make_token())
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["view"] for row in response.data["views"]] == ["GET lead-list"]
+
+        assert client.delete(url).status_code == status.HTTP_204_NO_CONTENT
+        assert memory.stats() == []
+
+    def test_token_command(self):
+        """Test the command prints a token the middleware accepts"""
+        out = io.StringIO()
+        call_command("memory_profile_token", stdout=out, stderr=io.StringIO())
+        assert memory.token_is_valid(out.getvalue().strip())
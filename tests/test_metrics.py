@@ -0,0 +1,101 @@
+"""
+Metrics endpoint tests for CRM application.
+Tests access control and the request, cache and import metrics.
+"""
+
+import io
+
+import pytest
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from api import benchmark
+from tests.factories import UserFactory
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def staff_client():
+    api_client = APIClient()
+    api_client.force_authenticate(user=UserFactory(is_staff=True))
+    return api_client
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_staff_can_scrape(self, staff_client):
+        """Test staff users get the Prometheus exposition format"""
+        response = staff_client.get("/api/v1/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        assert b"crm_http_requests_total" in response.content
+
+    def test_non_staff_is_refused(self):
+        """Test ordinary users are refused"""
+        client = APIClient()
+        client.force_authenticate(user=UserFactory())
+        assert client.get(reverse("metrics")).status_code == 403
+
+    def test_local_address_is_not_trusted_by_default(self):
+        """Test anonymous requests from the local host, e.g. via a proxy, are refused"""
+        response = APIClient().get(reverse("metrics"), REMOTE_ADDR="127.0.0.1")
+        assert response.status_code == 401
+
+    def test_scrape_token(self, settings):
+        """Test scrapers authenticate with the METRICS_TOKEN bearer token"""
+        settings.METRICS_TOKEN = "scrape-secret"
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer scrape-secret")
+        assert client.get(reverse("metrics")).status_code == 200
+        client.credentials(HTTP_AUTHORIZATION="Bearer wrong")
+        assert client.get(reverse("metrics")).status_code == 401
+
+    def test_allowlisted_address(self, settings):
+        """Test allowlisted addresses can scrape without credentials"""
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.5"]
+        response = APIClient().get(reverse("metrics"), REMOTE_ADDR="10.0.0.5")
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test_requests_are_counted_per_route(self, staff_client):
+        """Test requests are labelled by URL name and status"""
+        labels = {"method": "GET", "route": "lead-list", "status": "200"}
+        before = sample("crm_http_requests_total", **labels)
+        staff_client.get(reverse("lead-list"))
+        assert sample("crm_http_requests_total", **labels) == before + 1
+        assert sample("crm_http_request_db_queries_count", route="lead-list") > 0
+
+    def test_unknown_paths_share_one_label(self, staff_client):
+        """Test unmatched paths do not create a label per path"""
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("crm_http_requests_total", **labels)
+        staff_client.get("/api/v1/no-such-thing/123/")
+        assert sample("crm_http_requests_total", **labels) == before + 1
+
+    def test_cache_lookups(self, staff_client):
+        """Test forecast cache hits and misses are counted"""
+        hits = sample("crm_cache_requests_total", cache="forecast", result="hit")
+        misses = sample("crm_cache_requests_total", cache="forecast", result="miss")
+        staff_client.get(reverse("deal-forecast"))
+        staff_client.get(reverse("deal-forecast"))
+        assert sample("crm_cache_requests_total", cache="forecast", result="miss") == misses + 1
+        assert sample("crm_cache_requests_total", cache="forecast", result="hit") == hits + 1
+
+    def test_import_throughput(self, staff_client):
+        """Test CSV imports report the rows they created"""
+        before = sample("crm_import_rows_total", kind="leads_csv")
+        upload = io.BytesIO(b"first_name,last_name,email\nA,B,a@b.co\nC,D,c@d.co\n")
+        upload.name = "leads.csv"
+        staff_client.post(reverse("lead-upload-csv"), {"file": upload}, format="multipart")
+        assert sample("crm_import_rows_total", kind="leads_csv") == before + 2
+
+    def test_overhead_benchmark(self):
+        """Test the middleware overhead benchmark reports its timings"""
+        result = benchmark.metrics_overhead(iterations=50)
+        assert result["instrumented_us"] >= result["bare_us"]
@@ -3,10 +3,21 @@ Model tests for CRM application.
 Tests model creation, validation, relationships, and business logic.
 """
 
+import io
+from datetime import timedelta
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.db import IntegrityError
-
+from django.db.models import Sum
+from django.utils import timezone
+
+from activities.models import Activity
+from contacts.models import Contact
+from deals.models import Deal, DealStageRollup, DealStageTransition
+from leads.models import Lead
+from tags.models import Tag
 from tests.factories import (
     ActivityFactory,
     ContactFactory,
@@ -96,6 +107,47 @@ class TestTagModel:
             TagFactory(name="unique-tag")
 
 
+@pytest.mark.django_db
+class TestTagCounters:
+    def counts(self, tag):
+        tag.refresh_from_db()
+        return tag.lead_count, tag.contact_count, tag.deal_count
+
+    def test_add_and_remove_from_both_sides(self):
+        """Test tag counters follow adds and removes on either side of the relation"""
+        tag = TagFactory()
+        leads = LeadFactory.create_batch(3)
+        leads[0].tags.add(tag)
+        tag.leads.add(*leads)
+        assert self.counts(tag) == (3, 0, 0)
+
+        leads[0].tags.remove(tag, TagFactory())
+        assert self.counts(tag) == (2, 0, 0)
+        tag.leads.clear()
+        assert self.counts(tag) == (0, 0, 0)
+
+    def test_delete_uncounts_tags(self):
+        """Test deleting tagged rows uncounts their tags"""
+        tag = TagFactory()
+        ContactFactory.create_batch(2, tags=[tag])
+        deal = DealFactory(tags=[tag])
+        assert self.counts(tag) == (0, 2, 1)
+
+        deal.delete()
+        Contact.objects.all().delete()
+        assert self.counts(tag) == (0, 0, 0)
+
+    def test_recount_tags_command(self):
+        """Test recount_tags rebuilds the counters from the through tables"""
+        tag = TagFactory()
+        LeadFactory.create_batch(2, tags=[tag])
+        DealFactory(tags=[tag])
+        Tag.objects.update(lead_count=0, deal_count=9)
+
+        call_command("recount_tags", stdout=io.StringIO())
+        assert self.counts(tag) == (2, 0, 1)
+
+
 # ============================================================================
 # LEAD TESTS
 # ============================================================================
@@ -252,6 +304,66 @@ class TestDealModel:
         assert tag2 in deal.tags.all()
 
 
+@pytest.mark.django_db
+class TestDealStageHistory:
+    def test_stage_change_is_logged(self):
+        """Test saving a new stage records the time spent in the old one"""
+        deal = DealFactory(stage="prospecting")
+        Deal.objects.filter(pk=deal.pk).update(stage_changed_at=timezone.now() - timedelta(hours=2))
+        deal.refresh_from_db()
+
+        deal.stage = "negotiation"
+        deal.save()
+
+        transition = DealStageTransition.objects.get(deal=deal)
+        assert (transition.from_stage, transition.to_stage) == ("prospecting", "negotiation")
+        assert abs(transition.duration_ms - 2 * 3600 * 1000) < 60 * 1000
+        rollup = DealStageRollup.objects.get(owner=deal.owner)
+        assert (rollup.count, rollup.total_ms) == (1, transition.duration_ms)
+
+    def test_stage_change_with_update_fields(self):
+        """Test a save limited to the stage also saves stage_changed_at"""
+        deal = DealFactory(stage="prospecting")
+        Deal.objects.filter(pk=deal.pk).update(stage_changed_at=timezone.now() - timedelta(hours=2))
+        deal.refresh_from_db()
+
+        deal.stage = "negotiation"
+        deal.save(update_fields=["stage"])
+
+        deal.refresh_from_db()
+        assert timezone.now() - deal.stage_changed_at < timedelta(minutes=1)
+        assert DealStageTransition.objects.get(deal=deal).to_stage == "negotiation"
+
+    def test_update_fields_without_stage_logs_nothing(self):
+        """Test an unsaved stage change is not logged by a save of other fields"""
+        deal = DealFactory(stage="prospecting")
+        deal.stage = "negotiation"
+        deal.name = "Renamed"
+        deal.save(update_fields=["name"])
+        assert not DealStageTransition.objects.exists()
+
+    def test_saving_without_stage_change_logs_nothing(self):
+        """Test unrelated edits do not create transitions"""
+        deal = DealFactory()
+        deal.name = "Renamed"
+        deal.save()
+        assert not DealStageTransition.objects.exists()
+
+    def test_bulk_paths_are_logged(self):
+        """Test queryset update and bulk_update record transitions"""
+        deals = DealFactory.create_batch(2, stage="prospecting")
+        Deal.objects.filter(pk=deals[0].pk).update(stage="negotiation")
+
+        deals[1].stage = "closed_won"
+        Deal.objects.bulk_update([deals[1]], ["stage"])
+
+        assert sorted(DealStageTransition.objects.values_list("to_stage", flat=True)) == [
+            "closed_won",
+            "negotiation",
+        ]
+        assert DealStageRollup.objects.aggregate(total=Sum("count"))["total"] == 2
+
+
 # ============================================================================
 # ACTIVITY TESTS
 # ============================================================================
@@ -289,3 +401,61 @@ class TestActivityModel:
         lead = LeadFactory()
         activity = ActivityFactory(lead=lead)
         assert activity.lead == lead
+
+
+@pytest.mark.django_db
+class TestActivityCounters:
+    def test_create_updates_contact_and_lead(self):
+        """Test creating an activity counts it on its contact and lead"""
+        activity = ActivityFactory(activity_type="meeting")
+        contact = Contact.objects.get(pk=activity.contact_id)
+        lead = Lead.objects.get(pk=activity.lead_id)
+        for target in (contact, lead):
+            assert target.activity_count == 1
+            assert target.meeting_count == 1
+            assert target.last_activity_at == activity.date
+
+    def test_delete_recomputes_last_activity(self):
+        """Test deleting the newest activity falls back to the previous one"""
+        contact = ContactFactory()
+        first = ActivityFactory(contact=contact, lead=None)
+        second = ActivityFactory(contact=contact, lead=None, activity_type="note")
+        second.delete()
+        contact.refresh_from_db()
+        assert contact.activity_count == 1
+        assert contact.note_count == 0
+        assert contact.last_activity_at == first.date
+
+    def test_changing_type_moves_count(self):
+        """Test updating the activity type moves it between counters"""
+        activity = ActivityFactory(activity_type="call", lead=None)
+        activity.activity_type = "email"
+        activity.save()
+        contact = Contact.objects.get(pk=activity.contact_id)
+        assert (contact.activity_count, contact.call_count, contact.email_count) == (1, 0, 1)
+
+    def test_bulk_paths_are_counted(self):
+        """Test bulk_create and queryset delete keep counters current"""
+        user = UserFactory()
+        contact = ContactFactory(owner=user)
+        Activity.objects.bulk_create(
+            [
+                Activity(user=user, contact=contact, activity_type="call", summary=str(n))
+                for n in range(3)
+            ]
+        )
+        contact.refresh_from_db()
+        assert contact.call_count == 3
+
+        Activity.objects.filter(contact=contact, summary__in=["0", "1"]).delete()
+        contact.refresh_from_db()
+        assert (contact.activity_count, contact.call_count) == (1, 1)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command restores drifted counters"""
+        activity = ActivityFactory(activity_type="note")
+        Contact.objects.update(activity_count=0, note_count=7, last_activity_at=None)
+        call_command("rebuild_activity_counters")
+        contact = Contact.objects.get(pk=activity.contact_id)
+        assert (contact.activity_count, contact.note_count) == (1, 1)
+        assert contact.last_activity_at == activity.date
@@ -0,0 +1,181 @@
+"""
+Renderer and parser tests for CRM application.
+Tests that fast JSON matches DRF byte for byte, and the NDJSON and MessagePack formats.
+"""
+
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers as drf_renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from api import parsers, renderers
+from tests.factories import DealFactory, LeadFactory, TagFactory, UserFactory
+
+AWKWARD = {
+    "value": decimal.Decimal("1250.50"),
+    "when": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    "day": datetime.date(2024, 5, 1),
+    "duration": datetime.timedelta(hours=1),
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "lazy": gettext_lazy("Lead"),
+    "separators": "line\u2028paragraph\u2029",
+    "unicode": "Zoë ✓",
+    1: [None, True, 1.5, -3],
+}
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(renderers, "orjson", None)
+    return request.param
+
+
+class TestJSONRenderer:
+    def test_matches_drf(self, backend):
+        """Test awkward values render exactly as DRF's renderer renders them"""
+        expected = drf_renderers.JSONRenderer().render(AWKWARD)
+        assert renderers.JSONRenderer().render(AWKWARD) == expected
+
+    @pytest.mark.parametrize("value", [1e16, 1.5e-7, -2.5e300, 9.999e-5, 0.0001, 1e15, 0.0])
+    def test_floats_match_drf(self, backend, value):
+        """Test floats, in and out of exponent notation, render as DRF renders them"""
+        data = {"value": value, "nested": [{"value": value}]}
+        assert renderers.JSONRenderer().render(data) == drf_renderers.JSONRenderer().render(data)
+
+    @pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+    def test_non_finite_floats_rejected(self, backend, value):
+        """Test NaN and infinities raise DRF's error instead of rendering as null"""
+        message = "Out of range float values are not JSON compliant"
+        with pytest.raises(ValueError, match=message):
+            drf_renderers.JSONRenderer().render({"value": value})
+        with pytest.raises(ValueError, match=message):
+            renderers.JSONRenderer().render({"value": [value]})
+
+    def test_integers_beyond_64_bits(self):
+        """Test values orjson cannot encode fall back to the stdlib encoder"""
+        assert (
+            renderers.JSONRenderer().render({"huge": 2**70}) == b'{"huge":1180591620717411303424}'
+        )
+
+    def test_indent_left_to_drf(self):
+        """Test indented output is still available"""
+        content = renderers.JSONRenderer().render({"a": 1}, "application/json; indent=2", {})
+        assert content == b'{\n  "a": 1\n}'
+
+    @pytest.mark.django_db
+    def test_api_response_matches_drf(self, client, user, monkeypatch):
+        """Test a list response is byte-identical to DRF's rendering"""
+        DealFactory.create_batch(3, owner=user, tags=[TagFactory()])
+        content = client.get("/api/v1/deals/").content
+        monkeypatch.setattr(
+            renderers, "dumps", lambda data: drf_renderers.JSONRenderer().render(data)
+        )
+        assert client.get("/api/v1/deals/").content == content
+
+
+class TestJSONParser:
+    def parse(self, body, encoding="utf-8"):
+        return parsers.JSONParser().parse(io.BytesIO(body), None, {"encoding": encoding})
+
+    def test_parses(self, backend):
+        """Test documents parse the same with either backend"""
+        assert self.parse('{"name": "Zoë", "n": [1, 2.5]}'.encode()) == {
+            "name": "Zoë",
+            "n": [1, 2.5],
+        }
+
+    def test_invalid_json(self, backend):
+        """Test malformed bodies raise DRF's parse error"""
+        with pytest.raises(ParseError, match="JSON parse error"):
+            self.parse(b'{"name": ')
+
+    def test_falls_back_for_what_orjson_rejects(self):
+        """Test bodies orjson refuses but DRF accepts still parse"""
+        assert self.parse(json.dumps({"big": 2**70}).encode()) == {"big": 2**70}
+        assert self.parse('{"name": "Zoë"}'.encode("latin-1"), "latin-1") == {"name": "Zoë"}
+
+    @pytest.mark.django_db
+    def test_api_accepts_json(self, client):
+        """Test JSON request bodies reach the serializer"""
+        response = client.post(
+            "/api/v1/leads/",
+            {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"},
+            format="json",
+        )
+        assert response.status_code == 201
+        assert response.json()["first_name"] == "Ada"
+
+
+@pytest.mark.django_db
+class TestNDJSONRenderer:
+    def test_list(self, client, user):
+        """Test a page renders one result per line with pagination in headers"""
+        LeadFactory.create_batch(21, owner=user)
+        expected = client.get("/api/v1/leads/").json()
+
+        response = client.get("/api/v1/leads/", HTTP_ACCEPT="application/x-ndjson")
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = response.content.decode().splitlines()
+        assert [json.loads(line) for line in lines] == expected["results"]
+        assert len(lines) == 20
+        assert response["X-Total-Count"] == "21"
+        assert response["Link"] == f'<{expected["next"]}>; rel="next"'
+
+    def test_single_object(self, client, user):
+        """Test a detail response renders as a single line"""
+        lead = LeadFactory(owner=user)
+        response = client.get(f"/api/v1/leads/{lead.pk}/", {"format": "ndjson"})
+        assert response.content.count(b"\n") == 1
+        assert json.loads(response.content)["id"] == lead.pk
+
+
+class TestMessagePackRenderer:
+    def test_pure_python_matches_msgpack(self):
+        """Test the fallback encoder writes the same bytes as the msgpack package"""
+        msgpack = pytest.importorskip("msgpack")
+        values = [
+            AWKWARD,
+            [0, 127, 128, 255, 256, 65535, 65536, 2**32, 2**63],
+            [-1, -32, -33, -128, -129, -32768, -32769, -(2**31) - 1, -(2**63)],
+            ["", "a" * 31, "a" * 32, "a" * 256, "a" * 65536],
+            [b"", b"x" * 256, list(range(15)), list(range(16)), list(range(70000))],
+            {str(i): i for i in range(16)},
+        ]
+        for value in values:
+            assert renderers.packb(value) == msgpack.packb(value, default=renderers.encode_default)
+
+    def test_fallback_used_without_msgpack(self, monkeypatch):
+        """Test the renderer works without the msgpack package"""
+        monkeypatch.setattr(renderers, "msgpack", None)
+        content = renderers.MessagePackRenderer().render({"a": [1, "b"]})
+        assert content == b"\x81\xa1a\x92\x01\xa1b"
+
+    @pytest.mark.django_db
+    def test_api_response(self, client, user):
+        """Test a list decodes to the same data as the JSON response"""
+        msgpack = pytest.importorskip("msgpack")
+        DealFactory.create_batch(2, owner=user)
+        expected = client.get("/api/v1/deals/").json()
+        response = client.get("/api/v1/deals/", HTTP_ACCEPT="application/msgpack")
+        assert response["Content-Type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == expected
@@ -0,0 +1,122 @@
+"""
+OpenAPI schema tests for CRM application.
+Tests the prebuilt schema artifact, its caching headers and regeneration.
+"""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api import schema
+
+URL = "/api/v1/api/schema/"
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    calls = []
+    generate = schema.generate
+
+    def counting_generate():
+        calls.append(1)
+        return generate()
+
+    monkeypatch.setattr(schema, "generate", counting_generate)
+    return calls
+
+
+class TestSchemaView:
+    def test_json(self, client):
+        """Test the schema lists every API endpoint"""
+        response = client.get(URL, HTTP_ACCEPT="application/json")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/vnd.oai.openapi+json"
+        paths = json.loads(response.content)["paths"]
+        assert "/api/v1/leads/" in paths
+        assert "/api/v1/deals/{id}/" in paths
+
+    def test_views_described_by_their_own_docstrings(self, client):
+        """Test the view mixins neither break nor describe the views they extend"""
+        response = client.get(URL, HTTP_ACCEPT="application/json")
+        paths = json.loads(response.content)["paths"]
+        for path in ("/api/v1/health/", "/api/v1/leads/", "/api/v1/deals/{id}/"):
+            assert "description" not in paths[path]["get"]
+
+    def test_yaml_by_default(self, client):
+        """Test YAML is served unless JSON is asked for"""
+        response = client.get(URL)
+        assert response["Content-Type"] == "application/vnd.oai.openapi"
+        assert "/api/v1/leads/" in yaml.safe_load(response.content)["paths"]
+        assert client.get(URL, {"format": "json"})["Content-Type"].endswith("+json")
+
+    def test_caching_headers(self, client, settings):
+        """Test the response carries an ETag and a public max-age"""
+        settings.OPENAPI_SCHEMA_MAX_AGE = 600
+        response = client.get(URL)
+        assert response["ETag"].startswith('"')
+        assert "public" in response["Cache-Control"]
+        assert "max-age=600" in response["Cache-Control"]
+        assert "Accept" in response["Vary"]
+
+    def test_not_modified(self, client):
+        """Test a matching If-None-Match gets a 304 without a body"""
+        etag = client.get(URL)["ETag"]
+        response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+        json_etag = client.get(URL, {"format": "json"})["ETag"]
+        assert json_etag != etag
+
+
+class TestSchemaArtifact:
+    def test_generated_once(self, client, generations, openapi_schema_dir):
+        """Test the first request writes the artifact and later ones reuse it"""
+        client.get(URL)
+        client.get(URL)
+        assert len(generations) == 1
+        assert (Path(openapi_schema_dir) / "openapi.json").exists()
+
+        # A new process reads the files instead of generating.
+        schema.reset()
+        client.get(URL)
+        assert len(generations) == 1
+
+    def test_regenerated_for_new_code_version(
+        self, client, generations, settings, openapi_schema_dir
+    ):
+        """Test a schema built for other code is regenerated"""
+        settings.CODE_VERSION = "release-1"
+        client.get(URL)
+        schema.reset()
+        settings.CODE_VERSION = "release-2"
+        client.get(URL)
+        assert len(generations) == 2
+        assert (Path(openapi_schema_dir) / schema.VERSION_FILE).read_text() == "release-2"
+
+    def test_source_digest_by_default(self, settings):
+        """Test the code version falls back to a digest of the source"""
+        settings.CODE_VERSION = ""
+        assert schema.code_version() == schema.code_version()
+        assert len(schema.code_version()) == 16
+
+    def test_build_schema_command(self, client, generations, tmp_path, settings):
+        """Test the command builds the artifact requests are then served from"""
+        settings.OPENAPI_SCHEMA_DIR = str(tmp_path / "built")
+        out = io.StringIO()
+        call_command("build_schema", stdout=out)
+        assert "Built OpenAPI schema" in out.getvalue()
+        built = (tmp_path / "built" / "openapi.yaml").read_bytes()
+
+        response = client.get(URL)
+        assert response.content == built
+        assert len(generations) == 1
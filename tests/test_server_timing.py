@@ -0,0 +1,68 @@
+"""
+Server-Timing instrumentation tests for CRM application.
+Tests the per-phase timing header, the structured log line and sampling.
+"""
+
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.views import HealthCheckView
+from leads.views import LeadViewSet
+from tests.factories import LeadFactory, UserFactory
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def phases(response):
+    return {part.split(";")[0]: part for part in response["Server-Timing"].split(", ")}
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    def test_header_reports_phases(self, client, user, settings):
+        """Test sampled responses carry per-phase and SQL timings"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+        LeadFactory.create_batch(2, owner=user)
+
+        response = client.get(reverse("lead-list"))
+
+        timings = phases(response)
+        for name in ("auth", "permissions", "throttle", "view", "serialize", "render", "total"):
+            assert name in timings
+        assert 'desc="' in timings["db"] and "0 queries" not in timings["db"]
+
+    def test_structured_log_line(self, client, settings, caplog):
+        """Test each sampled request logs one JSON record"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+        with caplog.at_level(logging.INFO, logger="api.timing"):
+            client.get(reverse("health-check"))
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record["path"] == reverse("health-check")
+        assert record["status"] == 200
+        assert record["total_ms"] >= record["render_ms"]
+
+    def test_unsampled_requests_are_untouched(self, client, settings):
+        """Test a zero sample rate disables the header"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 0
+        response = client.get(reverse("health-check"))
+        assert "Server-Timing" not in response
+
+    def test_serializer_timing_only_on_generic_views(self):
+        """Test plain APIViews get no get_serializer() from the timing mixin"""
+        assert not hasattr(HealthCheckView(), "get_serializer")
+        assert hasattr(LeadViewSet(), "get_serializer")
@@ -0,0 +1,116 @@
+"""
+Server entry point tests for CRM application.
+Tests worker autotuning and the serve command's dry run.
+"""
+
+import io
+import os
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api import serving
+
+host_cpu_count = serving.cpu_count
+
+
+@pytest.fixture(autouse=True)
+def four_cpus(monkeypatch):
+    monkeypatch.setattr(serving, "cpu_count", lambda: 4)
+
+
+class TestPlan:
+    def test_wsgi_on_postgres(self):
+        """Test threaded workers are sized from the CPU count within the default cap"""
+        plan = serving.plan({"DATABASE_URL": "postgres://db/crm"})
+        assert plan.app == "dcrm.wsgi:application"
+        assert (plan.worker_class, plan.workers, plan.threads) == ("gthread", 9, 2)
+        assert plan.workers * plan.threads <= serving.DEFAULT_MAX_CONNECTIONS
+
+        plan = serving.plan({"DATABASE_URL": "postgres://db/crm", "DB_MAX_CONNECTIONS": "0"})
+        assert (plan.worker_class, plan.workers, plan.threads) == ("gthread", 9, 4)
+
+    def test_wsgi_on_sqlite(self):
+        """Test SQLite gets single-threaded sync workers"""
+        plan = serving.plan({})
+        assert (plan.worker_class, plan.workers, plan.threads) == ("sync", 9, 1)
+
+    def test_database_connection_cap(self):
+        """Test workers and threads are kept within DB_MAX_CONNECTIONS"""
+        plan = serving.plan({"DATABASE_URL": "postgres://db/crm", "DB_MAX_CONNECTIONS": "20"})
+        assert plan.workers * plan.threads <= 20
+        assert (plan.workers, plan.threads) == (9, 2)
+
+        plan = serving.plan({"DATABASE_URL": "postgres://db/crm", "DB_MAX_CONNECTIONS": "5"})
+        assert (plan.workers, plan.threads, plan.worker_class) == (5, 1, "sync")
+
+    def test_asgi(self):
+        """Test ASGI mode runs one uvicorn worker per CPU"""
+        plan = serving.plan({"SERVER_MODE": "asgi", "PORT": "9000"})
+        assert plan.app == "dcrm.asgi:application"
+        assert (plan.worker_class, plan.workers, plan.threads) == (serving.ASGI_WORKER, 4, 1)
+        assert plan.bind == "0.0.0.0:9000"
+
+    def test_environment_overrides(self):
+        """Test explicit worker, thread and recycling settings win"""
+        plan = serving.plan(
+            {"WEB_CONCURRENCY": "3", "SERVER_THREADS": "8", "WORKER_MAX_MEMORY_MB": "0"}
+        )
+        assert (plan.worker_class, plan.workers, plan.threads) == ("gthread", 3, 8)
+        assert plan.max_memory_mb == 0
+
+    def test_unknown_mode(self):
+        """Test an unknown SERVER_MODE is rejected"""
+        with pytest.raises(ValueError):
+            serving.plan({"SERVER_MODE": "cgi"})
+
+
+class TestCpuCount:
+    def test_cgroup_v2_quota(self, tmp_path):
+        """Test cpu.max is read as CPUs, rounded up"""
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+        assert serving.cgroup_cpu_limit(str(tmp_path)) == 2
+
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert serving.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        """Test the CFS quota and period are read when there is no cpu.max"""
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("300000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        assert serving.cgroup_cpu_limit(str(tmp_path)) == 3
+
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+        assert serving.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_no_cgroup(self, tmp_path):
+        """Test no quota is assumed without cgroup files"""
+        assert serving.cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_quota_below_affinity(self, tmp_path, monkeypatch):
+        """Test a container's quota caps the CPU count and so the workers"""
+        (tmp_path / "cpu.max").write_text("200000 100000\n")
+        monkeypatch.setattr(serving, "CGROUP_ROOT", str(tmp_path))
+        assert host_cpu_count() == min(2, len(os.sched_getaffinity(0)))
+
+        monkeypatch.setattr(serving, "cpu_count", host_cpu_count)
+        plan = serving.plan({"SERVER_MODE": "asgi"})
+        assert plan.workers == min(2, len(os.sched_getaffinity(0)))
+
+
+class TestServeCommand:
+    def test_dry_run(self):
+        """Test the dry run prints the settings the server would start with"""
+        out = io.StringIO()
+        call_command("serve", "--dry-run", "--workers", "2", "--bind", "127.0.0.1:9", stdout=out)
+        lines = dict(line.split(None, 1) for line in out.getvalue().splitlines())
+        assert lines["workers"] == "2"
+        assert lines["bind"] == "127.0.0.1:9"
+
+    def test_missing_server_package(self, monkeypatch):
+        """Test a clear error when the server package is not installed"""
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        with pytest.raises(CommandError, match="gunicorn is not installed"):
+            call_command("serve", "--dry-run", stdout=io.StringIO())
@@ -0,0 +1,72 @@
+"""
+Slow query log tests for CRM application.
+Tests SQL fingerprinting, background EXPLAIN capture and the summary command.
+"""
+
+import io
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import slow_queries
+from api.models import SlowQuery
+from leads.models import Lead
+from tests.factories import LeadFactory, UserFactory
+
+
+class TestFingerprint:
+    def test_literals_are_normalized(self):
+        """Test queries differing only in literals share a fingerprint"""
+        first = slow_queries.normalize(
+            "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x' LIMIT 20"
+        )
+        second = slow_queries.normalize("SELECT *  FROM t WHERE id IN (%s) AND name = %s LIMIT 5")
+        assert first == second == "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?"
+
+    def test_identifiers_are_kept(self):
+        """Test digits inside identifiers are not treated as literals"""
+        sql = 'SELECT "t1"."col2" FROM "t1" WHERE "t1"."id" = %s'
+        assert slow_queries.normalize(sql) == 'SELECT "t1"."col2" FROM "t1" WHERE "t1"."id" = ?'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSlowQueryLog:
+    def test_slow_queries_are_explained_and_stored(self, settings):
+        """Test slow queries are stored with their view and EXPLAIN plan"""
+        user = UserFactory()
+        LeadFactory(owner=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        settings.SLOW_QUERY_LOG_MS = 0.000001
+        client.get(reverse("lead-list"))
+        settings.SLOW_QUERY_LOG_MS = 0
+        slow_queries.drain()
+
+        entry = SlowQuery.objects.filter(sql__contains='FROM "leads_lead"').first()
+        assert entry is not None
+        assert entry.view == "GET lead-list"
+        assert entry.explain and "EXPLAIN failed" not in entry.explain
+
+    def test_disabled_by_default(self, settings):
+        """Test nothing is recorded when the threshold is zero"""
+        settings.SLOW_QUERY_LOG_MS = 0
+        list(Lead.objects.all())
+        slow_queries.drain()
+        assert not SlowQuery.objects.exists()
+
+    def test_summary_command(self):
+        """Test the summary ranks fingerprints by total time"""
+        for duration in (5, 7):
+            SlowQuery.objects.create(
+                fingerprint="a" * 40, sql="SELECT a", view="GET x", duration_ms=duration
+            )
+        SlowQuery.objects.create(fingerprint="b" * 40, sql="SELECT b", duration_ms=10)
+
+        out = io.StringIO()
+        call_command("slow_queries", stdout=out)
+        lines = out.getvalue().splitlines()
+        assert lines[0].startswith("1. aaaaaaaaaaaa  total 12ms  count 2")
+        assert "GET x (2)" in lines[1]
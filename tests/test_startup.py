@@ -0,0 +1,72 @@
+"""
+Start-up tests for CRM application.
+Tests the import-time budget, lazily imported modules and the import report.
+"""
+
+import io
+import os
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api import startup
+from leads.views import LeadViewSet
+from tests.factories import UserFactory
+
+# Generous, so slow CI machines pass; override with STARTUP_BUDGET_MS.
+BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+
+
+@pytest.fixture(scope="module")
+def cold_start():
+    return startup.measure()
+
+
+class TestStartup:
+    def test_within_budget(self, cold_start):
+        """Test django.setup() plus URLconf loading stays within the budget"""
+        elapsed_ms, _modules = cold_start
+        assert elapsed_ms < BUDGET_MS, f"start-up took {elapsed_ms:.0f}ms"
+
+    def test_lazy_modules_not_imported(self, cold_start):
+        """Test the schema machinery and storage SDKs are not imported at start-up"""
+        _elapsed_ms, modules = cold_start
+        assert not set(startup.LAZY_MODULES) & set(modules)
+
+    def test_import_report(self):
+        """Test the report lists modules and the start-up time"""
+        out = io.StringIO()
+        call_command("import_report", top=5, sort="self", stdout=out)
+        output = out.getvalue()
+        assert "django" in output
+        assert "start-up took" in output
+
+
+@pytest.mark.django_db
+class TestLazyDocs:
+    @pytest.fixture
+    def client(self):
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+        return client
+
+    def test_schema_endpoint(self, client):
+        """Test the schema is generated on first request"""
+        response = client.get("/api/v1/api/schema/", HTTP_ACCEPT="application/json")
+        assert response.status_code == 200
+        assert response.json()["openapi"].startswith("3.")
+
+    def test_views_get_spectacular_schema(self, client):
+        """Test views inspect with drf-spectacular's AutoSchema once it is loaded"""
+        from drf_spectacular.openapi import AutoSchema
+
+        client.get("/api/v1/api/schema/")
+        assert isinstance(LeadViewSet().schema, AutoSchema)
+
+    @pytest.mark.parametrize("url", ["/api/v1/api/docs/", "/api/v1/api/redoc/"])
+    def test_docs_pages(self, client, url):
+        """Test the docs pages render"""
+        response = client.get(url)
+        assert response.status_code == 200
+        assert b"api/schema/" in response.content